@@ -0,0 +1,125 @@
+"""
+Conversation Memory Benchmark
+Replays a scripted 100-turn session against the old count-based history
+("system + last 10") and the token-budgeted ConversationMemory, and reports
+prompt tokens and latency per turn. Runs offline - no Groq calls.
+
+Run from the voice_agent folder:
+    python -m benchmarks.bench_memory
+"""
+
+import json
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from core.memory import ConversationMemory, message_tokens
+from core.brain import SYSTEM_PROMPT
+
+# Modelled LLM latency: fixed overhead + prompt prefill time per token.
+# Numbers are in the right range for a hosted 70B model; only the relative
+# difference between the two strategies matters.
+BASE_LATENCY_MS = 180.0
+PREFILL_MS_PER_TOKEN = 0.08
+
+TURNS = 100
+
+# (utterance, stubbed plan, stubbed tool result)
+SCRIPT = [
+    ("open chrome", [{"tool": "open_app", "app_name": "chrome"}], "chrome opened"),
+    ("what time is it", [{"tool": "get_time"}], "It is 03:15 PM"),
+    ("tell me about albert einstein", [{"tool": "wikipedia", "topic": "Albert Einstein"}],
+     "📖 Albert Einstein\n\n" + "Albert Einstein was a German-born theoretical physicist " * 12),
+    ("what's the weather in karachi", [{"tool": "get_weather", "city": "Karachi"}],
+     "🌤️ Weather in Karachi:\nTemperature: 31°C (88°F)\nCondition: Sunny\nHumidity: 60%\nWind Speed: 12 km/h"),
+    ("get me the tech news", [{"tool": "get_news", "category": "tech"}],
+     "📰 Latest tech news:\n\n" + "".join(f"{i}. Headline number {i} about a new gadget launch\n" for i in range(1, 6))),
+    ("add milk to my shopping note", [{"tool": "append_note", "title": "shopping", "text": "milk"}],
+     "Added to note 'shopping'."),
+    ("remind me to call john in 10 minutes",
+     [{"tool": "set_reminder", "message": "Call John", "time": "in 10 minutes"}],
+     "Reminder set for 9 minutes: Call John"),
+    ("list my documents folder", [{"tool": "list_directory", "path": "~/Documents"}],
+     "Contents of ~/Documents:\n" + "\n".join(f"📄 report_{i}.docx" for i in range(40))),
+    ("thanks", [{"tool": "response", "text": "You're welcome!"}], ""),
+    ("turn up the volume", [{"tool": "control_volume", "action": "up"}], "Volume increased."),
+    ("create a note called meeting with " + "we agreed to ship the release next week and review the budget " * 10,
+     [{"tool": "create_note", "title": "meeting",
+       "content": "we agreed to ship the release next week and review the budget " * 10}],
+     "Note 'meeting' created successfully."),
+]
+
+def legacy_messages(history, user_input):
+    """The original trimming policy from core/brain.think."""
+    history.append({"role": "user", "content": user_input})
+    if len(history) > 12:
+        history[:] = [history[0]] + history[-10:]
+    return list(history)
+
+def modelled_latency_ms(prompt_tokens):
+    return BASE_LATENCY_MS + prompt_tokens * PREFILL_MS_PER_TOKEN
+
+def run_legacy():
+    history = [{"role": "system", "content": SYSTEM_PROMPT}]
+    rows = []
+    for turn in range(TURNS):
+        utterance, plan, result = SCRIPT[turn % len(SCRIPT)]
+        start = time.perf_counter()
+        messages = legacy_messages(history, utterance)
+        build_ms = (time.perf_counter() - start) * 1000
+        tokens = sum(message_tokens(m) for m in messages)
+        history.append({"role": "assistant", "content": json.dumps(plan)})
+        # The old loop never fed tool results back, so they cost nothing here
+        rows.append((tokens, build_ms, modelled_latency_ms(tokens) + build_ms))
+    return rows
+
+def run_memory(budget):
+    memory = ConversationMemory(SYSTEM_PROMPT, budget=budget)
+    rows = []
+    for turn in range(TURNS):
+        utterance, plan, result = SCRIPT[turn % len(SCRIPT)]
+        start = time.perf_counter()
+        memory.add_user(utterance)
+        messages = memory.build_messages()
+        build_ms = (time.perf_counter() - start) * 1000
+        tokens = sum(message_tokens(m) for m in messages)
+        memory.add_assistant(json.dumps(plan))
+        memory.add_result(plan[0]["tool"], result)
+        rows.append((tokens, build_ms, modelled_latency_ms(tokens) + build_ms))
+    return rows
+
+def summarize(name, rows):
+    tokens = [r[0] for r in rows]
+    build = [r[1] for r in rows]
+    latency = [r[2] for r in rows]
+    print(f"{name:<28} tokens avg {sum(tokens) / len(tokens):7.0f}  max {max(tokens):6d}  "
+          f"total {sum(tokens):8d} | build avg {sum(build) / len(build):.3f} ms | "
+          f"latency avg {sum(latency) / len(latency):6.1f} ms")
+
+def main():
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    legacy = run_legacy()
+    memory = run_memory(budget)
+
+    print("=" * 60)
+    print(f"MEMORY BENCHMARK - {TURNS} turns, budget {budget} tokens")
+    print("=" * 60)
+    print(f"{'turn':>4} | {'legacy tok':>10} {'legacy ms':>9} | {'memory tok':>10} {'memory ms':>9}")
+    for i, (old, new) in enumerate(zip(legacy, memory), 1):
+        if i <= 12 or i % 10 == 0:
+            print(f"{i:>4} | {old[0]:>10} {old[2]:>9.1f} | {new[0]:>10} {new[2]:>9.1f}")
+    print("-" * 60)
+    summarize("legacy (system + last 10)", legacy)
+    summarize("ConversationMemory", memory)
+    print("Note: legacy never sends tool results; ConversationMemory pins up to")
+    print("      2 relevant results per request and still caps every prompt.")
+
+    over_budget = [i for i, r in enumerate(memory, 1) if r[0] > budget]
+    if over_budget:
+        print(f"❌ Budget exceeded on turns: {over_budget}")
+        sys.exit(1)
+    print("✅ Every request stayed within the token budget")
+
+if __name__ == "__main__":
+    main()
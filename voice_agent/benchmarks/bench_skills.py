@@ -0,0 +1,267 @@
+"""
+Skill Microbenchmarks
+Times the skill hot paths on synthetic data in a temp folder: file search and
+directory listing on large trees, reminder time parsing and the due-reminder
+scan, listing thousands of notes and screenshots, screenshot encoding and
+hashing on synthetic 1080p frames (needs Pillow; skipped without it), and the
+JSON normalization in brain.think. Runs offline on Linux/macOS/Windows - no
+network, no display.
+
+Results are compared against benchmarks/skills_baseline.json; a benchmark
+whose median per-call time grows beyond the tolerance fails the run (exit 1).
+The first run without a baseline records one; benchmarks with no baseline
+entry are reported but not compared.
+
+Run from the voice_agent folder:
+    python -m benchmarks.bench_skills                    # compare with baseline
+    python -m benchmarks.bench_skills --update-baseline  # record a new baseline
+    python -m benchmarks.bench_skills --only notes --repeat 10
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, ".")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCH_DIR, "skills_baseline.json")
+
+# A benchmark regresses when its median exceeds baseline * (1 + TOLERANCE) + SLACK_MS
+TOLERANCE = 0.5
+SLACK_MS = 0.2
+
+# ===== Synthetic data =====
+
+def make_tree(root, depth=3, fanout=8, files_per_dir=20):
+    """Nested folders of empty files; ~12k files with the defaults."""
+    count = 0
+    level = [root]
+    deepest = root
+    for d in range(depth + 1):
+        next_level = []
+        for folder in level:
+            deepest = folder
+            os.makedirs(folder, exist_ok=True)
+            for i in range(files_per_dir):
+                ext = (".txt", ".pdf", ".py", ".docx")[i % 4]
+                open(os.path.join(folder, f"file_{d}_{i}{ext}"), "w").close()
+                count += 1
+            if d < depth:
+                next_level.extend(os.path.join(folder, f"dir_{d}_{j}") for j in range(fanout))
+        level = next_level
+    # One match deep in the tree
+    open(os.path.join(deepest, "quarterly_report.xlsx"), "w").close()
+    return count + 1
+
+def make_flat(folder, entries=10000, folders=1000):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(folders):
+        os.makedirs(os.path.join(folder, f"folder_{i:05d}"))
+    for i in range(entries - folders):
+        open(os.path.join(folder, f"item_{i:05d}.dat"), "w").close()
+
+def make_files(folder, count, pattern):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(folder, pattern.format(i=i)), "w") as f:
+            f.write("x")
+
+def make_frame(width=1920, height=1080, seed=0):
+    """A desktop-like RGB frame: gradient wallpaper, windows and rows of 'text'."""
+    import random
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    frame = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    draw = ImageDraw.Draw(frame)
+    for _ in range(4):
+        x, y = rng.randrange(width // 2), rng.randrange(height // 2)
+        w, h = rng.randrange(400, width // 2), rng.randrange(300, height // 2)
+        draw.rectangle((x, y, x + w, y + h), fill=(250, 250, 250), outline=(90, 90, 90))
+        for line_y in range(y + 30, y + h - 10, 18):
+            line_x = x + 10
+            while line_x < x + w - 40:
+                word = rng.randrange(10, 60)
+                draw.rectangle((line_x, line_y, line_x + word, line_y + 9), fill=(30, 30, 30))
+                line_x += word + 8
+    return frame
+
+def make_reminders(count):
+    start = datetime.now() + timedelta(days=1)
+    return [{"message": f"Reminder {i}", "time": (start + timedelta(minutes=i)).isoformat(),
+             "created": datetime.now().isoformat()} for i in range(count)]
+
+# ===== Timing =====
+
+def bench(fn, repeat, min_time=0.05):
+    """
+    Calls fn in batches until each batch takes at least min_time, repeat times.
+    Returns per-call milliseconds: (min, median, mean).
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    samples = [s * 1000 for s in samples]
+    return min(samples), statistics.median(samples), statistics.mean(samples)
+
+# ===== Benchmarks =====
+
+def build_cases(work_dir, only=None):
+    """Returns [(group, name, fn)], with each skill pointed at work_dir data."""
+    from skills import file_manager, reminders, screen_tools
+    from core.brain import parse_actions
+
+    cases = []
+
+    if only in (None, "files"):
+        tree = os.path.join(work_dir, "tree")
+        tree_files = make_tree(tree)
+        flat = os.path.join(work_dir, "flat")
+        make_flat(flat)
+        cases += [
+            ("files", f"search_files miss ({tree_files} files)",
+             lambda: file_manager.search_files("no_such_file", location=tree)),
+            ("files", "search_files deep hit",
+             lambda: file_manager.search_files("quarterly", location=tree)),
+            ("files", "search_files extension filter",
+             lambda: file_manager.search_files("file_3", location=tree, extension=".pdf")),
+            ("files", "list_directory (10k entries)",
+             lambda: file_manager.list_directory(flat)),
+        ]
+
+    if only in (None, "reminders"):
+        reminders.REMINDERS_FILE = os.path.join(work_dir, "reminders.json")
+        reminders.ACTIVE_REMINDERS = make_reminders(10000)
+        phrases = ["in 5 minutes", "in 2 hours", "at 3:00 PM", "at 15:30", "at 7 am", "tomorrow"]
+        cases += [
+            ("reminders", "parse_time_string (6 phrases)",
+             lambda: [reminders.parse_time_string(p) for p in phrases]),
+            ("reminders", "check_reminders pass (10k pending)",
+             lambda: reminders.process_due_reminders()),
+        ]
+
+    if only in (None, "notes"):
+        reminders.NOTES_DIR = os.path.join(work_dir, "notes")
+        reminders.NOTES_HISTORY_DIR = os.path.join(reminders.NOTES_DIR, ".history")
+        make_files(reminders.NOTES_DIR, 3000, "note_{i:05d}.txt")
+        cases.append(("notes", "list_notes (3000 notes)", reminders.list_notes))
+
+    if only in (None, "screenshots"):
+        screen_tools.SCREENSHOT_DIR = os.path.join(work_dir, "screenshots")
+        make_files(screen_tools.SCREENSHOT_DIR, 3000, "screenshot_{i:05d}.png")
+        cases.append(("screenshots", "list_screenshots (3000 png)", screen_tools.list_screenshots))
+
+    if only in (None, "capture"):
+        try:
+            from skills import capture
+            frame = make_frame()
+        except ImportError as e:
+            print(f"Skipping capture benchmarks: {e}")
+        else:
+            import io
+            def encode(fmt, **options):
+                def run():
+                    buffer = io.BytesIO()
+                    if options:
+                        frame.save(buffer, **options)
+                    else:
+                        capture.encode_image(frame, buffer, fmt)
+                return run
+            cases += [
+                ("capture", "encode png default (1080p)", encode("png", format="PNG")),
+                ("capture", "encode png fast (1080p)", encode("png")),
+                ("capture", "encode webp (1080p)", encode("webp")),
+                ("capture", "encode jpeg (1080p)", encode("jpeg")),
+                ("capture", "dhash (1080p)", lambda: capture.dhash(frame)),
+            ]
+
+    if only in (None, "brain"):
+        single = json.dumps({"tool": "get_time"})
+        wrapped = json.dumps({"actions": [{"tool": "open_app", "app_name": "chrome"},
+                                          {"tool": "get_weather", "city": "Karachi"}]})
+        bare_list = json.dumps([{"tool": "response", "text": "Hello! " * 20}])
+        large = json.dumps({"actions": [{"tool": "create_note", "title": f"n{i}", "content": "x" * 200}
+                                        for i in range(50)]})
+        cases += [
+            ("brain", "parse_actions (single/wrapped/list)",
+             lambda: (parse_actions(single), parse_actions(wrapped), parse_actions(bare_list))),
+            ("brain", "parse_actions (50-action plan)", lambda: parse_actions(large)),
+        ]
+    return cases
+
+def compare(results, baseline, tolerance=TOLERANCE, slack_ms=SLACK_MS):
+    problems = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name}: not in the baseline yet (record it with --update-baseline)")
+            continue
+        limit = base["median_ms"] * (1 + tolerance) + slack_ms
+        if result["median_ms"] > limit:
+            problems.append(f"{name}: {result['median_ms']:.3f} ms > {limit:.3f} ms (baseline {base['median_ms']:.3f})")
+    return problems
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Skill hot-path microbenchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="run one group: files, reminders, notes, screenshots, capture, brain")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="nexus_bench_")
+    results = {}
+    try:
+        print("Building synthetic data...")
+        cases = build_cases(work_dir, args.only)
+        print(f"{'benchmark':<42} {'min ms':>10} {'median ms':>10} {'mean ms':>10}")
+        for group, name, fn in cases:
+            best, median, mean = bench(fn, args.repeat)
+            results[name] = {"min_ms": round(best, 4), "median_ms": round(median, 4), "mean_ms": round(mean, 4)}
+            print(f"{name:<42} {best:>10.3f} {median:>10.3f} {mean:>10.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.update_baseline or not os.path.exists(BASELINE_FILE):
+        baseline = {}
+        if os.path.exists(BASELINE_FILE):
+            with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline written to {BASELINE_FILE}")
+        return 0
+
+    with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("REGRESSIONS vs baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print("No regressions vs baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,380 @@
+"""
+Offline Replay Benchmark
+Replays a scripted voice session through the real listen -> think ->
+execute_action -> speak code paths, with every external service faked:
+
+  - microphone: WAV files fed to speech_recognition via sr.AudioFile
+    (benchmarks/fixtures/wav/<name>.wav if recorded, otherwise a
+    deterministic synthetic utterance is generated)
+  - speech-to-text: transcripts from the fixture, matched to the audio
+  - LLM: a local OpenAI-compatible HTTP stub returning the fixture plans
+    (used through LOCAL_LLM_URL, so core/llm routing runs as normal)
+  - web APIs: a local HTTP stub for skills/web_search
+  - text-to-speech / playback: fake edge-tts and pygame mixer
+
+Reports throughput and per-stage latency from the tracer, checks that every
+turn produced the expected tools, and compares against a stored baseline.
+Exits with 1 on a failed turn or a latency/throughput regression. The
+first run without a baseline records one and only checks the turns.
+
+Run from the voice_agent folder:
+    python -m benchmarks.replay                     # compare with baseline
+    python -m benchmarks.replay --update-baseline   # record a new baseline
+    python -m benchmarks.replay --rounds 5 --pipelined --plan-cache
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+sys.path.insert(0, ".")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_FILE = os.path.join(BENCH_DIR, "fixtures", "replay_session.json")
+WAV_DIR = os.path.join(BENCH_DIR, "fixtures", "wav")
+BASELINE_FILE = os.path.join(BENCH_DIR, "replay_baseline.json")
+
+EXIT_UTTERANCE = {"wav": "exit.wav", "transcript": "stop listening", "plan": []}
+
+# A stage regresses when its p95 exceeds baseline * (1 + TOLERANCE) + SLACK_MS
+TOLERANCE = 0.5
+SLACK_MS = 5.0
+
+SAMPLE_RATE = 16000
+
+# ===== Synthetic audio =====
+
+def synthesize_wav(path, seed):
+    """
+    Writes a 16 kHz mono utterance: room noise long enough for the 1.2 s
+    ambient calibration, ~0.8 s of voiced sound, then trailing silence
+    that ends the phrase. Each seed gives different samples so the fake
+    STT can tell utterances apart.
+    """
+    rng = random.Random(seed)
+    f1 = 140 + seed % 60
+    f2 = 2.7 * f1
+    samples = []
+    for _ in range(int(1.4 * SAMPLE_RATE)):
+        samples.append(rng.gauss(0, 25))
+    for i in range(int(0.8 * SAMPLE_RATE)):
+        t = i / SAMPLE_RATE
+        envelope = 0.6 + 0.4 * math.sin(2 * math.pi * 4 * t)
+        voiced = math.sin(2 * math.pi * f1 * t) + 0.5 * math.sin(2 * math.pi * f2 * t)
+        samples.append(5000 * envelope * voiced + rng.gauss(0, 25))
+    for _ in range(int(1.4 * SAMPLE_RATE)):
+        samples.append(rng.gauss(0, 25))
+
+    frames = bytearray()
+    for s in samples:
+        frames += int(max(-32768, min(32767, s))).to_bytes(2, "little", signed=True)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(bytes(frames))
+
+def prepare_wavs(utterances, work_dir):
+    """Returns {wav name: path}, synthesizing any recording that is missing."""
+    paths = {}
+    for seed, utt in enumerate(utterances, 1):
+        recorded = os.path.join(WAV_DIR, utt["wav"])
+        if os.path.exists(recorded):
+            paths[utt["wav"]] = recorded
+        else:
+            path = os.path.join(work_dir, utt["wav"])
+            synthesize_wav(path, seed)
+            paths[utt["wav"]] = path
+    return paths
+
+# ===== Fake microphone / STT =====
+
+class FakeAudio:
+    """Feeds queued WAV files to core.listen as if they came from the mic."""
+
+    def __init__(self, sr, wav_paths, transcripts):
+        self.sr = sr
+        self.queue = deque()
+        self.lock = threading.Lock()
+        # Decoded PCM of each file -> transcript, for matching captured audio
+        self.fingerprints = []
+        recognizer = sr.Recognizer()
+        for name, path in wav_paths.items():
+            with sr.AudioFile(path) as source:
+                frames = recognizer.record(source).frame_data
+            self.fingerprints.append((frames, transcripts[name]))
+
+    def push(self, path):
+        with self.lock:
+            self.queue.append(path)
+
+    def microphone(self, *args, **kwargs):
+        with self.lock:
+            if not self.queue:
+                raise OSError("replay finished - no more utterances")
+            path = self.queue.popleft()
+        return self.sr.AudioFile(path)
+
+    def recognize(self, recognizer, audio_data, *args, **kwargs):
+        """Stands in for Recognizer.recognize_google."""
+        probe = audio_data.frame_data[:4096]
+        for frames, transcript in self.fingerprints:
+            if probe and probe in frames:
+                return transcript
+        raise self.sr.UnknownValueError()
+
+# ===== Fake text-to-speech / playback =====
+
+class FakeCommunicate:
+    def __init__(self, text, voice=None):
+        self.text = text
+
+    async def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.text)
+
+class FakeMusic:
+    """pygame.mixer.music stand-in; "plays" for ms_per_char per character."""
+
+    def __init__(self, ms_per_char):
+        self.ms_per_char = ms_per_char
+        self.length = 0.0
+        self.ends_at = 0.0
+
+    def load(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            self.length = len(f.read()) * self.ms_per_char / 1000
+
+    def play(self):
+        self.ends_at = time.monotonic() + self.length
+
+    def get_busy(self):
+        return time.monotonic() < self.ends_at
+
+    def stop(self):
+        self.ends_at = 0.0
+
+class FakeClock:
+    def tick(self, fps):
+        time.sleep(1 / fps)
+
+def fake_pygame(ms_per_char):
+    mixer = SimpleNamespace(init=lambda: None, quit=lambda: None, music=FakeMusic(ms_per_char))
+    return SimpleNamespace(mixer=mixer, time=SimpleNamespace(Clock=FakeClock))
+
+# ===== HTTP stubs (LLM + web APIs) =====
+
+class StubHandler(BaseHTTPRequestHandler):
+    plans = {}
+    web = {}
+    llm_delay = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            return self._reply(404, {"error": "not found"})
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        user = [m["content"] for m in request.get("messages", []) if m.get("role") == "user"]
+        text = user[-1].strip().lower() if user else ""
+        plan = self.plans.get(text, [{"tool": "response", "text": "Sorry, I did not get that."}])
+        if self.llm_delay:
+            time.sleep(self.llm_delay)
+        self._reply(200, {"choices": [{"message": {"role": "assistant",
+                                                   "content": json.dumps({"actions": plan})}}]})
+
+    def do_GET(self):
+        routes = {
+            "/wiki/": "wikipedia", "/weather/": "weather", "/news": "news",
+            "/dict/": "dictionary", "/ddg": "duckduckgo",
+        }
+        for prefix, key in routes.items():
+            if self.path.startswith(prefix) and key in self.web:
+                return self._reply(200, self.web[key])
+        self._reply(404, {"error": "not found"})
+
+def start_stub_server(plans, web, llm_delay):
+    StubHandler.plans = plans
+    StubHandler.web = web
+    StubHandler.llm_delay = llm_delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="replay-stub").start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# ===== Baseline =====
+
+def compare(current, baseline, tolerance=TOLERANCE, slack_ms=SLACK_MS):
+    """Returns a list of regression messages (empty if none)."""
+    problems = []
+    for name, base in baseline.get("stages", {}).items():
+        stage = current["stages"].get(name)
+        if stage is None:
+            continue
+        limit = base["p95"] * (1 + tolerance) + slack_ms
+        if stage["p95"] > limit:
+            problems.append(f"{name}: p95 {stage['p95']:.1f} ms > {limit:.1f} ms (baseline {base['p95']:.1f})")
+    base_tps = baseline.get("turns_per_second")
+    if base_tps:
+        floor = base_tps / (1 + tolerance)
+        if current["turns_per_second"] < floor:
+            problems.append(f"throughput {current['turns_per_second']:.2f} turns/s < {floor:.2f} (baseline {base_tps:.2f})")
+    return problems
+
+# ===== Harness =====
+
+def run(args):
+    with open(FIXTURE_FILE, "r", encoding="utf-8") as f:
+        fixture = json.load(f)
+    utterances = fixture["utterances"]
+    session = utterances * args.rounds + [EXIT_UTTERANCE]
+
+    work_dir = tempfile.mkdtemp(prefix="nexus_replay_")
+    server = None
+    try:
+        plans = {u["transcript"].lower(): u["plan"] for u in utterances}
+        server, base_url = start_stub_server(plans, fixture.get("web", {}), args.llm_ms / 1000)
+
+        # Only the stub LLM: set before core.brain builds its router
+        os.environ["GROQ_API_KEY"] = ""
+        os.environ["LOCAL_LLM_URL"] = f"{base_url}/v1"
+        os.environ["LOCAL_LLM_MODEL"] = "replay-stub"
+        os.environ["NEXUS_TRACING"] = "1"
+
+        import speech_recognition as sr
+        import main
+        from core import brain, listen, speak
+        from core.plan_cache import PlanCache
+        from core.runtime import AgentRuntime
+        from core.tracing import TRACER, summarize, format_report
+        from skills import reminders, web_search
+
+        # Keep every file the session writes out of data/
+        TRACER.path = os.path.join(work_dir, "trace.jsonl")
+        brain.PLAN_CACHE = PlanCache(path=os.path.join(work_dir, "plan_cache.json"),
+                                     max_entries=500 if args.plan_cache else 0)
+        reminders.REMINDERS_FILE = os.path.join(work_dir, "reminders.json")
+        reminders.NOTES_DIR = os.path.join(work_dir, "notes")
+        reminders.NOTES_HISTORY_DIR = os.path.join(reminders.NOTES_DIR, ".history")
+        os.makedirs(reminders.NOTES_DIR, exist_ok=True)
+
+        web_search.DUCKDUCKGO_API = f"{base_url}/ddg"
+        web_search.WIKIPEDIA_SUMMARY_API = f"{base_url}/wiki/"
+        web_search.WEATHER_API = f"{base_url}/weather/"
+        web_search.NEWS_API = f"{base_url}/news"
+        web_search.DICTIONARY_API = f"{base_url}/dict/"
+
+        wav_paths = prepare_wavs(utterances + [EXIT_UTTERANCE], work_dir)
+        transcripts = {u["wav"]: u["transcript"] for u in utterances + [EXIT_UTTERANCE]}
+        audio = FakeAudio(sr, wav_paths, transcripts)
+        for utt in session:
+            audio.push(wav_paths[utt["wav"]])
+        listen.sr.Microphone = audio.microphone
+        sr.Recognizer.recognize_google = audio.recognize
+
+        speak.edge_tts = SimpleNamespace(Communicate=FakeCommunicate)
+        speak.pygame = fake_pygame(args.playback_ms_per_char)
+
+        # Record which tools ran, to check each turn did what the fixture says
+        executed = []
+        real_execute = main.execute_action
+
+        def recording_execute(action, say=speak.speak):
+            result = real_execute(action, say)
+            executed.append((action.get("tool"), result))
+            return result
+
+        main.execute_action = recording_execute
+
+        started = time.perf_counter()
+        if args.pipelined:
+            import asyncio
+            asyncio.run(AgentRuntime(recording_execute, barge_in=False).run(greeting=None))
+        else:
+            main.run_serial()
+        elapsed = time.perf_counter() - started
+
+        # ----- Results -----
+        turns = len(session) - 1
+        expected = [a["tool"] for u in session[:-1] for a in u["plan"]]
+        ran = [tool for tool, _ in executed]
+        failures = [f"{tool}: {result}" for tool, result in executed
+                    if isinstance(result, str) and result.startswith("Error")]
+        if ran != expected:
+            failures.append(f"tool sequence mismatch: expected {len(expected)} actions, ran {len(ran)}")
+
+        summary = summarize([r for r in TRACER.recent if r["session"] == TRACER.session_id])
+        current = {
+            "turns": turns,
+            "turns_per_second": turns / elapsed if elapsed else 0.0,
+            "stages": {name: {"p50": s["p50"], "p95": s["p95"]} for name, s in summary.items()},
+        }
+
+        print("=" * 60)
+        print(f"REPLAY - {turns} turns in {elapsed:.2f}s "
+              f"({current['turns_per_second']:.2f} turns/s, "
+              f"{'pipelined' if args.pipelined else 'serial'}, "
+              f"plan cache {'on' if args.plan_cache else 'off'})")
+        print(format_report(summary))
+        print("=" * 60)
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if failures:
+        print("FAILED TURNS:")
+        for failure in failures:
+            print(f"  - {failure}")
+
+    if args.update_baseline or not os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline written to {BASELINE_FILE}")
+        return 1 if failures else 0
+
+    with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.tolerance, args.slack_ms)
+    if regressions:
+        print("REGRESSIONS vs baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+    else:
+        print("No regressions vs baseline.")
+    return 1 if failures or regressions else 0
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Offline replay benchmark for the voice loop")
+    parser.add_argument("--rounds", type=int, default=3, help="times to replay the session")
+    parser.add_argument("--pipelined", action="store_true", help="use the asyncio runtime instead of the serial loop")
+    parser.add_argument("--plan-cache", action="store_true", help="let repeated commands hit the plan cache")
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="simulated LLM latency per request")
+    parser.add_argument("--playback-ms-per-char", type=float, default=0.0, help="simulated speech duration")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--slack-ms", type=float, default=SLACK_MS)
+    parser.add_argument("--update-baseline", action="store_true")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    sys.exit(run(parse_args(sys.argv[1:])))
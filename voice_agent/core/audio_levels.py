@@ -0,0 +1,111 @@
+"""
+Microphone level meter.
+
+core/listen measures every captured frame (RMS and peak, vectorized with
+NumPy) and publishes it here; subscribers such as the GUI receive the levels
+pushed to them, each at its own maximum rate. Frames skipped by the rate
+limit are folded in (loudest RMS and peak win), so short spikes still show.
+
+Usage:
+    from core.audio_levels import subscribe, unsubscribe
+
+    token = subscribe(lambda rms_db, peak_db: print(rms_db, peak_db), max_rate=15)
+    ...
+    unsubscribe(token)
+"""
+
+import math
+import threading
+import time
+
+import numpy as np
+
+FULL_SCALE = 32768.0   # 16-bit PCM
+SILENCE_DB = -90.0
+
+_subscribers = ()      # replaced, never mutated, so publish() needs no lock
+_lock = threading.Lock()
+
+class _Subscriber:
+    def __init__(self, callback, max_rate):
+        self.callback = callback
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self.last_sent = 0.0
+        self.pending = None  # (rms, peak) folded since last_sent
+
+def to_db(level):
+    """Converts a 16-bit sample magnitude to dBFS."""
+    if level <= 0:
+        return SILENCE_DB
+    return max(SILENCE_DB, 20 * math.log10(level / FULL_SCALE))
+
+def frame_levels(data):
+    """Returns (rms, peak) of a 16-bit PCM frame as raw sample magnitudes."""
+    samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+    if samples.size == 0:
+        return 0.0, 0.0
+    rms = float(np.sqrt(np.dot(samples, samples) / samples.size))
+    peak = float(np.max(np.abs(samples)))
+    return rms, peak
+
+def has_subscribers():
+    return bool(_subscribers)
+
+def subscribe(callback, max_rate=None):
+    """
+    Registers callback(rms_db, peak_db). max_rate caps calls per second.
+    Callbacks run on the audio thread and must be quick (e.g. queue.put).
+    Returns a token for unsubscribe().
+    """
+    global _subscribers
+    subscriber = _Subscriber(callback, max_rate)
+    with _lock:
+        _subscribers = _subscribers + (subscriber,)
+    return subscriber
+
+def unsubscribe(token):
+    global _subscribers
+    with _lock:
+        _subscribers = tuple(s for s in _subscribers if s is not token)
+
+def publish(rms, peak):
+    """Sends one frame's levels to every subscriber that is due."""
+    now = time.monotonic()
+    for subscriber in _subscribers:
+        frame_rms, frame_peak = rms, peak
+        if subscriber.pending is not None:
+            frame_rms = max(frame_rms, subscriber.pending[0])
+            frame_peak = max(frame_peak, subscriber.pending[1])
+        if now - subscriber.last_sent < subscriber.interval:
+            subscriber.pending = (frame_rms, frame_peak)
+            continue
+        subscriber.pending = None
+        subscriber.last_sent = now
+        try:
+            subscriber.callback(to_db(frame_rms), to_db(frame_peak))
+        except Exception as e:
+            print(f"Error in audio level subscriber: {e}")
+
+def publish_frame(data):
+    """Measures and publishes a 16-bit PCM frame (no-op without subscribers)."""
+    if not _subscribers:
+        return
+    rms, peak = frame_levels(data)
+    publish(rms, peak)
+
+class MeteredStream:
+    """Wraps a 16-bit microphone stream so every read() is metered."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read(self, size):
+        data = self.stream.read(size)
+        publish_frame(data)
+        return data
+
+    def close(self):
+        self.stream.close()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
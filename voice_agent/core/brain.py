@@ -1,160 +1,95 @@
 import os
-from groq import Groq
 from dotenv import load_dotenv
 import json
 
+from core.memory import ConversationMemory
+from core.tools import build_system_prompt, select_groups
+from core.plan_cache import PlanCache
+from core.llm import LLMRouter, is_complex
+from core.tracing import span
+
 # Load environment variables
 load_dotenv()
-api_key = os.getenv("GROQ_API_KEY")
-
-client = None
-if api_key:
-    client = Groq(api_key=api_key)
-else:
-    print("Warning: GROQ_API_KEY not found in environment.")
-
-# System Prompt
-SYSTEM_PROMPT = """
-You are 'Code Nexus', a highly advanced AI Personal Assistant.
-You are running on Windows. You are helpful, precise, and authoritative.
-
-CAPABILITIES:
-- You have MEMORY. You recall previous commands.
-- You can execute MULTIPLE actions at once.
-- You can manage files, search the web, set reminders, take notes, and control your system.
-
-AVAILABLE TOOLS:
-
-=== COMMUNICATION ===
-1. { "tool": "whatsapp_send", "contact": "Name", "message": "Content" }
-2. { "tool": "response", "text": "..." }
-   - Verbal response to user.
-
-=== APPLICATIONS & WEB ===
-3. { "tool": "open_app", "app_name": "Name" }
-4. { "tool": "close_app", "app_name": "Name" }
-5. { "tool": "open_url", "url": "https://..." }
-
-=== SYSTEM HARDWARE ===
-6. { "tool": "get_battery" }
-7. { "tool": "control_volume", "action": "up" | "down" | "mute" }
-8. { "tool": "adjust_brightness", "action": "up" | "down" | int }
-9. { "tool": "get_time" }
-10. { "tool": "get_date" }
-11. { "tool": "get_system_info" }
-12. { "tool": "shutdown_system", "delay": int }
-13. { "tool": "restart_system", "delay": int }
-14. { "tool": "cancel_shutdown" }
-
-=== FILE MANAGEMENT ===
-15. { "tool": "create_file", "path": "C:\\path\\to\\file.txt", "content": "optional content" }
-16. { "tool": "create_folder", "path": "C:\\path\\to\\folder" }
-17. { "tool": "delete_item", "path": "C:\\path\\to\\item" }
-18. { "tool": "rename_item", "old_path": "old", "new_path": "new" }
-19. { "tool": "copy_item", "source": "source", "destination": "dest" }
-20. { "tool": "search_files", "query": "filename", "location": "optional", "extension": "optional .txt" }
-21. { "tool": "get_file_info", "path": "C:\\path\\to\\file" }
-22. { "tool": "open_location", "path": "C:\\path" }
-23. { "tool": "list_directory", "path": "C:\\path" }
 
-=== WEB & INFORMATION ===
-24. { "tool": "google_search", "query": "search term", "num_results": 3 }
-25. { "tool": "wikipedia", "topic": "topic name" }
-26. { "tool": "get_weather", "city": "city name" }
-27. { "tool": "get_news", "category": "general|business|tech|sports" }
-28. { "tool": "define_word", "word": "word" }
+# LLM backends - Groq and/or a local OpenAI-compatible server (see core/llm.py)
+ROUTER = LLMRouter()
+if not ROUTER.available():
+    print("Warning: GROQ_API_KEY (or LOCAL_LLM_URL) not found in environment.")
 
-=== REMINDERS & NOTES ===
-29. { "tool": "set_reminder", "message": "reminder text", "time": "in 5 minutes|at 3:00 PM" }
-30. { "tool": "list_reminders" }
-31. { "tool": "cancel_reminder", "index": int }
-32. { "tool": "create_note", "title": "note title", "content": "note content" }
-33. { "tool": "read_note", "title": "note title" }
-34. { "tool": "list_notes" }
-35. { "tool": "delete_note", "title": "note title" }
+# System Prompt - generated from the shared tool schema (core/tools.py).
+# The full catalog is the fallback; think() normally sends only the tool
+# groups the utterance needs.
+SYSTEM_PROMPT = build_system_prompt()
 
-=== SCREENSHOTS & CLIPBOARD ===
-36. { "tool": "take_screenshot", "save_path": "optional path" }
-37. { "tool": "screenshot_to_clipboard" }
-38. { "tool": "get_clipboard" }
-39. { "tool": "set_clipboard", "text": "text to copy" }
-40. { "tool": "list_screenshots" }
-41. { "tool": "open_screenshot_folder" }
+# Context Memory - Persists across calls.
+# Token-budgeted: old turns are summarized, tool results pinned when relevant.
+MEMORY = ConversationMemory(SYSTEM_PROMPT, budget=int(os.getenv("NEXUS_TOKEN_BUDGET", "4000")))
 
-EXAMPLES:
+# Plan Cache - repeated commands skip the LLM entirely
+PLAN_CACHE = PlanCache(near_duplicates=os.getenv("NEXUS_PLAN_CACHE_FUZZY", "1") == "1")
 
-User: "Search for Python files in my documents"
-AI: { "tool": "search_files", "query": "python", "location": "~/Documents", "extension": ".py" }
+def remember_result(tool, result):
+    """Records the outcome of an executed action so later turns can refer to it."""
+    MEMORY.add_result(tool, result)
 
-User: "What's the weather in New York and remind me to call John in 10 minutes"
-AI: [
-  { "tool": "get_weather", "city": "New York" },
-  { "tool": "set_reminder", "message": "Call John", "time": "in 10 minutes" }
-]
-
-User: "Take a screenshot and create a note with its location"
-AI: [
-  { "tool": "take_screenshot" },
-  { "tool": "create_note", "title": "Screenshot Location", "content": "Screenshot saved to data/screenshots folder" }
-]
-
-User: "Tell me about Albert Einstein"
-AI: { "tool": "wikipedia", "topic": "Albert Einstein" }
-
-IMPORTANT:
-- Respond in valid JSON format.
-- If multiple actions needed, return a list [...].
-- For file paths, use full paths or ~ for home directory.
-- For search queries, extract key terms.
-- Be smart about time parsing: "in 5 minutes", "at 3 PM", etc.
-- For shutdown/restart, ALWAYS use delay unless told "now".
-"""
-
-# Context Memory - Persists across calls
-MESSAGES_HISTORY = [
-    {"role": "system", "content": SYSTEM_PROMPT}
-]
+def parse_actions(response_content):
+    """
+    Turns the LLM's JSON reply into a list of actions.
+    Raises json.JSONDecodeError if the reply is not JSON.
+    """
+    data = json.loads(response_content)
+    
+    # Normalize output
+    if isinstance(data, list): return data
+    if "actions" in data: return data["actions"]
+    if "tools" in data: return data["tools"]
+    # If single object, return as list
+    return [data]
 
 def think(user_input):
     """
     Processes the user input via Groq LLM with Context Memory.
+    Repeated, context-independent commands are answered from the plan cache.
     """
-    global MESSAGES_HISTORY
-    
-    if not client:
+    with span("think.cache") as attrs:
+        cached = PLAN_CACHE.get(user_input)
+        attrs["hit"] = cached is not None
+    if cached is not None:
+        print(f"⚡ Plan cache hit ({PLAN_CACHE.stats()['hit_rate']:.0%} hit rate)")
+        MEMORY.add_user(user_input)
+        MEMORY.add_assistant(json.dumps(cached))
+        return cached
+
+    if not ROUTER.available():
         return [{ "tool": "response", "text": "Brain missing. Check API Key." }]
 
     # Add user message to history
-    MESSAGES_HISTORY.append({"role": "user", "content": user_input})
+    MEMORY.add_user(user_input)
     
-    # Keep history manageable (last 12 turns)
-    if len(MESSAGES_HISTORY) > 12:
-        # Keep system prompt + last 10 (skipping old ones)
-        MESSAGES_HISTORY = [MESSAGES_HISTORY[0]] + MESSAGES_HISTORY[-10:]
+    # Build the request within the token budget, with only the relevant tools
+    groups = select_groups(user_input)
+    system_prompt = build_system_prompt(groups)
+    messages = MEMORY.build_messages(system_prompt)
 
     try:
-        chat_completion = client.chat.completions.create(
-            messages=MESSAGES_HISTORY,
-            model="llama-3.3-70b-versatile",
-            temperature=0.6,
-            max_tokens=1024,
-            response_format={"type": "json_object"},
-        )
-        
-        response_content = chat_completion.choices[0].message.content
+        # Simple commands go to the fast model, multi-action ones to the large model
+        with span("think.llm", prompt_tokens=MEMORY.last_prompt_tokens) as attrs:
+            response_content, route = ROUTER.complete(
+                messages,
+                complex_request=is_complex(user_input, groups),
+                temperature=0.6,
+                max_tokens=1024,
+            )
+            attrs["route"] = route
+        print(f"  [LLM: {route}]")
         
         # Add AI response to history so it knows what it did
-        MESSAGES_HISTORY.append({"role": "assistant", "content": response_content})
+        MEMORY.add_assistant(response_content)
         
         try:
-            data = json.loads(response_content)
-            
-            # Normalize output
-            if "actions" in data: return data["actions"]
-            if "tools" in data: return data["tools"]
-            if isinstance(data, list): return data
-            # If single object, return as list
-            return [data]
+            actions = parse_actions(response_content)
+            PLAN_CACHE.put(user_input, actions)
+            return actions
 
         except json.JSONDecodeError:
             print(f"Raw Output: {response_content}")
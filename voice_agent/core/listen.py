@@ -1,12 +1,25 @@
 import speech_recognition as sr
+import collections
 import os
 import tempfile
 
-def listen():
+from core.tracing import span
+from core.audio_levels import MeteredStream, frame_levels, publish
+
+# Barge-in voice activity detection
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_SAMPLES = 480          # 30 ms frames
+VAD_START_FRAMES = 2             # ~60 ms of speech starts a barge-in
+VAD_END_SILENCE_SECONDS = 0.8    # phrase ends after this much quiet
+VAD_MAX_PHRASE_SECONDS = 15
+VAD_PREROLL_FRAMES = 10          # keep ~300 ms before the trigger
+ECHO_CALIBRATION_FRAMES = 10     # first ~300 ms of playback measure the echo floor
+ECHO_MARGIN = 2.5                # speech must be this much louder than the echo
+
+def make_recognizer():
     """
-    Listens to the microphone and returns the transcribed text.
-    Uses Google Speech Recognition (Online, Free, Fast).
-    MAXIMUM SENSITIVITY - Catches even quiet/soft speech.
+    Creates a recognizer with MAXIMUM SENSITIVITY settings -
+    catches even quiet/soft speech.
     """
     recognizer = sr.Recognizer()
     
@@ -16,39 +29,149 @@ def listen():
     recognizer.dynamic_energy_adjustment_damping = 0.10  # Very aggressive adjustment
     recognizer.dynamic_energy_ratio = 1.2  # Low ratio for sensitive detection
     recognizer.pause_threshold = 1.0  # Wait a full second for complete sentences
+    return recognizer
+
+def capture(recognizer=None):
+    """
+    Records one phrase from the microphone.
+    Returns the captured AudioData, or None on timeout.
+    """
+    recognizer = recognizer or make_recognizer()
     
     with sr.Microphone() as source:
         print("🎤 Listening...")
+        # Publish the level of every frame the recognizer reads
+        source.stream = MeteredStream(source.stream)
         
         # Comprehensive ambient noise adjustment
         try:
-            recognizer.adjust_for_ambient_noise(source, duration=1.2)
+            with span("listen.calibrate"):
+                recognizer.adjust_for_ambient_noise(source, duration=1.2)
             print(f"  [Threshold: {recognizer.energy_threshold}]")
         except:
             pass
         
         try:
             # Maximum timeout and phrase limit
-            audio = recognizer.listen(source, timeout=10, phrase_time_limit=15)
-            print("⏳ Processing...")
-            
-            # Use Google Speech Recognition
-            text = recognizer.recognize_google(audio)
-            print(f"✅ HEARD: {text}")
-            
-            # NO WAKE WORD - continuous listening
-            return text
-
+            with span("listen.capture") as attrs:
+                audio = recognizer.listen(source, timeout=10, phrase_time_limit=15)
+                attrs["audio_seconds"] = round(len(audio.frame_data) / (audio.sample_rate * audio.sample_width), 2)
+            return audio
         except sr.WaitTimeoutError:
             print("⏱️ Timeout - no speech detected")
             return None
-        except sr.UnknownValueError:
-            print("❌ Could not understand audio")
-            return None
-        except Exception as e:
-            print(f"⚠️ Error: {e}")
+
+def recognize(audio, recognizer=None):
+    """
+    Transcribes captured audio with Google Speech Recognition (Online, Free, Fast).
+    Returns the text, or None if nothing could be understood.
+    """
+    if audio is None:
+        return None
+    recognizer = recognizer or make_recognizer()
+    
+    try:
+        print("⏳ Processing...")
+        with span("listen.recognize"):
+            text = recognizer.recognize_google(audio)
+        print(f"✅ HEARD: {text}")
+        return text
+    except sr.UnknownValueError:
+        print("❌ Could not understand audio")
+        return None
+    except Exception as e:
+        print(f"⚠️ Error: {e}")
+        return None
+
+def _frame_rms(data):
+    """RMS energy of a 16-bit PCM frame (also published to the level meter)."""
+    rms, peak = frame_levels(data)
+    publish(rms, peak)
+    return rms
+
+def monitor_barge_in(playback_done, on_speech_start, playback_started=None, min_threshold=300):
+    """
+    Watches the microphone while the assistant is speaking.
+
+    The speaker's own voice leaks into the mic, so the first frames of
+    playback calibrate an echo floor and speech must beat it by ECHO_MARGIN.
+    Calibration waits for playback_started (set by core/speak once the clip
+    is playing), so mixer start-up silence is never measured as the floor.
+    When the user starts talking, on_speech_start() is called immediately
+    (to stop playback) and recording continues until the phrase ends.
+
+    Returns the user's phrase as AudioData, or None if playback finished
+    (playback_done is set) without anyone talking over it.
+    """
+    with sr.Microphone(sample_rate=VAD_SAMPLE_RATE, chunk_size=VAD_FRAME_SAMPLES) as source:
+        frame_seconds = VAD_FRAME_SAMPLES / source.SAMPLE_RATE
+        preroll = collections.deque(maxlen=VAD_PREROLL_FRAMES)
+        echo_levels = []
+        echo_floor = 0.0
+        loud_frames = 0
+
+        # Phase 0: nothing to compare against until the clip is audible
+        while playback_started is not None and not playback_started.is_set():
+            if playback_done.is_set():
+                return None
+            _frame_rms(source.stream.read(source.CHUNK))
+
+        # Phase 1: wait for speech that is louder than the echo
+        while not playback_done.is_set():
+            data = source.stream.read(source.CHUNK)
+            level = _frame_rms(data)
+            preroll.append(data)
+
+            if len(echo_levels) < ECHO_CALIBRATION_FRAMES:
+                echo_levels.append(level)
+                echo_floor = sorted(echo_levels)[int(len(echo_levels) * 0.9)]
+                continue
+
+            threshold = max(min_threshold, echo_floor * ECHO_MARGIN)
+            if level > threshold:
+                loud_frames += 1
+                if loud_frames >= VAD_START_FRAMES:
+                    break
+            else:
+                loud_frames = 0
+                # Track slow changes in playback loudness
+                echo_floor = 0.95 * echo_floor + 0.05 * level
+        else:
             return None
 
+        print("✋ Barge-in detected")
+        on_speech_start()
+
+        # Phase 2: record the rest of the phrase
+        frames = list(preroll)
+        quiet_limit = int(VAD_END_SILENCE_SECONDS / frame_seconds)
+        max_frames = int(VAD_MAX_PHRASE_SECONDS / frame_seconds)
+        quiet = 0
+        # Playback is stopped now, so the plain threshold applies
+        threshold = max(min_threshold, echo_floor)
+        while quiet < quiet_limit and len(frames) < max_frames:
+            data = source.stream.read(source.CHUNK)
+            frames.append(data)
+            quiet = quiet + 1 if _frame_rms(data) <= threshold else 0
+
+        return sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+def listen():
+    """
+    Listens to the microphone and returns the transcribed text.
+    Uses Google Speech Recognition (Online, Free, Fast).
+    MAXIMUM SENSITIVITY - Catches even quiet/soft speech.
+    """
+    recognizer = make_recognizer()
+    
+    try:
+        audio = capture(recognizer)
+        # NO WAKE WORD - continuous listening
+        return recognize(audio, recognizer)
+    except Exception as e:
+        print(f"⚠️ Error: {e}")
+        return None
+
 if __name__ == "__main__":
     while True:
         text = listen()
@@ -0,0 +1,273 @@
+"""
+LLM backends for core/brain.
+
+Several providers/models can be configured at once. Each model keeps a rolling
+latency and error record; simple utterances go to a small fast model, complex
+ones to the large model, failures fall through to the next model, and a
+second (hedged) request is fired when the first one runs past its usual p95.
+
+Configuration (.env):
+    GROQ_API_KEY          enables Groq (fast + large models)
+    GROQ_FAST_MODEL       default llama-3.1-8b-instant
+    GROQ_LARGE_MODEL      default llama-3.3-70b-versatile
+    LOCAL_LLM_URL         any OpenAI-compatible endpoint, e.g. http://localhost:11434/v1
+    LOCAL_LLM_MODEL       model name served there
+    LOCAL_LLM_API_KEY     optional bearer token
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from core.tracing import percentile
+
+REQUEST_TIMEOUT = 20  # seconds
+MIN_SAMPLES_FOR_HEDGE = 5
+
+# A route failing more often than this is tried after every healthy route
+# until UNHEALTHY_COOLDOWN seconds pass without a new failure
+UNHEALTHY_ERROR_RATE = 0.5
+UNHEALTHY_COOLDOWN = 60
+
+class ProviderError(Exception):
+    """Raised when a backend fails to produce a completion."""
+
+class LatencyTracker:
+    """Rolling latency / error record for one model."""
+
+    def __init__(self, window=50):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True = success
+        self.last_failure = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds, ok=True):
+        with self.lock:
+            if ok:
+                self.latencies.append(seconds)
+            else:
+                self.last_failure = time.monotonic()
+            self.outcomes.append(ok)
+
+    def percentile(self, pct):
+        with self.lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return percentile(ordered, pct)
+
+    def p95(self):
+        return self.percentile(95)
+
+    def error_rate(self):
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+    def samples(self):
+        return len(self.latencies)
+
+    def unhealthy(self, threshold=UNHEALTHY_ERROR_RATE, cooldown=UNHEALTHY_COOLDOWN):
+        """
+        True while the error rate is above threshold and the last failure is
+        recent; after cooldown the route gets another chance (a probe).
+        """
+        return (self.error_rate() > threshold
+                and time.monotonic() - self.last_failure < cooldown)
+
+# ===== Providers =====
+
+class GroqProvider:
+    name = "groq"
+
+    def __init__(self, api_key):
+        from groq import Groq
+        self.client = Groq(api_key=api_key, timeout=REQUEST_TIMEOUT)
+
+    def complete(self, messages, model, temperature=0.6, max_tokens=1024):
+        chat_completion = self.client.chat.completions.create(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+        )
+        return chat_completion.choices[0].message.content
+
+class OpenAICompatibleProvider:
+    """
+    Talks to any server exposing /chat/completions (Ollama, LM Studio,
+    llama.cpp server, vLLM, or a local stub used in benchmarks).
+    """
+    name = "local"
+
+    def __init__(self, base_url, api_key=None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+
+    def complete(self, messages, model, temperature=0.6, max_tokens=1024):
+        import requests
+
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        response = requests.post(
+            f"{self.base_url}/chat/completions",
+            json={
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "response_format": {"type": "json_object"},
+            },
+            headers=headers,
+            timeout=REQUEST_TIMEOUT,
+        )
+        if response.status_code != 200:
+            raise ProviderError(f"{self.base_url} returned {response.status_code}: {response.text[:200]}")
+        return response.json()["choices"][0]["message"]["content"]
+
+class Route:
+    """One provider + model pair with its own latency record."""
+
+    def __init__(self, provider, model, tier):
+        self.provider = provider
+        self.model = model
+        self.tier = tier  # "fast" or "large"
+        self.stats = LatencyTracker()
+
+    @property
+    def label(self):
+        return f"{self.provider.name}:{self.model}"
+
+    def complete(self, messages, **kwargs):
+        start = time.perf_counter()
+        try:
+            content = self.provider.complete(messages, self.model, **kwargs)
+        except Exception:
+            self.stats.record(time.perf_counter() - start, ok=False)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return content
+
+# ===== Routing =====
+
+COMPLEX_MARKERS = re.compile(r"\b(and|then|also|after|before|plus)\b|,")
+
+def is_complex(user_input, groups=None):
+    """
+    Cheap guess at whether an utterance needs the large model:
+    several actions, several tool groups, or a long request.
+    """
+    text = (user_input or "").lower()
+    if COMPLEX_MARKERS.search(text):
+        return True
+    if groups is not None and len(groups) > 1:
+        return True
+    return len(text.split()) > 12
+
+class LLMRouter:
+    def __init__(self, routes=None, hedge=True):
+        self.routes = routes if routes is not None else routes_from_env()
+        self.hedge = hedge
+        self.pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm")
+
+    def available(self):
+        return bool(self.routes)
+
+    def candidates(self, complex_request):
+        """
+        Orders routes: healthy before failing ones (a dead route would cost a
+        timeout on every request), then preferred tier first, then fastest.
+        """
+        preferred = "large" if complex_request else "fast"
+
+        def rank(route):
+            p95 = route.stats.p95()
+            return (
+                route.stats.unhealthy(),
+                route.tier != preferred,
+                p95 if p95 is not None else 0.0,
+            )
+
+        return sorted(self.routes, key=rank)
+
+    def complete(self, messages, complex_request=False, **kwargs):
+        """
+        Returns (content, route_label). Tries candidates in order, hedging the
+        first with the second when it runs past its p95.
+        Raises ProviderError if every route fails.
+        """
+        candidates = self.candidates(complex_request)
+        if not candidates:
+            raise ProviderError("No LLM provider configured.")
+
+        errors = []
+        primary = candidates[0]
+        backups = candidates[1:]
+
+        future = self.pool.submit(primary.complete, messages, **kwargs)
+        pending = {future: primary}
+
+        deadline = primary.stats.p95() if primary.stats.samples() >= MIN_SAMPLES_FOR_HEDGE else None
+        if self.hedge and backups and deadline is not None:
+            done, _ = wait([future], timeout=deadline)
+            if not done:
+                backup = backups.pop(0)
+                print(f"LLM hedge: {primary.label} slower than p95 ({deadline:.2f}s), also asking {backup.label}")
+                pending[self.pool.submit(backup.complete, messages, **kwargs)] = backup
+
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for finished in done:
+                route = pending.pop(finished)
+                try:
+                    return finished.result(), route.label
+                except Exception as e:
+                    errors.append(f"{route.label}: {e}")
+                    print(f"LLM route failed - {route.label}: {e}")
+
+            # Everything in flight failed: fail over to the next route
+            if not pending and backups:
+                route = backups.pop(0)
+                pending[self.pool.submit(route.complete, messages, **kwargs)] = route
+
+        raise ProviderError("; ".join(errors))
+
+    def stats(self):
+        return {
+            route.label: {
+                "tier": route.tier,
+                "p50": route.stats.percentile(50),
+                "p95": route.stats.p95(),
+                "error_rate": round(route.stats.error_rate(), 3),
+                "unhealthy": route.stats.unhealthy(),
+                "samples": route.stats.samples(),
+            }
+            for route in self.routes
+        }
+
+def routes_from_env():
+    """Builds the configured routes. Missing providers are simply skipped."""
+    routes = []
+
+    groq_key = os.getenv("GROQ_API_KEY")
+    if groq_key:
+        try:
+            groq = GroqProvider(groq_key)
+            routes.append(Route(groq, os.getenv("GROQ_FAST_MODEL", "llama-3.1-8b-instant"), "fast"))
+            routes.append(Route(groq, os.getenv("GROQ_LARGE_MODEL", "llama-3.3-70b-versatile"), "large"))
+        except ImportError:
+            print("Warning: groq package not installed. Run: pip install groq")
+
+    local_url = os.getenv("LOCAL_LLM_URL")
+    if local_url:
+        local = OpenAICompatibleProvider(local_url, os.getenv("LOCAL_LLM_API_KEY"))
+        tier = os.getenv("LOCAL_LLM_TIER", "fast")
+        routes.append(Route(local, os.getenv("LOCAL_LLM_MODEL", "llama3.1"), tier))
+
+    return routes
@@ -0,0 +1,205 @@
+import json
+import re
+from collections import deque
+
+# Rough token estimate: ~4 characters per token for English text,
+# plus a small fixed overhead per chat message (role, separators).
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Words ignored when matching tool results to the current request
+STOP_WORDS = {
+    "the", "and", "for", "with", "that", "this", "what", "about", "from",
+    "have", "your", "into", "tell", "please", "could", "would", "there",
+}
+
+def estimate_tokens(text):
+    """Returns an approximate token count for a piece of text."""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def message_tokens(message):
+    """Returns the approximate token cost of a single chat message."""
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+def truncate_to_tokens(text, max_tokens):
+    """Cuts text down to roughly max_tokens, marking the cut."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + "..."
+
+def _keywords(text):
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return {w for w in words if len(w) > 3 and w not in STOP_WORDS}
+
+class ConversationMemory:
+    """
+    Token-budgeted chat history for the brain.
+
+    Recent turns are kept verbatim while they fit history_tokens (and the
+    overall per-request budget). Turns that no longer fit are folded into a
+    short rolling summary, and tool results are kept separately so only the
+    ones relevant to the current request are sent.
+    """
+
+    def __init__(self, system_prompt, budget=4000, history_tokens=600,
+                 max_summary_tokens=150, max_result_tokens=120,
+                 max_pinned_results=2, max_results=20):
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.history_tokens = history_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self.max_result_tokens = max_result_tokens
+        self.max_pinned_results = max_pinned_results
+
+        self.turns = deque()
+        self.summary_lines = deque()
+        self.results = deque(maxlen=max_results)
+        self.last_prompt_tokens = 0
+
+    # ----- Recording -----
+
+    def add_user(self, text):
+        self.turns.append({"role": "user", "content": text})
+
+    def add_assistant(self, text):
+        self.turns.append({"role": "assistant", "content": text})
+
+    def add_result(self, tool, result):
+        """Stores a (truncated) tool result that may be pinned into later requests."""
+        if not result:
+            return
+        text = truncate_to_tokens(str(result), self.max_result_tokens)
+        self.results.append({
+            "tool": tool,
+            "content": text,
+            "keywords": _keywords(f"{tool} {text}"),
+        })
+
+    def clear(self):
+        self.turns.clear()
+        self.summary_lines.clear()
+        self.results.clear()
+
+    # ----- Building the request -----
+
+    def build_messages(self, system_prompt=None):
+        """
+        Returns the message list for the next completion, fitting the budget.
+        Old turns that do not fit are evicted into the rolling summary.
+        """
+        system = {"role": "system", "content": system_prompt or self.system_prompt}
+        fixed = [system]
+
+        summary = self._summary_message()
+        if summary:
+            fixed.append(summary)
+
+        pinned = self._pinned_message()
+        if pinned:
+            fixed.append(pinned)
+
+        used = sum(message_tokens(m) for m in fixed)
+
+        # Walk backwards so the newest turns are always kept
+        kept = []
+        history_used = 0
+        for turn in reversed(self.turns):
+            cost = message_tokens(turn)
+            over = used + cost > self.budget or history_used + cost > self.history_tokens
+            if over and kept:
+                break
+            kept.append(turn)
+            used += cost
+            history_used += cost
+
+        evicted = len(self.turns) - len(kept)
+        if evicted:
+            for _ in range(evicted):
+                self._summarize(self.turns.popleft())
+            # The summary grew, so rebuild with the updated fixed section
+            return self.build_messages(system_prompt)
+
+        messages = fixed + list(reversed(kept))
+        self.last_prompt_tokens = used
+        return messages
+
+    def _summary_message(self):
+        if not self.summary_lines:
+            return None
+        text = "Earlier in this conversation:\n" + "\n".join(self.summary_lines)
+        return {"role": "system", "content": text}
+
+    def _pinned_message(self):
+        """Picks the tool results that matter for the latest user request."""
+        if not self.results:
+            return None
+
+        query = ""
+        for turn in reversed(self.turns):
+            if turn["role"] == "user":
+                query = turn["content"]
+                break
+        query_words = _keywords(query)
+
+        # The most recent result is always relevant ("read that again"),
+        # older ones only if they share keywords with the request.
+        newest = self.results[-1]
+        pinned = [newest]
+        for result in reversed(list(self.results)[:-1]):
+            if len(pinned) >= self.max_pinned_results:
+                break
+            if query_words & result["keywords"]:
+                pinned.append(result)
+
+        lines = [f"[{r['tool']}] {r['content']}" for r in reversed(pinned)]
+        return {"role": "system", "content": "Recent tool results:\n" + "\n".join(lines)}
+
+    def _summarize(self, turn):
+        """Folds an evicted turn into a one-line summary entry."""
+        content = turn["content"]
+        if turn["role"] == "user":
+            line = f"- User said: {truncate_to_tokens(content, 20)}"
+        else:
+            line = f"- You did: {_describe_actions(content)}"
+        self.summary_lines.append(line)
+
+        while estimate_tokens("\n".join(self.summary_lines)) > self.max_summary_tokens:
+            self.summary_lines.popleft()
+
+    # ----- Introspection -----
+
+    def stats(self):
+        return {
+            "turns": len(self.turns),
+            "summary_lines": len(self.summary_lines),
+            "results": len(self.results),
+            "last_prompt_tokens": self.last_prompt_tokens,
+            "budget": self.budget,
+        }
+
+def _describe_actions(content):
+    """Turns an assistant JSON reply into a compact list of tool calls."""
+    try:
+        data = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        return truncate_to_tokens(str(content), 20)
+
+    if isinstance(data, dict):
+        data = data.get("actions") or data.get("tools") or [data]
+    if not isinstance(data, list):
+        return truncate_to_tokens(str(content), 20)
+
+    parts = []
+    for action in data:
+        if not isinstance(action, dict):
+            continue
+        tool = action.get("tool", "?")
+        if tool == "response":
+            parts.append(f"replied '{truncate_to_tokens(action.get('text', ''), 10)}'")
+        else:
+            args = ", ".join(f"{k}={v}" for k, v in action.items() if k != "tool")
+            parts.append(f"{tool}({truncate_to_tokens(args, 10)})")
+    return "; ".join(parts) or "nothing"
@@ -0,0 +1,183 @@
+"""
+Background system metrics sampler.
+
+Reads clock, battery, CPU, RAM, disk and network on a worker thread, keeps
+a rolling history of each numeric metric, and publishes only the values
+that changed, so neither the UI nor the voice tools call psutil (or wait
+for a CPU measurement) on their own thread.
+
+Usage:
+    import queue
+    from core.metrics import SAMPLER
+
+    updates = queue.Queue()
+    SAMPLER.subscribe(updates.put)
+    SAMPLER.start()
+    ...
+    changes = updates.get_nowait()   # e.g. {"cpu": 12.5, "time": "03:15 PM"}
+    SAMPLER.latest_value("ram")      # newest reading, O(1)
+    SAMPLER.stats("cpu", 60)         # (min, avg, max) over the last minute
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import psutil
+
+HISTORY_SECONDS = 3600  # rolling history kept per metric
+
+# Metrics with a history (rates are per second)
+NUMERIC_METRICS = ("cpu", "ram", "disk", "disk_read", "disk_write", "net_up", "net_down")
+
+SYSTEM_DRIVE = os.environ.get("SystemDrive", "C:") + "\\" if os.name == "nt" else "/"
+
+class MetricsSampler:
+    def __init__(self, interval=2.0, on_change=None, history_seconds=HISTORY_SECONDS):
+        """
+        interval: seconds between samples.
+        on_change(changes): called from the sampler thread with a dict of the
+        metrics whose value differs from the previous sample.
+        """
+        self.interval = interval
+        self.subscribers = [on_change] if on_change else []
+        self.latest = {}
+        self.history = {name: deque(maxlen=max(1, int(history_seconds / interval)))
+                        for name in NUMERIC_METRICS}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.ready = threading.Event()
+        self.thread = None
+        self.counters = None  # (time, disk io, net io) of the previous sample
+
+    def subscribe(self, on_change):
+        """Adds a change listener; it first receives everything sampled so far."""
+        with self.lock:
+            self.subscribers.append(on_change)
+            current = dict(self.latest)
+        if current:
+            on_change(current)
+
+    def unsubscribe(self, on_change):
+        with self.lock:
+            if on_change in self.subscribers:
+                self.subscribers.remove(on_change)
+
+    def _rates(self, now):
+        """Disk and network bytes per second since the previous sample."""
+        disk = psutil.disk_io_counters()
+        net = psutil.net_io_counters()
+        previous, self.counters = self.counters, (now, disk, net)
+        if previous is None:
+            return {}
+        elapsed = max(now - previous[0], 1e-6)
+        rates = {}
+        if disk and previous[1]:
+            rates["disk_read"] = (disk.read_bytes - previous[1].read_bytes) / elapsed
+            rates["disk_write"] = (disk.write_bytes - previous[1].write_bytes) / elapsed
+        if net and previous[2]:
+            rates["net_up"] = (net.bytes_sent - previous[2].bytes_sent) / elapsed
+            rates["net_down"] = (net.bytes_recv - previous[2].bytes_recv) / elapsed
+        return {k: round(max(v, 0.0)) for k, v in rates.items()}
+
+    def sample(self):
+        """Takes one non-blocking reading of every metric."""
+        now = datetime.now()
+        memory = psutil.virtual_memory()
+        values = {
+            "time": now.strftime("%I:%M %p"),
+            "date": now.strftime("%A, %B %d"),
+            # interval=None compares with the previous call instead of sleeping
+            "cpu": psutil.cpu_percent(interval=None),
+            "ram": memory.percent,
+            "ram_used": memory.used,
+            "ram_total": memory.total,
+        }
+        try:
+            values["disk"] = psutil.disk_usage(SYSTEM_DRIVE).percent
+        except Exception:
+            pass
+        values.update(self._rates(time.monotonic()))
+        battery = psutil.sensors_battery()
+        if battery:
+            values["battery"] = (battery.percent, battery.power_plugged)
+            values["battery_secsleft"] = battery.secsleft
+        return values
+
+    def poll(self):
+        """Samples once; returns (and publishes) the values that changed."""
+        values = self.sample()
+        stamp = time.time()
+        with self.lock:
+            changes = {k: v for k, v in values.items() if self.latest.get(k) != v}
+            self.latest.update(changes)
+            for name in NUMERIC_METRICS:
+                if name in values:
+                    self.history[name].append((stamp, values[name]))
+            subscribers = list(self.subscribers)
+        self.ready.set()
+        if changes:
+            for on_change in subscribers:
+                on_change(changes)
+        return changes
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.latest)
+
+    def latest_value(self, name, default=None):
+        with self.lock:
+            return self.latest.get(name, default)
+
+    def window(self, name, seconds):
+        """Values of a numeric metric from the last seconds, oldest first."""
+        cutoff = time.time() - seconds
+        with self.lock:
+            history = self.history[name]
+            values = []
+            for stamp, value in reversed(history):
+                if stamp < cutoff:
+                    break
+                values.append(value)
+        values.reverse()
+        return values
+
+    def stats(self, name, seconds):
+        """(min, avg, max) of a numeric metric over the last seconds, or None."""
+        values = self.window(name, seconds)
+        if not values:
+            return None
+        return min(values), sum(values) / len(values), max(values)
+
+    def wait_ready(self, timeout=1.5):
+        """Blocks until the first sample exists (only right after start)."""
+        return self.ready.wait(timeout)
+
+    def run(self):
+        psutil.cpu_percent(interval=None)  # prime the CPU counter
+        self.stop_event.wait(0.2)          # so the first CPU reading means something
+        while not self.stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error sampling metrics: {e}")
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, daemon=True, name="metrics-sampler")
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+# Shared by the GUI sidebar and the system info tools
+SAMPLER = MetricsSampler()
+
+def get_sampler():
+    """The shared sampler, started on first use."""
+    return SAMPLER.start()
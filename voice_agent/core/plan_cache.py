@@ -0,0 +1,278 @@
+"""
+Plan cache for core/brain.think.
+
+Repeated commands ("open chrome", "what's the weather in Karachi") map to the
+same action list every time, so the plan is stored under a normalized form of
+the transcript and replayed without calling the LLM. An optional character
+trigram index catches near-duplicates ("please open chrome for me").
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+CACHE_FILE = os.path.join(DATA_DIR, "plan_cache.json")
+
+# Words that carry no meaning for the plan and are dropped before keying
+FILLER_WORDS = {
+    "please", "hey", "hi", "nexus", "code", "um", "uh", "okay", "ok", "kindly",
+    "can", "could", "would", "you", "for", "me", "just", "quickly",
+}
+
+# Phrases whose meaning depends on earlier turns - never served from cache
+CONTEXT_WORDS = {
+    "it", "that", "this", "these", "those", "them", "again", "previous", "last",
+    "same", "him", "her", "there", "another", "more", "else", "too", "also",
+    "instead", "undo", "back",
+}
+
+# Answers to a question the assistant just asked ("yes", "go ahead", "the
+# second one") - they mean nothing on their own, so they are never cached
+CONFIRMATION_WORDS = {
+    "yes", "yeah", "yep", "yup", "no", "nope", "nah", "sure", "confirm", "confirmed",
+    "cancel", "ahead", "proceed", "correct", "right", "wrong", "fine", "alright",
+}
+ORDINAL_WORDS = {
+    "first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth",
+    "ninth", "tenth", "1st", "2nd", "3rd", "4th", "5th", "former", "latter", "one",
+}
+MIN_WORDS = 2  # shorter utterances are too ambiguous to replay
+
+# Utterances about the current moment; an LLM reply that answers them
+# directly in text would go stale
+TIME_WORDS = {"now", "today", "tonight", "tomorrow", "yesterday", "time", "date", "day"}
+
+# Plans with side effects that must never run without the LLM deciding
+# afresh - they are never stored, so not even an exact repeat replays them
+NEVER_CACHED_TOOLS = {
+    "shutdown_system", "restart_system", "delete_item", "delete_note", "rename_item",
+    "whatsapp_send", "whatsapp_send_batch", "close_app",
+}
+
+# Plans with these tools are only replayed on an exact match
+EXACT_ONLY_TOOLS = {
+    "copy_item", "adjust_brightness", "control_volume", "cancel_reminder",
+}
+
+# Words a near-duplicate may add or drop without changing the plan
+STOP_WORDS = {
+    "a", "an", "the", "to", "my", "of", "up", "on", "in", "is", "are", "what",
+    "whats", "show", "tell", "let", "know", "want", "need", "go", "ahead", "now",
+}
+
+def normalize(text):
+    """Lowercases, strips punctuation and filler words, and collapses whitespace."""
+    words = re.findall(r"[a-z0-9]+", (text or "").lower().replace("'", ""))
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+def _embed(text):
+    """Bag of character trigrams, L2-normalised - a tiny local embedding."""
+    padded = f"  {text} "
+    grams = Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+    norm = math.sqrt(sum(c * c for c in grams.values())) or 1.0
+    return {g: c / norm for g, c in grams.items()}
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(g, 0.0) for g, v in a.items())
+
+def _plan_values(actions):
+    """All string and number argument values of a plan, lowercased."""
+    values = []
+    for action in actions:
+        for key, value in action.items():
+            if key == "tool" or isinstance(value, bool):
+                continue
+            if isinstance(value, str):
+                values.append(value.lower())
+            elif isinstance(value, (int, float)):
+                values.append(f"{value:g}")
+    return values
+
+def _numbers(key):
+    return [w for w in key.split() if w.isdigit()]
+
+def _content_words(key):
+    return {w for w in key.split() if w not in STOP_WORDS}
+
+def _grounded_in(value, key):
+    """True if value occurs in key as whole words (so "2" is not found in "20")."""
+    return f" {value} " in f" {key} "
+
+class PlanCache:
+    """LRU + TTL cache from normalized transcripts to action lists."""
+
+    def __init__(self, path=CACHE_FILE, max_entries=500, ttl=7 * 24 * 3600,
+                 near_duplicates=True, similarity=0.9):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.near_duplicates = near_duplicates
+        self.similarity = similarity
+
+        self.entries = OrderedDict()  # key -> {"actions", "stored"}
+        self.vectors = {}             # key -> trigram embedding
+        self.lock = threading.Lock()
+        self.metrics = {"hits": 0, "near_hits": 0, "misses": 0, "bypassed": 0, "stores": 0}
+        self.load()
+
+    # ----- Rules -----
+
+    def is_context_dependent(self, key):
+        # "what time is it" uses a dummy "it" that refers to nothing
+        words = f" {key} ".replace(" is it ", " ").split()
+        if len(words) < MIN_WORDS:
+            return True
+        return any(word in CONTEXT_WORDS or word in CONFIRMATION_WORDS or word in ORDINAL_WORDS
+                   for word in words)
+
+    def is_cacheable(self, key, actions):
+        if not key or not actions or not isinstance(actions, list):
+            return False
+        for action in actions:
+            if not isinstance(action, dict) or not action.get("tool"):
+                return False
+            if action["tool"] in NEVER_CACHED_TOOLS:
+                return False
+            if action["tool"] == "response":
+                text = str(action.get("text", ""))
+                # Failures and answers about "now" must not be replayed
+                if text.startswith("Error") or any(w in TIME_WORDS for w in key.split()):
+                    return False
+        return True
+
+    # ----- Lookup -----
+
+    def get(self, text):
+        """Returns a copy of the cached plan for text, or None."""
+        key = normalize(text)
+        if not key or self.is_context_dependent(key):
+            self.metrics["bypassed"] += 1
+            return None
+
+        with self.lock:
+            entry = self._fresh(key)
+            if entry is not None and not self.is_cacheable(key, entry["actions"]):
+                # Stored by an older version with looser rules
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.metrics["hits"] += 1
+                return json.loads(json.dumps(entry["actions"]))
+
+            if self.near_duplicates:
+                match = self._nearest(key)
+                if match is not None:
+                    self.metrics["near_hits"] += 1
+                    return json.loads(json.dumps(self.entries[match]["actions"]))
+
+            self.metrics["misses"] += 1
+            return None
+
+    def _fresh(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["stored"] > self.ttl:
+            self._drop(key)
+            return None
+        return entry
+
+    def _nearest(self, key):
+        """
+        Finds a near-duplicate that says the same thing in other words: the
+        same numbers and the same content words, and every plan argument
+        taken from the old utterance present in the new one.
+        """
+        vector = _embed(key)
+        numbers, content = _numbers(key), _content_words(key)
+        best, best_score = None, self.similarity
+        for other, other_vector in list(self.vectors.items()):
+            score = _cosine(vector, other_vector)
+            if score < best_score:
+                continue
+            entry = self._fresh(other)
+            if entry is None:
+                continue
+            actions = entry["actions"]
+            if not self.is_cacheable(other, actions):
+                continue
+            if any(a.get("tool") in EXACT_ONLY_TOOLS for a in actions):
+                continue
+            # "brightness to 80" must not replay "brightness to 50", and
+            # "population of pakistan 2020" must not replay the query without the year
+            if _numbers(other) != numbers or _content_words(other) != content:
+                continue
+            # "weather in karachi" must not answer "weather in lahore":
+            # every argument taken from the old utterance must be in the new one
+            grounded = [v for v in _plan_values(actions) if _grounded_in(v, other)]
+            if all(_grounded_in(v, key) for v in grounded):
+                best, best_score = other, score
+        return best
+
+    # ----- Storing -----
+
+    def put(self, text, actions):
+        key = normalize(text)
+        if self.is_context_dependent(key) or not self.is_cacheable(key, actions):
+            return False
+
+        with self.lock:
+            self.entries[key] = {"actions": json.loads(json.dumps(actions)), "stored": time.time()}
+            self.entries.move_to_end(key)
+            if self.near_duplicates:
+                self.vectors[key] = _embed(key)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+            self.metrics["stores"] += 1
+        self.save()
+        return True
+
+    def _drop(self, key):
+        self.entries.pop(key, None)
+        self.vectors.pop(key, None)
+
+    def invalidate(self, text=None):
+        """Removes one transcript from the cache, or everything if text is None."""
+        with self.lock:
+            if text is None:
+                self.entries.clear()
+                self.vectors.clear()
+            else:
+                self._drop(normalize(text))
+        self.save()
+
+    # ----- Persistence & metrics -----
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for key, entry in json.load(f).items():
+                        self.entries[key] = entry
+                        if self.near_duplicates:
+                            self.vectors[key] = _embed(key)
+        except Exception as e:
+            print(f"Error loading plan cache: {e}")
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self.lock:
+                data = dict(self.entries)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        except Exception as e:
+            print(f"Error saving plan cache: {e}")
+
+    def stats(self):
+        lookups = self.metrics["hits"] + self.metrics["near_hits"] + self.metrics["misses"]
+        hit_rate = (self.metrics["hits"] + self.metrics["near_hits"]) / lookups if lookups else 0.0
+        return dict(self.metrics, entries=len(self.entries), hit_rate=round(hit_rate, 3))
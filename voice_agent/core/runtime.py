@@ -0,0 +1,218 @@
+"""
+Asyncio agent runtime.
+
+The voice loop is split into pipelined stages connected by queues:
+
+    capture -> recognize -> plan -> act -> speak
+
+Blocking work (microphone, Google STT, the LLM, tools, playback) runs in
+worker threads via asyncio.to_thread, so the microphone keeps listening for
+the next command while the previous answer is still being spoken. Speaking
+over the assistant (barge-in) stops playback and drops its queued replies.
+Slow desktop automation is handed to core/workers and reports back via say().
+"""
+
+import asyncio
+import re
+import traceback
+from collections import deque
+
+from core.listen import make_recognizer, capture, recognize
+from core.brain import think, remember_result
+from core.speak import (speak_async, stop_playback, is_playing, playback_marker,
+                        played_since, seconds_since_playback)
+from core.workers import WORKERS
+from core.tracing import TRACER, span, new_turn, use_turn, current_turn, summarize, format_report
+
+EXIT_PHRASES = ("exit", "stop listening")
+
+# The room keeps echoing the last reply for a moment after playback stops
+ECHO_GRACE_SECONDS = 1.5
+
+def _words(text):
+    return set(re.findall(r"[a-z0-9']+", (text or "").lower()))
+
+class AgentRuntime:
+    def __init__(self, execute_action, barge_in=True):
+        """
+        execute_action(action, say) runs one tool and returns its result;
+        say(text) queues speech instead of blocking on playback.
+        """
+        self.execute_action = execute_action
+        self.barge_in = barge_in
+        self.recognizer = make_recognizer()
+
+        self.audio_queue = asyncio.Queue()
+        self.text_queue = asyncio.Queue()
+        self.plan_queue = asyncio.Queue()
+        self.speech_queue = asyncio.Queue()
+
+        self.running = False
+        self.turn = 0
+        self.cancelled_turn = 0
+        self.recently_spoken = deque(maxlen=5)
+        self.loop = None
+
+    # ----- Helpers -----
+
+    def say(self, text, turn=None):
+        """Thread-safe: queues text for the speak stage."""
+        item = (self.turn if turn is None else turn, current_turn(), text)
+        # Background jobs can finish after the runtime has shut down
+        if self.loop is None or self.loop.is_closed():
+            print(f"[Not spoken] {text}")
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.speech_queue.put_nowait, item)
+        except RuntimeError:
+            print(f"[Not spoken] {text}")  # closed between the check and the call
+
+    def _is_echo(self, text):
+        """True if the transcript is just the assistant hearing itself."""
+        heard = _words(text)
+        if not heard:
+            return False
+        for spoken in self.recently_spoken:
+            if len(heard & spoken) / len(heard) >= 0.8:
+                return True
+        return False
+
+    def _interrupt(self):
+        """Barge-in: stop talking and forget replies queued for older turns."""
+        self.cancelled_turn = self.turn
+        stop_playback()
+        while not self.speech_queue.empty():
+            self.speech_queue.get_nowait()
+
+    # ----- Stages -----
+
+    async def capture_stage(self):
+        while self.running:
+            # Each capture may become a turn; its spans share one trace id
+            trace_id = new_turn()
+            # Taken before listening: a phrase the assistant spoke ends (and is
+            # returned) only after its playback has already stopped
+            marker = playback_marker()
+            try:
+                audio = await asyncio.to_thread(capture, self.recognizer)
+            except Exception as e:
+                print(f"⚠️ Capture error: {e}")
+                await asyncio.sleep(0.5)
+                continue
+            if audio is None:
+                continue
+            if self.barge_in and is_playing():
+                continue  # the speak stage's VAD owns interruptions
+            await self.audio_queue.put((trace_id, audio, played_since(marker)))
+
+    async def recognize_stage(self):
+        while self.running:
+            trace_id, audio, during_playback = await self.audio_queue.get()
+            with use_turn(trace_id):
+                text = await asyncio.to_thread(recognize, audio, self.recognizer)
+            if not text:
+                continue
+
+            if during_playback or seconds_since_playback() < ECHO_GRACE_SECONDS:
+                if self._is_echo(text):
+                    continue
+            if during_playback:
+                if not self.barge_in:
+                    continue
+                self._interrupt()
+
+            if any(phrase in text.lower() for phrase in EXIT_PHRASES):
+                self._interrupt()
+                await speak_async("Shutting down. Goodbye.")
+                self.running = False
+                break
+
+            self.turn += 1
+            await self.text_queue.put((self.turn, trace_id, text))
+
+    async def plan_stage(self):
+        while self.running:
+            turn, trace_id, text = await self.text_queue.get()
+            try:
+                with use_turn(trace_id), span("think"):
+                    decisions = await asyncio.to_thread(think, text)
+            except Exception as e:
+                # Keep planning later turns; tell the user this one failed
+                print(f"⚠️ Planning failed for '{text}': {e}")
+                traceback.print_exc()
+                decisions = [{"tool": "response", "text": "Sorry, something went wrong with that request."}]
+            if not isinstance(decisions, list):
+                decisions = [decisions]
+            await self.plan_queue.put((turn, trace_id, decisions))
+
+    async def act_stage(self):
+        while self.running:
+            turn, trace_id, decisions = await self.plan_queue.get()
+            for decision in decisions:
+                if turn <= self.cancelled_turn:
+                    break  # the user talked over this command
+                if not isinstance(decision, dict):
+                    print(f"⚠️ Skipping malformed action: {decision!r}")
+                    continue
+                say = lambda text, turn=turn: self.say(text, turn)
+                try:
+                    with use_turn(trace_id), span("act", tool=str(decision.get("tool"))):
+                        result = await asyncio.to_thread(self.execute_action, decision, say)
+                except Exception as e:
+                    # One failing tool must not stop the stage for every later turn
+                    print(f"⚠️ Action {decision.get('tool')} failed: {e}")
+                    traceback.print_exc()
+                    result = f"Error: {e}"
+                remember_result(decision.get("tool"), result)
+                print(f"[Result] {result}")
+            print("-" * 60)
+
+    async def speak_stage(self):
+        while self.running:
+            turn, trace_id, text = await self.speech_queue.get()
+            if turn <= self.cancelled_turn:
+                continue  # reply to a command the user already talked over
+            self.recently_spoken.append(_words(text))
+            try:
+                with use_turn(trace_id), span("speak"):
+                    interruption = await speak_async(text, barge_in=self.barge_in)
+            except Exception as e:
+                print(f"⚠️ Speaking failed: {e}")
+                traceback.print_exc()
+                continue
+            if interruption is not None:
+                # Playback was already stopped by the VAD; recognize right away
+                self._interrupt()
+                await self.audio_queue.put((new_turn(), interruption, False))
+
+    # ----- Lifecycle -----
+
+    async def run(self, greeting="System online. All features loaded. I am listening."):
+        self.loop = asyncio.get_running_loop()
+        self.running = True
+        if greeting:
+            await speak_async(greeting)
+
+        stages = [
+            asyncio.create_task(self.capture_stage(), name="capture"),
+            asyncio.create_task(self.recognize_stage(), name="recognize"),
+            asyncio.create_task(self.plan_stage(), name="plan"),
+            asyncio.create_task(self.act_stage(), name="act"),
+            asyncio.create_task(self.speak_stage(), name="speak"),
+        ]
+        try:
+            # Runs until the recognize stage sees an exit phrase
+            await stages[1]
+        finally:
+            self.running = False
+            for task in stages:
+                task.cancel()
+            WORKERS.shutdown()
+            self.print_latency_report()
+
+    def print_latency_report(self):
+        """Per-stage latency for this session (full history: python -m core.tracing report)."""
+        print("=" * 60)
+        print(f"STAGE LATENCY - session {TRACER.session_id}")
+        print(format_report(summarize(list(TRACER.recent))))
+        print("=" * 60)
@@ -1,42 +1,166 @@
 import asyncio
 import edge_tts
 import os
+import tempfile
+import threading
+import time
 import pygame
 
+from core.tracing import span, current_turn, use_turn
+
 # Configuration
 VOICE = "en-US-AriaNeural"  # or en-GB-SoniaNeural, en-US-ChristopherNeural
 OUTPUT_FILE = "response.mp3"
 
-async def generate_audio(text):
+# One long-lived event loop for synthesis instead of a new loop per utterance
+_LOOP = None
+_LOOP_LOCK = threading.Lock()
+
+# Set to interrupt the clip that is currently playing
+_STOP_PLAYBACK = threading.Event()
+_PLAYING = threading.Event()
+
+# Lets listeners tell whether the assistant spoke during a capture window
+_PLAYBACK_COUNT = 0       # clips started so far
+_PLAYBACK_ENDED_AT = 0.0  # time.monotonic() when the last clip stopped
+
+# Background tools can report back while the main loop is speaking;
+# one clip plays at a time
+_PLAYBACK_LOCK = threading.Lock()
+
+def _get_loop():
+    """Returns the background event loop used by the synchronous speak()."""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, daemon=True, name="tts-loop").start()
+        return _LOOP
+
+def new_output_file():
+    """Unique file per utterance so synthesis can overlap playback."""
+    fd, path = tempfile.mkstemp(prefix="nexus_tts_", suffix=".mp3")
+    os.close(fd)
+    return path
+
+async def generate_audio(text, output_file=OUTPUT_FILE):
     """Generates MP3 audio from text using Edge-TTS."""
-    communicate = edge_tts.Communicate(text, VOICE)
-    await communicate.save(OUTPUT_FILE)
+    with span("speak.synthesize", chars=len(text)):
+        communicate = edge_tts.Communicate(text, VOICE)
+        await communicate.save(output_file)
 
-def play_audio():
-    """Plays the generated audio file using pygame to avoid blocking issues."""
+def play_audio(output_file=OUTPUT_FILE, started=None):
+    """
+    Plays the generated audio file using pygame to avoid blocking issues.
+    started (threading.Event) is set once the clip is actually playing.
+    """
+    with _PLAYBACK_LOCK:
+        _play_locked(output_file, started)
+
+def _play_locked(output_file, started=None):
+    global _PLAYBACK_COUNT, _PLAYBACK_ENDED_AT
     try:
-        pygame.mixer.init()
-        pygame.mixer.music.load(OUTPUT_FILE)
-        pygame.mixer.music.play()
-        
-        while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
-            
+        _STOP_PLAYBACK.clear()
+        _PLAYING.set()
+        _PLAYBACK_COUNT += 1
+        with span("speak.playback") as attrs:
+            pygame.mixer.init()
+            pygame.mixer.music.load(output_file)
+            pygame.mixer.music.play()
+            if started is not None:
+                started.set()
+
+            # Poll every 10 ms so a barge-in stops playback almost immediately
+            clock = pygame.time.Clock()
+            while pygame.mixer.music.get_busy():
+                if _STOP_PLAYBACK.is_set():
+                    pygame.mixer.music.stop()
+                    attrs["interrupted"] = True
+                    break
+                clock.tick(100)
+
         pygame.mixer.quit()
         # Clean up
-        if os.path.exists(OUTPUT_FILE):
-            os.remove(OUTPUT_FILE)
+        if os.path.exists(output_file):
+            os.remove(output_file)
     except Exception as e:
         print(f"Error playing audio: {e}")
+    finally:
+        _PLAYBACK_ENDED_AT = time.monotonic()
+        _PLAYING.clear()
+
+def stop_playback():
+    """Interrupts the current playback, if any."""
+    _STOP_PLAYBACK.set()
+
+def is_playing():
+    return _PLAYING.is_set()
+
+def playback_marker():
+    """Opaque marker of the playback state; pass it to played_since()."""
+    return _PLAYBACK_COUNT, is_playing()
+
+def played_since(marker):
+    """True if audio was playing at any point since marker was taken."""
+    count, was_playing = marker
+    return was_playing or is_playing() or _PLAYBACK_COUNT != count
+
+def seconds_since_playback():
+    """Seconds since the last clip stopped (0 while one is playing)."""
+    if is_playing():
+        return 0.0
+    return time.monotonic() - _PLAYBACK_ENDED_AT if _PLAYBACK_COUNT else float("inf")
+
+async def speak_async(text, barge_in=False):
+    """
+    Speaks text from inside an asyncio loop without blocking it.
+    With barge_in, the microphone is monitored during playback; if the user
+    starts talking, playback stops and their phrase (AudioData) is returned.
+    """
+    try:
+        print(f"Assistant: {text}")
+        output_file = new_output_file()
+        await generate_audio(text, output_file)
+        if not barge_in:
+            await asyncio.to_thread(play_audio, output_file)
+            return None
+
+        from core.listen import monitor_barge_in
+
+        playback_started = threading.Event()
+        playback_done = threading.Event()
+
+        def play():
+            try:
+                play_audio(output_file, started=playback_started)
+            finally:
+                playback_done.set()
+
+        player = asyncio.to_thread(play)
+        monitor = asyncio.to_thread(monitor_barge_in, playback_done, stop_playback, playback_started)
+        _, captured = await asyncio.gather(player, monitor, return_exceptions=True)
+        if isinstance(captured, Exception):
+            print(f"Barge-in monitor error: {captured}")
+            return None
+        return captured
+    except Exception as e:
+        print(f"Error in speech synthesis: {e}")
+        return None
+
+async def _generate_in_turn(text, output_file, trace_id):
+    """Runs synthesis on the background loop under the caller's trace."""
+    with use_turn(trace_id):
+        await generate_audio(text, output_file)
 
 def speak(text):
     """Synchronous wrapper for the speech function."""
     try:
         print(f"Assistant: {text}")
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(generate_audio(text))
-        play_audio()
+        output_file = new_output_file()
+        coroutine = _generate_in_turn(text, output_file, current_turn())
+        future = asyncio.run_coroutine_threadsafe(coroutine, _get_loop())
+        future.result()
+        play_audio(output_file)
     except Exception as e:
         print(f"Error in speech synthesis: {e}")
 
@@ -0,0 +1,251 @@
+"""
+Single source of truth for the tools the brain can call.
+
+The schema drives three things:
+- the compact tool catalog sent in the system prompt (core/brain)
+- argument checks before an action is executed (main / gui)
+- a cheap keyword classifier that picks which tool groups an utterance needs,
+  so only those groups are sent to the LLM.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Each tool: name, args (name -> hint), required args, optional description.
+# Hints are rendered as-is: "int", "a|b|c" (choices), '["x", ...]' (a list)
+# or a short example; args not in required are marked optional.
+TOOL_GROUPS = {
+    "communication": {
+        "keywords": ["whatsapp", "message", "send", "text", "msg"],
+        "tools": [
+            {"name": "whatsapp_send", "args": {"contact": "name", "message": "text"},
+             "required": ["contact", "message"]},
+            {"name": "whatsapp_send_batch", "args": {"contacts": '["name", ...]', "message": "text"},
+             "required": ["contacts", "message"],
+             "description": "same message to several contacts in one go"},
+        ],
+        "example": ('Message Ali on WhatsApp that I am late',
+                    '{"tool": "whatsapp_send", "contact": "Ali", "message": "I am late"}'),
+    },
+    "apps": {
+        "keywords": ["open", "close", "launch", "start", "quit", "kill", "app",
+                     "browser", "website", "url", "chrome", "youtube", "www", "http"],
+        "tools": [
+            {"name": "open_app", "args": {"app_name": "name"}, "required": ["app_name"]},
+            {"name": "close_app", "args": {"app_name": "name"}, "required": ["app_name"]},
+            {"name": "open_url", "args": {"url": "https://..."}, "required": ["url"]},
+        ],
+        "example": ('Open chrome', '{"tool": "open_app", "app_name": "chrome"}'),
+    },
+    "system": {
+        "keywords": ["battery", "charge", "volume", "louder", "quieter", "mute", "sound",
+                     "bright", "dim", "time", "date", "day", "today", "cpu", "ram",
+                     "memory", "system", "usage", "shutdown", "shut", "restart",
+                     "reboot", "power", "cancel", "slow", "trend", "trends", "lately",
+                     "hog", "process", "heavy"],
+        "tools": [
+            {"name": "get_battery", "args": {}},
+            {"name": "control_volume", "args": {"action": "up|down|mute|unmute|int"}, "required": ["action"]},
+            {"name": "adjust_brightness", "args": {"action": "up|down|int"}, "required": ["action"]},
+            {"name": "get_time", "args": {}},
+            {"name": "get_date", "args": {}},
+            {"name": "get_system_info", "args": {}},
+            {"name": "system_trends", "args": {"minutes": "int"},
+             "description": "CPU/RAM/disk/network over the last minutes"},
+            {"name": "top_processes", "args": {"by": "cpu|memory", "minutes": "optional int"},
+             "description": "apps using the most CPU or memory; close one with close_app"},
+            {"name": "shutdown_system", "args": {"delay": "int seconds"},
+             "description": "always use a delay unless told 'now'"},
+            {"name": "restart_system", "args": {"delay": "int seconds"}},
+            {"name": "cancel_shutdown", "args": {}},
+        ],
+        "example": ('Shut down the computer', '{"tool": "shutdown_system", "delay": 30}'),
+    },
+    "files": {
+        "keywords": ["file", "folder", "directory", "dir", "delete", "remove", "rename",
+                     "copy", "move", "find", "search", "document", "desktop", "download",
+                     "path", "location", "list", "contents", "size", "info"],
+        "tools": [
+            {"name": "create_file", "args": {"path": "path", "content": "optional"},
+             "required": ["path"]},
+            {"name": "create_folder", "args": {"path": "path"}, "required": ["path"]},
+            {"name": "delete_item", "args": {"path": "path"}, "required": ["path"]},
+            {"name": "rename_item", "args": {"old_path": "old", "new_path": "new"},
+             "required": ["old_path", "new_path"]},
+            {"name": "copy_item", "args": {"source": "src", "destination": "dest"},
+             "required": ["source", "destination"]},
+            {"name": "search_files", "args": {"query": "filename", "location": "optional",
+                                              "extension": "optional .txt"},
+             "required": ["query"]},
+            {"name": "get_file_info", "args": {"path": "path"}, "required": ["path"]},
+            {"name": "open_location", "args": {"path": "path"}, "required": ["path"]},
+            {"name": "list_directory", "args": {"path": "path"}},
+        ],
+        "example": ('Search for Python files in my documents',
+                    '{"tool": "search_files", "query": "python", "location": "~/Documents", "extension": ".py"}'),
+    },
+    "web": {
+        "keywords": ["search", "google", "look", "wikipedia", "wiki", "who", "what", "tell",
+                     "about", "weather", "temperature", "rain", "forecast", "news",
+                     "headline", "define", "definition", "meaning", "mean"],
+        "tools": [
+            {"name": "google_search", "args": {"query": "terms", "num_results": "int"},
+             "required": ["query"]},
+            {"name": "wikipedia", "args": {"topic": "topic"}, "required": ["topic"]},
+            {"name": "get_weather", "args": {"city": "city"}, "required": ["city"]},
+            {"name": "get_news", "args": {"category": "general|business|tech|sports"}},
+            {"name": "define_word", "args": {"word": "word"}, "required": ["word"]},
+        ],
+        "example": ('Tell me about Albert Einstein', '{"tool": "wikipedia", "topic": "Albert Einstein"}'),
+    },
+    "notes": {
+        "keywords": ["remind", "reminder", "alarm", "note", "notes", "write", "add",
+                     "append", "insert", "undo", "jot", "shopping", "todo"],
+        "tools": [
+            {"name": "set_reminder", "args": {"message": "text", "time": "in 5 minutes|at 3:00 PM"},
+             "required": ["message", "time"]},
+            {"name": "list_reminders", "args": {}},
+            {"name": "cancel_reminder", "args": {"index": "int"}, "required": ["index"]},
+            {"name": "create_note", "args": {"title": "title", "content": "text"},
+             "required": ["title"]},
+            {"name": "read_note", "args": {"title": "title"}, "required": ["title"]},
+            {"name": "list_notes", "args": {}},
+            {"name": "delete_note", "args": {"title": "title"}, "required": ["title"]},
+            {"name": "append_note", "args": {"title": "title", "text": "new text only"},
+             "required": ["title", "text"],
+             "description": "use to add to an existing note; never rewrite it with create_note"},
+            {"name": "insert_note", "args": {"title": "title", "text": "new text only", "line": "int"},
+             "required": ["title", "text"]},
+            {"name": "undo_note", "args": {"title": "title"}, "required": ["title"]},
+        ],
+        "example": ('Add milk to my shopping note',
+                    '{"tool": "append_note", "title": "shopping", "text": "milk"}'),
+    },
+    "screen": {
+        "keywords": ["screenshot", "screen", "capture", "snap", "clipboard", "copy",
+                     "paste", "copied", "screenshots", "history"],
+        "tools": [
+            {"name": "take_screenshot", "args": {"save_path": "optional"}},
+            {"name": "screenshot_to_clipboard", "args": {}},
+            {"name": "get_clipboard", "args": {}},
+            {"name": "set_clipboard", "args": {"text": "text"}, "required": ["text"]},
+            {"name": "clipboard_history", "args": {"query": "optional words to find"},
+             "description": "earlier copied items, numbered 1 = most recent"},
+            {"name": "paste_from_history", "args": {"position": "int"}, "required": ["position"],
+             "description": "paste the Nth most recently copied item"},
+            {"name": "list_screenshots", "args": {}},
+            {"name": "search_screenshots", "args": {"query": "text shown on screen"}, "required": ["query"],
+             "description": "find screenshots by the text they contain"},
+            {"name": "open_screenshot_folder", "args": {}},
+        ],
+        "example": ('Take a screenshot', '{"tool": "take_screenshot"}'),
+    },
+}
+
+# The verbal reply tool is always available, whatever the utterance is about
+RESPONSE_TOOL = {"name": "response", "args": {"text": "..."}, "required": ["text"],
+                 "description": "verbal reply to the user"}
+
+# Fixed order keeps the rendered prompt prefix stable between requests,
+# which lets the provider reuse its prompt cache.
+GROUP_ORDER = list(TOOL_GROUPS)
+
+TOOLS = {RESPONSE_TOOL["name"]: RESPONSE_TOOL}
+for _group in TOOL_GROUPS.values():
+    for _tool in _group["tools"]:
+        TOOLS[_tool["name"]] = _tool
+
+PROMPT_HEADER = """You are 'Code Nexus', a highly advanced AI Personal Assistant running on Windows.
+You are helpful, precise, and authoritative. You remember previous commands and can run several actions at once.
+
+Reply ONLY with JSON: one action {"tool": name, ...args} or a list of actions,
+e.g. [{"tool": "get_time"}, {"tool": "get_battery"}].
+Tool signatures below list name(args); "a|b" means choose one, "int" means a number,
+"[...]" means a JSON list and "arg?" may be left out.
+Use full paths or ~ for the home directory. Extract key terms for search queries.
+If a request needs a tool that is not listed, answer with the response tool."""
+
+def _render_arg(name, hint, required):
+    """'minutes', 'optional int' -> 'minutes?:int'; example hints are left out."""
+    if hint.startswith("optional"):
+        hint = hint[len("optional"):].strip()
+        required = False
+    if not required:
+        name += "?"
+    if "|" in hint or hint.startswith("int") or hint.startswith("["):
+        return f"{name}:{hint}"
+    return name
+
+def render_tool(tool):
+    """Renders one tool as a compact signature line, e.g. open_app(app_name)."""
+    required = set(tool.get("required", []))
+    args = [_render_arg(name, hint, name in required) for name, hint in tool["args"].items()]
+    line = f"{tool['name']}({', '.join(args)})"
+    if tool.get("description"):
+        line += f" - {tool['description']}"
+    return line
+
+@lru_cache(maxsize=64)
+def _build_prompt(groups):
+    lines = [PROMPT_HEADER, "", "TOOLS:", render_tool(RESPONSE_TOOL)]
+    examples = []
+    for group in GROUP_ORDER:
+        if group not in groups:
+            continue
+        lines.append(f"# {group}")
+        lines.extend(render_tool(tool) for tool in TOOL_GROUPS[group]["tools"])
+        if TOOL_GROUPS[group].get("example"):
+            examples.append(TOOL_GROUPS[group]["example"])
+
+    lines.append("")
+    lines.append("EXAMPLES:")
+    for user, reply in examples[:3]:
+        lines.append(f'User: "{user}" -> {reply}')
+    return "\n".join(lines)
+
+def build_system_prompt(groups=None):
+    """
+    Returns the system prompt containing only the given tool groups.
+    None means every group. Results are cached per group combination.
+    """
+    if groups is None:
+        groups = GROUP_ORDER
+    return _build_prompt(frozenset(groups))
+
+def select_groups(utterance):
+    """
+    Picks the tool groups an utterance is likely to need using keyword stems.
+    Falls back to every group when nothing matches, so the LLM is never
+    left without the tool it needs.
+    """
+    words = re.findall(r"[a-z0-9]+", (utterance or "").lower())
+    selected = set()
+    for group, spec in TOOL_GROUPS.items():
+        for keyword in spec["keywords"]:
+            if any(word.startswith(keyword) for word in words):
+                selected.add(group)
+                break
+    return selected or set(GROUP_ORDER)
+
+# validate_action error codes
+INVALID_ACTION = "invalid_action"
+UNKNOWN_TOOL = "unknown_tool"
+MISSING_ARGS = "missing_args"
+
+ActionError = namedtuple("ActionError", ["code", "message"])
+
+def validate_action(action):
+    """
+    Checks an action against the schema.
+    Returns None if it is valid, otherwise an ActionError(code, message).
+    """
+    if not isinstance(action, dict):
+        return ActionError(INVALID_ACTION, f"Invalid action: {action}")
+    tool = TOOLS.get(action.get("tool"))
+    if tool is None:
+        return ActionError(UNKNOWN_TOOL, f"Unknown tool: {action.get('tool')}")
+    missing = [arg for arg in tool.get("required", []) if action.get(arg) in (None, "", [])]
+    if missing:
+        return ActionError(MISSING_ARGS, f"Missing {', '.join(missing)} for {tool['name']}")
+    return None
@@ -0,0 +1,281 @@
+"""
+Lightweight tracing for the voice pipeline.
+
+Every turn gets a trace id; each stage (calibration, capture, recognition,
+LLM, tool, synthesis, playback) is recorded as a span with monotonic start
+and end timestamps. Spans are appended to a rotating JSONL file under
+data/traces and can be exported in OpenTelemetry's OTLP/JSON layout.
+
+Usage:
+    from core.tracing import span, new_turn
+
+    new_turn()
+    with span("think.llm", route="groq:llama"):
+        ...
+
+Report (p50/p95/p99 per stage):
+    python -m core.tracing report [trace.jsonl] [--session SESSION_ID]
+    python -m core.tracing export-otlp [trace.jsonl] [--out trace_otlp.json]
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+TRACE_DIR = os.path.join(DATA_DIR, "traces")
+TRACE_FILE = os.path.join(TRACE_DIR, "trace.jsonl")
+
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+_current_trace = contextvars.ContextVar("nexus_trace_id", default=None)
+_current_span = contextvars.ContextVar("nexus_span_id", default=None)
+
+class Tracer:
+    def __init__(self, path=TRACE_FILE, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT, enabled=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.enabled = enabled
+        self.session_id = uuid.uuid4().hex[:12]
+        self.recent = deque(maxlen=5000)
+        self.lock = threading.Lock()
+        # Anchor monotonic clock to wall clock once, for OTLP export
+        self.wall_anchor_ns = time.time_ns()
+        self.mono_anchor_ns = time.monotonic_ns()
+
+    # ----- Turns -----
+
+    def new_turn(self):
+        """Starts a new trace (one per user command) in the current context."""
+        trace_id = uuid.uuid4().hex
+        _current_trace.set(trace_id)
+        _current_span.set(None)
+        return trace_id
+
+    @contextmanager
+    def use_turn(self, trace_id):
+        """Runs a block under an existing trace id (e.g. in another pipeline stage)."""
+        token = _current_trace.set(trace_id)
+        span_token = _current_span.set(None)
+        try:
+            yield
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(token)
+
+    # ----- Spans -----
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Records the duration of a block. Attributes can be added via the yielded dict."""
+        if not self.enabled:
+            yield attrs
+            return
+
+        trace_id = _current_trace.get() or self.new_turn()
+        parent_id = _current_span.get()
+        span_id = uuid.uuid4().hex[:16]
+        token = _current_span.set(span_id)
+        start = time.monotonic_ns()
+        status = "ok"
+        try:
+            yield attrs
+        except BaseException as e:
+            status = f"error: {type(e).__name__}"
+            raise
+        finally:
+            end = time.monotonic_ns()
+            _current_span.reset(token)
+            self._write({
+                "start_unix_ns": start + self.wall_anchor_ns - self.mono_anchor_ns,
+                "session": self.session_id,
+                "trace_id": trace_id,
+                "span_id": span_id,
+                "parent_id": parent_id,
+                "name": name,
+                "start_ns": start,
+                "end_ns": end,
+                "duration_ms": round((end - start) / 1e6, 3),
+                "status": status,
+                "attrs": {k: v for k, v in attrs.items() if isinstance(v, (str, int, float, bool))},
+            })
+
+    def _write(self, record):
+        self.recent.append(record)
+        try:
+            line = json.dumps(record) + "\n"
+            with self.lock:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+        except Exception as e:
+            print(f"Error writing trace: {e}")
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    # ----- Export -----
+
+    def to_otlp(self, records):
+        """Converts span records to an OTLP/JSON ExportTraceServiceRequest."""
+        spans = []
+        for r in records:
+            start = r["start_unix_ns"]
+            spans.append({
+                "traceId": r["trace_id"],
+                "spanId": r["span_id"],
+                "parentSpanId": r.get("parent_id") or "",
+                "name": r["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(start),
+                "endTimeUnixNano": str(start + r["end_ns"] - r["start_ns"]),
+                "attributes": [
+                    {"key": k, "value": _otlp_value(v)} for k, v in r.get("attrs", {}).items()
+                ] + [{"key": "session", "value": {"stringValue": r.get("session", "")}}],
+                "status": {"code": 1 if r.get("status") == "ok" else 2},
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "code-nexus"}}]},
+            "scopeSpans": [{"scope": {"name": "core.tracing"}, "spans": spans}],
+        }]}
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+# ===== Module-level tracer =====
+
+TRACER = Tracer(enabled=os.getenv("NEXUS_TRACING", "1") == "1")
+
+def span(name, **attrs):
+    return TRACER.span(name, **attrs)
+
+def new_turn():
+    return TRACER.new_turn()
+
+def use_turn(trace_id):
+    return TRACER.use_turn(trace_id)
+
+def current_turn():
+    return _current_trace.get()
+
+# ===== Reporting =====
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list (0.0 if empty)."""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(records):
+    """
+    Returns {span name: {n, errors, p50, p95, p99, mean}} in milliseconds.
+    Latencies cover successful spans only ("ok" status); failed ones (e.g. a
+    listen.capture that timed out waiting for speech) are only counted.
+    """
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    for r in records:
+        if r.get("status", "ok") == "ok":
+            durations[r["name"]].append(r["duration_ms"])
+        else:
+            errors[r["name"]] += 1
+    summary = {}
+    for name in set(durations) | set(errors):
+        values = sorted(durations[name])
+        summary[name] = {
+            "n": len(values),
+            "errors": errors[name],
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "mean": sum(values) / len(values) if values else 0.0,
+        }
+    return summary
+
+def format_report(summary):
+    lines = [f"{'stage':<22} {'n':>6} {'errors':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'mean ms':>10}"]
+    for name in sorted(summary):
+        s = summary[name]
+        lines.append(f"{name:<22} {s['n']:>6} {s['errors']:>6} {s['p50']:>10.1f} {s['p95']:>10.1f} "
+                     f"{s['p99']:>10.1f} {s['mean']:>10.1f}")
+    return "\n".join(lines)
+
+def load_records(path=TRACE_FILE, session=None):
+    """Reads spans from a trace file and its rotated backups (oldest first)."""
+    paths = [f"{path}.{i}" for i in range(BACKUP_COUNT, 0, -1)] + [path]
+    records = []
+    for p in paths:
+        if not os.path.exists(p):
+            continue
+        with open(p, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if session is None or record.get("session") == session:
+                    records.append(record)
+    return records
+
+def main(argv):
+    if not argv or argv[0] not in ("report", "export-otlp"):
+        print(__doc__)
+        return 1
+
+    command, args = argv[0], argv[1:]
+    options = {"--session": None, "--out": "trace_otlp.json"}
+    for option in options:
+        if option in args:
+            i = args.index(option)
+            if i + 1 >= len(args):
+                print(f"{option} needs a value")
+                return 1
+            options[option] = args[i + 1]
+            args = args[:i] + args[i + 2:]
+    if len(args) > 1:
+        print(f"Unexpected arguments: {' '.join(args[1:])}")
+        print(__doc__)
+        return 1
+    session = options["--session"]
+
+    path = args[0] if args else TRACE_FILE
+    records = load_records(path, session)
+    if not records:
+        print(f"No spans found in {path}")
+        return 1
+
+    if command == "report":
+        sessions = {r.get("session") for r in records}
+        turns = {r.get("trace_id") for r in records}
+        print(f"{len(records)} spans, {len(turns)} turns, {len(sessions)} session(s)")
+        print(format_report(summarize(records)))
+    else:
+        out = options["--out"]
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(TRACER.to_otlp(records), f)
+        print(f"Exported {len(records)} spans to {out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
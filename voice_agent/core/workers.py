@@ -0,0 +1,230 @@
+"""
+Background workers for slow or blocking tools.
+
+Desktop automation (WhatsApp, closing apps) can take several seconds. Instead
+of blocking the agent loop, such tools are submitted here and run either on a
+worker thread or in a separate process, with a timeout, cancellation, and a
+concurrent.futures.Future for the result. The assistant keeps listening and
+reports the outcome when the job finishes.
+
+Usage:
+    from core.workers import WORKERS
+
+    job = WORKERS.submit("whatsapp_send", send_whatsapp_message, "Ali", "hi", timeout=60)
+    job.future.add_done_callback(...)
+    job.cancel()
+
+A thread cannot be killed, so long threaded tools call check_cancelled()
+between steps; it raises once their job is cancelled or past its timeout.
+"""
+
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Tools that run in the background, with their timeout in seconds.
+# Isolated tools run in a child process that is killed on timeout/cancel;
+# a spawned child re-imports the whole app, so it is only worth it for tools
+# that cannot stop cooperatively.
+BLOCKING_TOOLS = {
+    # Threaded so the WhatsApp driver is reused; stops via check_cancelled()
+    "whatsapp_send": {"timeout": 60, "isolate": False},
+    "whatsapp_send_batch": {"timeout": 180, "isolate": False},
+    "close_app": {"timeout": 15, "isolate": False},  # bounded by its own kill escalation
+}
+
+POLL_INTERVAL = 0.1
+
+class ToolTimeout(Exception):
+    """Raised (via the future) when a job runs past its timeout."""
+
+class ToolCancelled(Exception):
+    """Raised (via the future) when a running job is cancelled."""
+
+class ToolJob:
+    def __init__(self, job_id, name, timeout):
+        self.id = job_id
+        self.name = name
+        self.timeout = timeout
+        self.future = Future()
+        self.cancel_event = threading.Event()
+        self.submitted = time.monotonic()
+        self.started = None
+
+    def cancel(self):
+        """Stops the job: pending jobs never start, isolated ones are killed."""
+        self.cancel_event.set()
+        if not self.future.done() and self.started is None:
+            self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+    def describe(self):
+        state = "done" if self.done() else ("running" if self.started else "queued")
+        return f"#{self.id} {self.name} ({state})"
+
+_CURRENT = threading.local()
+
+def current_job():
+    """The ToolJob running on this worker thread, or None."""
+    return getattr(_CURRENT, "job", None)
+
+def check_cancelled():
+    """
+    Cooperative stop point for threaded tools: raises ToolCancelled or
+    ToolTimeout if the calling job should stop. A no-op outside a job.
+    """
+    job = current_job()
+    if job is None:
+        return
+    if job.cancel_event.is_set():
+        raise ToolCancelled(f"{job.name} was cancelled")
+    if job.timeout is not None and time.monotonic() - job.started > job.timeout:
+        raise ToolTimeout(f"{job.name} timed out after {job.timeout}s")
+
+def _run_in_child(conn, fn, args, kwargs):
+    """Entry point of an isolated job's process."""
+    try:
+        conn.send(("ok", fn(*args, **kwargs)))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+class WorkerPool:
+    def __init__(self, max_threads=4, max_processes=2):
+        # Every job (threaded or isolated) is driven from one of these threads;
+        # isolated jobs are additionally limited to max_processes at a time
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="tool")
+        self.process_slots = threading.Semaphore(max_processes)
+        self.context = multiprocessing.get_context("spawn")
+        self.jobs = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def submit(self, name, fn, *args, timeout=None, isolate=False, **kwargs):
+        """
+        Runs fn(*args, **kwargs) in the background and returns a ToolJob.
+        isolate=True runs it in a child process (fn must be a module-level
+        function); a thread cannot be killed, so threaded jobs honour the
+        timeout/cancel before they start and at each check_cancelled() call.
+        """
+        job = ToolJob(next(self.ids), name, timeout)
+        with self.lock:
+            self.jobs[job.id] = job
+        job.future.add_done_callback(lambda _: self._forget(job))
+        runner = self._run_isolated if isolate else self._run_threaded
+        self.executor.submit(runner, job, fn, args, kwargs)
+        return job
+
+    def _forget(self, job):
+        with self.lock:
+            self.jobs.pop(job.id, None)
+
+    def _start(self, job):
+        """Marks the job running; False if it was cancelled while queued."""
+        if job.cancel_event.is_set() or not job.future.set_running_or_notify_cancel():
+            return False
+        job.started = time.monotonic()
+        return True
+
+    def _run_threaded(self, job, fn, args, kwargs):
+        if not self._start(job):
+            return
+        _CURRENT.job = job
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            job.future.set_exception(e)
+            return
+        finally:
+            _CURRENT.job = None
+        if job.cancel_event.is_set():
+            job.future.set_exception(ToolCancelled(f"{job.name} was cancelled"))
+        else:
+            # A tool that returns past its timeout has stopped itself (via
+            # check_cancelled) or finished anyway; either way its result is true
+            job.future.set_result(result)
+
+    def _run_isolated(self, job, fn, args, kwargs):
+        with self.process_slots:
+            if not self._start(job):
+                return
+            parent, child = self.context.Pipe(duplex=False)
+            process = self.context.Process(target=_run_in_child, args=(child, fn, args, kwargs),
+                                           daemon=True, name=f"tool-{job.name}")
+            try:
+                process.start()
+                child.close()
+                deadline = job.started + job.timeout if job.timeout else None
+                while True:
+                    if parent.poll(POLL_INTERVAL):
+                        status, value = parent.recv()
+                        if status == "ok":
+                            job.future.set_result(value)
+                        else:
+                            job.future.set_exception(RuntimeError(value))
+                        return
+                    if job.cancel_event.is_set():
+                        job.future.set_exception(ToolCancelled(f"{job.name} was cancelled"))
+                        return
+                    if deadline is not None and time.monotonic() > deadline:
+                        job.future.set_exception(ToolTimeout(f"{job.name} timed out after {job.timeout}s"))
+                        return
+                    if not process.is_alive() and not parent.poll():
+                        job.future.set_exception(RuntimeError(f"{job.name} exited with code {process.exitcode}"))
+                        return
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                if process.pid is not None:
+                    if process.is_alive():
+                        process.terminate()
+                    process.join(timeout=2)
+                parent.close()
+
+    def active(self):
+        """Jobs that are queued or running."""
+        with self.lock:
+            return list(self.jobs.values())
+
+    def cancel_all(self):
+        for job in self.active():
+            job.cancel()
+
+    def shutdown(self, cancel=True):
+        if cancel:
+            self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# ===== Module-level pool =====
+
+WORKERS = WorkerPool()
+
+def run_in_background(tool, fn, *args, on_done=None, **kwargs):
+    """
+    Submits a BLOCKING_TOOLS entry with its configured timeout/isolation.
+    on_done(result, error) is called from a worker thread when it finishes;
+    error is None on success.
+    """
+    config = BLOCKING_TOOLS.get(tool, {})
+    job = WORKERS.submit(tool, fn, *args, timeout=config.get("timeout"),
+                         isolate=config.get("isolate", False), **kwargs)
+    if on_done is not None:
+        def callback(future):
+            try:
+                if future.cancelled():
+                    on_done(None, ToolCancelled(f"{tool} was cancelled"))
+                elif future.exception() is not None:
+                    on_done(None, future.exception())
+                else:
+                    on_done(future.result(), None)
+            except Exception as e:
+                # e.g. reporting back after the agent loop has shut down
+                print(f"Error reporting {tool} result: {e}")
+        job.future.add_done_callback(callback)
+    return job
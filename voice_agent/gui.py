@@ -3,24 +3,32 @@ import threading
 import time
 import os
 import math
+import queue
+from collections import deque
 from datetime import datetime
 from dotenv import load_dotenv
-import psutil
 
 # Import core modules
 from core.listen import listen
-from core.brain import think
+from core.brain import think, remember_result
 from core.speak import speak
+from core.tools import TOOLS, validate_action, UNKNOWN_TOOL
+from core.tracing import span, new_turn
+from core.metrics import get_sampler
+from core.audio_levels import subscribe
+from core.workers import WORKERS, run_in_background
 
 # Import all skills - existing
-from skills.whatsapp import send_whatsapp_message
+from skills.whatsapp import send_whatsapp_message, send_whatsapp_batch, format_batch_status
 from skills.system import (
     open_application, close_application, shutdown_system, 
     restart_system, cancel_shutdown, get_current_time, get_current_date
 )
+from skills.app_index import APP_INDEX
+from skills.processes import top_processes
 from skills.hardware import (
     get_battery_status, adjust_volume, adjust_brightness, 
-    get_system_info, set_wallpaper
+    get_system_info, get_system_trends, set_wallpaper
 )
 from skills.browser import open_website
 
@@ -37,11 +45,14 @@ try:
     from skills.reminders import (
         set_reminder, list_reminders, cancel_reminder,
         create_note, read_note, list_notes, delete_note,
-        start_reminder_checker
+        append_note, insert_note, undo_note, start_reminder_checker
     )
     from skills.screen_tools import (
         take_screenshot, screenshot_to_clipboard, get_clipboard_text,
-        set_clipboard_text, list_screenshots, open_screenshot_folder
+        set_clipboard_text, list_screenshots, search_screenshots, open_screenshot_folder
+    )
+    from skills.clipboard_history import (
+        clipboard_history, paste_from_history, summarize_text, start_clipboard_watcher
     )
     PHASE1_LOADED = True
 except ImportError as e:
@@ -52,6 +63,13 @@ except ImportError as e:
 ctk.set_appearance_mode("Light")
 ctk.set_default_color_theme("green")
 
+# Activity log: records are flushed by the Tk loop every UI_REFRESH_MS,
+# at most LOG_BATCH_LIMIT per flush, and only the last LOG_MAX_LINES are kept
+UI_REFRESH_MS = 100
+LOG_BATCH_LIMIT = 200
+LOG_MAX_LINES = 1000
+METER_RATE_HZ = 10  # mic level updates per second (one per UI refresh)
+
 class EnhancedNexusUI(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -66,7 +84,7 @@ class EnhancedNexusUI(ctk.CTk):
         
         # Load Env
         load_dotenv()
-        self.api_key = os.getenv("GROQ_API_KEY")
+        self.api_key = os.getenv("GROQ_API_KEY") or os.getenv("LOCAL_LLM_URL")
 
         # Layout Grid
         self.grid_columnconfigure(0, weight=0, minsize=240)  # Sidebar
@@ -109,7 +127,7 @@ class EnhancedNexusUI(ctk.CTk):
         subtitle.grid(row=1, column=0, padx=20, sticky="w")
         
         # Feature counter
-        feature_count = "41" if PHASE1_LOADED else "14"
+        feature_count = str(len(TOOLS)) if PHASE1_LOADED else "14"
         self.feature_badge = ctk.CTkLabel(self.header_frame,
                                         text=f"{feature_count} TOOLS",
                                         font=("Georgia", 16, "bold"),
@@ -238,11 +256,19 @@ class EnhancedNexusUI(ctk.CTk):
         # State
         self.running = False
         self.thread = None
-        self.current_audio_level = 0
-        
-        # Start updates
-        self.update_sidebar_stats()
-        self.update_status_bar()
+        self.current_audio_level = -90.0
+        self.shown_audio_text = None
+        
+        # Worker threads post (kind, payload) here; only the Tk loop touches widgets
+        self.ui_queue = queue.Queue()
+        # Bounded too: if the UI stalls, the oldest unshown records are dropped
+        self.log_queue = deque(maxlen=LOG_MAX_LINES)
+        self.sampler = get_sampler()
+        self.sampler.subscribe(lambda changes: self.ui_queue.put(("metrics", changes)))
+        # The capture stream pushes mic levels; decimated to the refresh rate
+        self.meter = subscribe(lambda rms_db, peak_db: self.ui_queue.put(("audio_level", (rms_db, peak_db))),
+                               max_rate=METER_RATE_HZ)
+        self.process_ui_queue()
 
     def create_sidebar(self):
         """Create the system stats sidebar"""
@@ -331,56 +357,69 @@ class EnhancedNexusUI(ctk.CTk):
         
         return card
 
-    def update_sidebar_stats(self):
-        """Update sidebar statistics"""
+    def process_ui_queue(self):
+        """Applies updates posted by background threads (runs on the Tk loop)"""
         try:
-            # Time
-            now = datetime.now()
-            self.time_value.configure(text=now.strftime("%I:%M %p"))
-            self.date_value.configure(text=now.strftime("%A, %B %d"))
-            
-            # Battery
-            battery = psutil.sensors_battery()
-            if battery:
-                percent = battery.percent
-                charging = battery.power_plugged
-                self.battery_value.configure(text=f"{percent}%")
-                status_text = "Charging" if charging else "On Battery"
-                self.battery_status.configure(text=status_text)
-                
-                # Color coding
-                if percent > 60:
-                    self.battery_value.configure(text_color="#2d7a4f")
-                elif percent > 20:
-                    self.battery_value.configure(text_color="#d4af37")
-                else:
-                    self.battery_value.configure(text_color="#8b4513")
-            
-            # CPU
-            cpu = psutil.cpu_percent(interval=0.1)
-            self.cpu_value.configure(text=f"{cpu}%")
-            
-            # RAM
-            ram = psutil.virtual_memory()
-            self.ram_value.configure(text=f"{ram.percent}%")
-            
+            while True:
+                kind, payload = self.ui_queue.get_nowait()
+                if kind == "metrics":
+                    self.update_sidebar_stats(payload)
+                elif kind == "audio_level":
+                    self.update_status_bar(payload)
+                elif kind == "status":
+                    self.apply_status(*payload)
+                elif kind == "stopped":
+                    self.start_btn.configure(state="normal")
+                    self.stop_btn.configure(state="disabled")
+        except queue.Empty:
+            pass
         except Exception as e:
-            print(f"Error updating stats: {e}")
+            print(f"Error updating UI: {e}")
         
-        # Update every 2 seconds
-        self.after(2000, self.update_sidebar_stats)
-
-    def update_status_bar(self):
-        """Update the status bar with current processing state"""
         try:
-            # Update audio level if available
-            if hasattr(self, 'current_audio_level') and self.running:
-                level_text = f"AUDIO: {self.current_audio_level:.0f}dB"
-                self.threshold_label.configure(text=level_text)
-        except:
-            pass
+            self.flush_log()
+        except Exception as e:
+            print(f"Error updating log: {e}")
         
-        self.after(100, self.update_status_bar)
+        self.after(UI_REFRESH_MS, self.process_ui_queue)
+
+    def update_sidebar_stats(self, changes):
+        """Update the sidebar cards whose metric changed"""
+        if "time" in changes:
+            self.time_value.configure(text=changes["time"])
+        if "date" in changes:
+            self.date_value.configure(text=changes["date"])
+        
+        # Battery
+        if "battery" in changes:
+            percent, charging = changes["battery"]
+            self.battery_value.configure(text=f"{percent}%")
+            status_text = "Charging" if charging else "On Battery"
+            self.battery_status.configure(text=status_text)
+            
+            # Color coding
+            if percent > 60:
+                self.battery_value.configure(text_color="#2d7a4f")
+            elif percent > 20:
+                self.battery_value.configure(text_color="#d4af37")
+            else:
+                self.battery_value.configure(text_color="#8b4513")
+        
+        if "cpu" in changes:
+            self.cpu_value.configure(text=f"{changes['cpu']}%")
+        if "ram" in changes:
+            self.ram_value.configure(text=f"{changes['ram']}%")
+
+    def update_status_bar(self, levels):
+        """Update the audio level readout if it changed"""
+        if not self.running:
+            return
+        rms_db, peak_db = levels
+        self.current_audio_level = rms_db
+        level_text = f"AUDIO: {rms_db:.0f}dB  PEAK: {peak_db:.0f}dB"
+        if level_text != self.shown_audio_text:
+            self.threshold_label.configure(text=level_text)
+            self.shown_audio_text = level_text
 
     def clear_log(self):
         """Clear the activity log"""
@@ -389,22 +428,42 @@ class EnhancedNexusUI(ctk.CTk):
         self.chat_display.configure(state="disabled")
 
     def log(self, sender, message, tag="system"):
-        """Add message to activity log with elegant formatting"""
+        """Queue a message for the activity log (safe from any thread)"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.log_queue.append((f"[{timestamp}] {sender}: ", tag, str(message)))
+
+    def flush_log(self):
+        """Write queued log records in one batch and trim the oldest lines"""
+        batch = []
+        while len(batch) < LOG_BATCH_LIMIT:
+            try:
+                batch.append(self.log_queue.popleft())
+            except IndexError:
+                break
+        if not batch:
+            return
+        
         self.chat_display.configure(state="normal")
+        for prefix, tag, message in batch:
+            self.chat_display.insert("end", prefix, tag)
+            self.chat_display.insert("end", message + "\n")
         
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        prefix = f"[{timestamp}] {sender}: "
+        # Bounded ring: drop whole lines from the top
+        lines = int(self.chat_display.index("end-1c").split(".")[0])
+        if lines > LOG_MAX_LINES:
+            self.chat_display.delete("1.0", f"{lines - LOG_MAX_LINES + 1}.0")
         
-        self.chat_display.insert("end", prefix, tag)
-        self.chat_display.insert("end", message + "\n")
         self.chat_display.see("end")
         self.chat_display.configure(state="disabled")
 
-    def set_status(self, status_text, processing_text="IDLE", audio_level=0):
-        """Update all status indicators"""
+    def set_status(self, status_text, processing_text="IDLE"):
+        """Queue a status indicator update (safe from any thread)"""
+        self.ui_queue.put(("status", (status_text, processing_text)))
+
+    def apply_status(self, status_text, processing_text):
+        """Update all status indicators (runs on the Tk loop)"""
         self.status_indicator.configure(text=f"STATUS: {status_text}")
         self.processing_indicator.configure(text=processing_text)
-        self.current_audio_level = audio_level
         
         # Color coding for processing state
         colors = {
@@ -430,8 +489,12 @@ class EnhancedNexusUI(ctk.CTk):
         if PHASE1_LOADED:
             try:
                 start_reminder_checker()
+                start_clipboard_watcher()
             except:
                 pass
+        
+        # Rescan installed apps if the index is missing or old
+        APP_INDEX.refresh_in_background()
             
         self.running = True
         self.start_btn.configure(state="disabled")
@@ -442,11 +505,21 @@ class EnhancedNexusUI(ctk.CTk):
     def stop_listening(self):
         """Stop the agent"""
         self.running = False
+        WORKERS.cancel_all()
         self.set_status("SHUTTING DOWN", "IDLE")
 
     def execute_action(self, action):
-        """Execute a single action - handles all 40+ tools"""
+        """Execute a single action - handles all 40+ tools. Returns the result text."""
         tool = action.get("tool")
+        result = ""
+        
+        # Reject malformed actions before touching the system
+        error = validate_action(action)
+        # Unknown tools fall through to the "Unknown tool" branch below
+        if error and error.code != UNKNOWN_TOOL:
+            self.log("ERROR", error.message, "error")
+            speak("I need a bit more detail to do that")
+            return error.message
         
         try:
             # === COMMUNICATION ===
@@ -460,7 +533,37 @@ class EnhancedNexusUI(ctk.CTk):
                 message = action.get("message", "")
                 self.log("ACTION", f"WhatsApp -> {contact}", "action")
                 speak(f"Sending message to {contact}")
-                send_whatsapp_message(contact, message)
+                # Runs on a worker thread so we keep listening meanwhile
+                def sent(_, error, contact=contact):
+                    if error is None:
+                        self.log("ACTION", f"WhatsApp message sent to {contact}", "action")
+                        speak("Sent")
+                    else:
+                        self.log("ERROR", f"WhatsApp to {contact} failed: {error}", "error")
+                        speak(f"I could not send the message to {contact}.")
+                run_in_background("whatsapp_send", send_whatsapp_message, contact, message, on_done=sent)
+                result = f"Sending message to {contact} in the background"
+            
+            elif tool == "whatsapp_send_batch":
+                contacts = action.get("contacts", [])
+                if isinstance(contacts, str):
+                    contacts = [c.strip() for c in contacts.split(",") if c.strip()]
+                message = action.get("message", "")
+                self.log("ACTION", f"WhatsApp -> {', '.join(contacts)}", "action")
+                speak(f"Sending your message to {len(contacts)} contacts")
+                def batch_done(statuses, error):
+                    if error is not None:
+                        self.log("ERROR", f"WhatsApp batch failed: {error}", "error")
+                        speak("I could not send the messages.")
+                        return
+                    for status in statuses:
+                        tag = "action" if status["status"] == "sent" else "error"
+                        detail = f": {status['error']}" if status["error"] else ""
+                        self.log("ACTION", f"{status['contact']} - {status['status']}{detail}", tag)
+                    speak(format_batch_status(statuses))
+                run_in_background("whatsapp_send_batch", send_whatsapp_batch,
+                                  [(c, message) for c in contacts], on_done=batch_done)
+                result = f"Sending message to {', '.join(contacts)} in the background"
             
             # === APPLICATIONS & WEB ===
             elif tool == "open_app":
@@ -473,7 +576,13 @@ class EnhancedNexusUI(ctk.CTk):
                 app_name = action.get("app_name", "")
                 self.log("ACTION", f"Closing {app_name}", "action")
                 speak(f"Closing {app_name}")
-                close_application(app_name)
+                def closed(procs, error, app_name=app_name):
+                    if error is not None or not procs:
+                        self.log("ERROR", f"Could not close {app_name}", "error")
+                    else:
+                        self.log("SYSTEM", f"Closed {app_name} ({len(procs)} processes)", "system")
+                run_in_background("close_app", close_application, app_name, on_done=closed)
+                result = f"Closing {app_name} in the background"
             
             elif tool == "open_url":
                 url = action.get("url", "")
@@ -514,6 +623,19 @@ class EnhancedNexusUI(ctk.CTk):
                 self.log("NEXUS", result, "ai")
                 speak(result)
             
+            elif tool == "system_trends":
+                minutes = action.get("minutes", 1)
+                result = get_system_trends(minutes)
+                self.log("NEXUS", result, "ai")
+                speak(result)
+            
+            elif tool == "top_processes":
+                by = action.get("by", "cpu")
+                minutes = action.get("minutes")
+                result = top_processes(by=by, minutes=minutes)
+                self.log("NEXUS", result, "ai")
+                speak(result)
+            
             elif tool == "shutdown_system":
                 delay = action.get("delay", 30)
                 result = shutdown_system(delay)
@@ -650,23 +772,54 @@ class EnhancedNexusUI(ctk.CTk):
                 self.log("NOTE", result, "ai")
                 speak(result)
             
+            elif PHASE1_LOADED and tool == "append_note":
+                title = action.get("title", "")
+                text = action.get("text", "")
+                result = append_note(title, text)
+                self.log("NOTE", result, "action")
+                speak(result)
+            
+            elif PHASE1_LOADED and tool == "insert_note":
+                title = action.get("title", "")
+                text = action.get("text", "")
+                line = action.get("line", 1)
+                result = insert_note(title, text, line)
+                self.log("NOTE", result, "action")
+                speak(result)
+            
+            elif PHASE1_LOADED and tool == "undo_note":
+                title = action.get("title", "")
+                result = undo_note(title)
+                self.log("NOTE", result, "action")
+                speak(result)
+            
             # === SCREENSHOTS & CLIPBOARD (Phase 1) ===
             elif PHASE1_LOADED and tool == "take_screenshot":
                 save_path = action.get("save_path")
                 result = take_screenshot(save_path=save_path)
-                self.log("SCREEN", result, "action")
-                # Brief confirmation
-                speak("Taken")
+                if result.startswith("Error"):
+                    self.log("ERROR", result, "error")
+                    speak("I could not save the screenshot.")
+                else:
+                    self.log("SCREEN", result, "action")
+                    # Brief confirmation
+                    speak("Taken")
             
             elif PHASE1_LOADED and tool == "screenshot_to_clipboard":
                 result = screenshot_to_clipboard()
                 self.log("SCREEN", result, "action")
                 speak(result)
             
+            elif PHASE1_LOADED and tool == "search_screenshots":
+                query = action.get("query", "")
+                result = search_screenshots(query)
+                self.log("SCREEN", result, "ai")
+                speak(result)
+            
             elif PHASE1_LOADED and tool == "get_clipboard":
                 result = get_clipboard_text()
                 self.log("CLIPBOARD", result, "ai")
-                speak(result)
+                speak(summarize_text(result))
             
             elif PHASE1_LOADED and tool == "set_clipboard":
                 text = action.get("text", "")
@@ -674,6 +827,18 @@ class EnhancedNexusUI(ctk.CTk):
                 self.log("CLIPBOARD", result, "action")
                 speak(result)
             
+            elif PHASE1_LOADED and tool == "clipboard_history":
+                query = action.get("query")
+                result = clipboard_history(query=query)
+                self.log("CLIPBOARD", result, "ai")
+                speak(result)
+            
+            elif PHASE1_LOADED and tool == "paste_from_history":
+                position = action.get("position", 1)
+                result = paste_from_history(position)
+                self.log("CLIPBOARD", result, "action")
+                speak(result)
+            
             else:
                 self.log("ERROR", f"Unknown tool: {tool}", "error")
                 speak("I'm not sure how to do that yet")
@@ -682,6 +847,9 @@ class EnhancedNexusUI(ctk.CTk):
             error_msg = f"Error executing {tool}: {str(e)}"
             self.log("ERROR", error_msg, "error")
             speak("I encountered an error while doing that")
+            result = error_msg
+        
+        return result
 
     def run_agent(self):
         """Main agent loop - continuous listening"""
@@ -696,6 +864,7 @@ class EnhancedNexusUI(ctk.CTk):
                 # Listening phase
                 self.set_status("ACTIVE", "LISTENING")
                 self.log("STATUS", "Listening for command...", "status")
+                new_turn()
                 user_text = listen()
                 
                 if not self.running:
@@ -710,7 +879,8 @@ class EnhancedNexusUI(ctk.CTk):
                 # Thinking phase
                 self.set_status("ACTIVE", "THINKING")
                 self.log("STATUS", "Processing command...", "status")
-                actions = think(user_text)
+                with span("think"):
+                    actions = think(user_text)
                 
                 if not isinstance(actions, list):
                     actions = [actions]
@@ -720,7 +890,9 @@ class EnhancedNexusUI(ctk.CTk):
                 for action in actions:
                     if not self.running:
                         break
-                    self.execute_action(action)
+                    with span("act", tool=str(action.get("tool"))):
+                        result = self.execute_action(action)
+                    remember_result(action.get("tool"), result)
                 
                 self.set_status("ACTIVE", "IDLE")
 
@@ -730,8 +902,7 @@ class EnhancedNexusUI(ctk.CTk):
                 time.sleep(0.5)
         
         # Clean shutdown
-        self.start_btn.configure(state="normal")
-        self.stop_btn.configure(state="disabled")
+        self.ui_queue.put(("stopped", None))
         self.set_status("OFFLINE", "IDLE")
         speak("Code Nexus is now offline")
 
@@ -2,22 +2,30 @@ import os
 import sys
 import json
 import time
+import asyncio
 from dotenv import load_dotenv
 
 # Import core modules
 from core.listen import listen
-from core.brain import think
+from core.brain import think, remember_result
 from core.speak import speak
+from core.tools import validate_action, UNKNOWN_TOOL
+from core.runtime import AgentRuntime
+from core.tracing import span, new_turn
+from core.workers import WORKERS, run_in_background
+from core.metrics import get_sampler
 
 # Import existing skills
-from skills.whatsapp import send_whatsapp_message
+from skills.whatsapp import send_whatsapp_message, send_whatsapp_batch, format_batch_status
 from skills.system import (
     open_application, close_application, shutdown_system, 
     restart_system, cancel_shutdown, get_current_time, get_current_date
 )
+from skills.app_index import APP_INDEX
+from skills.processes import top_processes
 from skills.hardware import (
     get_battery_status, adjust_volume, adjust_brightness, 
-    get_system_info, set_wallpaper
+    get_system_info, get_system_trends, set_wallpaper
 )
 from skills.browser import open_website
 
@@ -33,280 +41,333 @@ from skills.web_search import (
 from skills.reminders import (
     set_reminder, list_reminders, cancel_reminder,
     create_note, read_note, list_notes, delete_note,
-    start_reminder_checker
+    append_note, insert_note, undo_note, start_reminder_checker
 )
 from skills.screen_tools import (
     take_screenshot, screenshot_to_clipboard, get_clipboard_text,
-    set_clipboard_text, list_screenshots, open_screenshot_folder
+    set_clipboard_text, list_screenshots, search_screenshots, open_screenshot_folder
+)
+from skills.clipboard_history import (
+    clipboard_history, paste_from_history, summarize_text, start_clipboard_watcher
 )
 
-def execute_action(action):
+def execute_action(action, say=speak):
     """
     Executes a single action based on the tool specified.
+    say(text) is used for spoken feedback (speak, or the runtime's speech queue).
     Returns the result message.
     """
     tool = action.get("tool")
     result = ""
     
+    # Reject malformed actions before touching the system
+    error = validate_action(action)
+    # Unknown tools fall through to the "Unknown tool" branch below
+    if error and error.code != UNKNOWN_TOOL:
+        print(error.message)
+        say("I need a bit more detail to do that.")
+        return error.message
+    
     try:
         # === EXISTING TOOLS ===
         if tool == "response":
             text = action.get("text", "")
-            speak(text)
+            say(text)
             result = text
         
         elif tool == "whatsapp_send":
             contact = action.get("contact", "")
             message = action.get("message", "")
-            speak(f"Sending message to {contact}")
-            send_whatsapp_message(contact, message)
-            result = "Message sent"
-            speak("Sent")
+            say(f"Sending message to {contact}")
+            # Runs on a worker thread so we keep listening meanwhile
+            def sent(_, error, contact=contact):
+                say("Sent" if error is None else f"I could not send the message to {contact}.")
+            run_in_background("whatsapp_send", send_whatsapp_message, contact, message, on_done=sent)
+            result = f"Sending message to {contact} in the background"
+        
+        elif tool == "whatsapp_send_batch":
+            contacts = action.get("contacts", [])
+            if isinstance(contacts, str):
+                contacts = [c.strip() for c in contacts.split(",") if c.strip()]
+            message = action.get("message", "")
+            say(f"Sending your message to {len(contacts)} contacts")
+            def batch_done(statuses, error):
+                say(format_batch_status(statuses) if error is None else f"I could not send the messages: {error}")
+            run_in_background("whatsapp_send_batch", send_whatsapp_batch,
+                              [(c, message) for c in contacts], on_done=batch_done)
+            result = f"Sending message to {', '.join(contacts)} in the background"
         
         elif tool == "open_app":
             app_name = action.get("app_name", "")
-            speak(f"Opening {app_name}")
+            say(f"Opening {app_name}")
             if open_application(app_name):
                 result = f"{app_name} opened"
             else:
                 result = f"Could not find {app_name}"
-                speak(result)
+                say(result)
         
         elif tool == "close_app":
             app_name = action.get("app_name", "")
-            speak(f"Closing {app_name}")
-            if close_application(app_name):
-                result = f"{app_name} closed"
-            else:
-                result = f"Could not close {app_name}"
-                speak(result)
+            say(f"Closing {app_name}")
+            def closed(procs, error, app_name=app_name):
+                if error is not None or not procs:
+                    say(f"Could not close {app_name}")
+            run_in_background("close_app", close_application, app_name, on_done=closed)
+            result = f"Closing {app_name} in the background"
         
         elif tool == "open_url":
             url = action.get("url", "")
-            speak("Opening browser")
+            say("Opening browser")
             open_website(url)
             result = f"Opened {url}"
         
         elif tool == "get_battery":
             result = get_battery_status()
-            speak(result)
+            say(result)
         
         elif tool == "control_volume":
             vol_action = action.get("action", "")
             result = adjust_volume(vol_action)
-            speak(result)
+            say(result)
         
         elif tool == "adjust_brightness":
             brightness_action = action.get("action", "")
             result = adjust_brightness(brightness_action)
-            speak(result)
+            say(result)
         
         elif tool == "get_time":
             result = get_current_time()
-            speak(result)
+            say(result)
         
         elif tool == "get_date":
             result = get_current_date()
-            speak(result)
+            say(result)
         
         elif tool == "get_system_info":
             result = get_system_info()
-            speak(result)
+            say(result)
+        
+        elif tool == "system_trends":
+            minutes = action.get("minutes", 1)
+            result = get_system_trends(minutes)
+            say(result)
+        
+        elif tool == "top_processes":
+            by = action.get("by", "cpu")
+            minutes = action.get("minutes")
+            result = top_processes(by=by, minutes=minutes)
+            say(result)
         
         elif tool == "shutdown_system":
             delay = action.get("delay", 0)
             result = shutdown_system(delay)
-            speak(result)
+            say(result)
         
         elif tool == "restart_system":
             delay = action.get("delay", 0)
             result = restart_system(delay)
-            speak(result)
+            say(result)
         
         elif tool == "cancel_shutdown":
             result = cancel_shutdown()
-            speak(result)
+            say(result)
         
         # === FILE MANAGEMENT TOOLS ===
         elif tool == "create_file":
             path = action.get("path", "")
             content = action.get("content", "")
             result = create_file(path, content)
-            speak(result)
+            say(result)
         
         elif tool == "create_folder":
             path = action.get("path", "")
             result = create_folder(path)
-            speak(result)
+            say(result)
         
         elif tool == "delete_item":
             path = action.get("path", "")
             result = delete_item(path)
-            speak(result)
+            say(result)
         
         elif tool == "rename_item":
             old_path = action.get("old_path", "")
             new_path = action.get("new_path", "")
             result = rename_item(old_path, new_path)
-            speak(result)
+            say(result)
         
         elif tool == "copy_item":
             source = action.get("source", "")
             destination = action.get("destination", "")
             result = copy_item(source, destination)
-            speak(result)
+            say(result)
         
         elif tool == "search_files":
             query = action.get("query", "")
             location = action.get("location")
             extension = action.get("extension")
             result = search_files(query, location, extension)
-            speak(result)
+            say(result)
         
         elif tool == "get_file_info":
             path = action.get("path", "")
             result = get_file_info(path)
-            speak(result)
+            say(result)
         
         elif tool == "open_location":
             path = action.get("path", "")
             result = open_location(path)
-            speak(result)
+            say(result)
         
         elif tool == "list_directory":
             path = action.get("path", ".")
             result = list_directory(path)
-            speak(result)
+            say(result)
         
         # === WEB SEARCH TOOLS ===
         elif tool == "google_search":
             query = action.get("query", "")
             num_results = action.get("num_results", 3)
-            speak(f"Searching for {query}")
+            say(f"Searching for {query}")
             result = google_search(query, num_results)
-            speak(result)
+            say(result)
         
         elif tool == "wikipedia":
             topic = action.get("topic", "")
-            speak(f"Looking up {topic} on Wikipedia")
+            say(f"Looking up {topic} on Wikipedia")
             result = wikipedia_query(topic)
-            speak(result)
+            say(result)
         
         elif tool == "get_weather":
             city = action.get("city", "")
-            speak(f"Getting weather for {city}")
+            say(f"Getting weather for {city}")
             result = get_weather(city)
-            speak(result)
+            say(result)
         
         elif tool == "get_news":
             category = action.get("category", "general")
-            speak(f"Fetching {category} news")
+            say(f"Fetching {category} news")
             result = get_news(category)
-            speak(result)
+            say(result)
         
         elif tool == "define_word":
             word = action.get("word", "")
-            speak(f"Looking up definition of {word}")
+            say(f"Looking up definition of {word}")
             result = define_word(word)
-            speak(result)
+            say(result)
         
         # === REMINDER & NOTES TOOLS ===
         elif tool == "set_reminder":
             message = action.get("message", "")
             time_str = action.get("time", "")
             result = set_reminder(message, time_str)
-            speak(result)
+            say(result)
         
         elif tool == "list_reminders":
             result = list_reminders()
-            speak(result)
+            say(result)
         
         elif tool == "cancel_reminder":
             index = action.get("index", 0)
             result = cancel_reminder(index)
-            speak(result)
+            say(result)
         
         elif tool == "create_note":
             title = action.get("title", "")
             content = action.get("content", "")
             result = create_note(title, content)
-            speak(result)
+            say(result)
         
         elif tool == "read_note":
             title = action.get("title", "")
             result = read_note(title)
-            speak(result)
+            say(result)
         
         elif tool == "list_notes":
             result = list_notes()
-            speak(result)
+            say(result)
         
         elif tool == "delete_note":
             title = action.get("title", "")
             result = delete_note(title)
-            speak(result)
+            say(result)
+        
+        elif tool == "append_note":
+            title = action.get("title", "")
+            text = action.get("text", "")
+            result = append_note(title, text)
+            say(result)
+        
+        elif tool == "insert_note":
+            title = action.get("title", "")
+            text = action.get("text", "")
+            line = action.get("line", 1)
+            result = insert_note(title, text, line)
+            say(result)
+        
+        elif tool == "undo_note":
+            title = action.get("title", "")
+            result = undo_note(title)
+            say(result)
         
         # === SCREENSHOT & CLIPBOARD TOOLS ===
         elif tool == "take_screenshot":
             save_path = action.get("save_path")
             result = take_screenshot(save_path=save_path)
-            speak(result)
+            say(result)
         
         elif tool == "screenshot_to_clipboard":
             result = screenshot_to_clipboard()
-            speak(result)
+            say(result)
         
         elif tool == "get_clipboard":
             result = get_clipboard_text()
-            speak(result)
+            say(summarize_text(result))
         
         elif tool == "set_clipboard":
             text = action.get("text", "")
             result = set_clipboard_text(text)
-            speak(result)
+            say(result)
+        
+        elif tool == "clipboard_history":
+            query = action.get("query")
+            result = clipboard_history(query=query)
+            say(result)
+        
+        elif tool == "paste_from_history":
+            position = action.get("position", 1)
+            result = paste_from_history(position)
+            say(result)
         
         elif tool == "list_screenshots":
             result = list_screenshots()
-            speak(result)
+            say(result)
+        
+        elif tool == "search_screenshots":
+            query = action.get("query", "")
+            result = search_screenshots(query)
+            say(result)
         
         elif tool == "open_screenshot_folder":
             result = open_screenshot_folder()
-            speak(result)
+            say(result)
         
         else:
             result = f"Unknown tool: {tool}"
-            speak("I'm not sure how to do that yet.")
+            say("I'm not sure how to do that yet.")
         
     except Exception as e:
         result = f"Error executing {tool}: {str(e)}"
         print(result)
-        speak("I encountered an error while doing that.")
+        say("I encountered an error while doing that.")
     
     return result
 
-def main():
-    # Load environment variables
-    load_dotenv()
-    if not os.getenv("GROQ_API_KEY"):
-        print("CRITICAL ERROR: GROQ_API_KEY is missing.")
-        print("Please edit the .env file and add your Groq API Key.")
-        speak("I need a brain. Please check your settings.")
-        return
-
-    print("=" * 60)
-    print("CODE NEXUS - COMPLETE WINDOWS AGENT")
-    print("=" * 60)
-    print("Features: File Management, Web Search, Reminders, Screenshots, System Control")
-    print("=" * 60)
-    
-    speak("System online. All features loaded. I am listening.")
-    
-    # Start the reminder checker in background
-    start_reminder_checker()
-
+def run_serial():
+    """Original strictly serial listen -> think -> act -> speak loop."""
     while True:
         try:
             # 1. Listen for user input
+            new_turn()
             user_text = listen()
             
             if not user_text:
@@ -314,11 +375,13 @@ def main():
             
             # Exit commands
             if "exit" in user_text.lower() or "stop listening" in user_text.lower():
+                WORKERS.shutdown()
                 speak("Shutting down. Goodbye.")
                 break
 
             # 2. Think - Get AI decision
-            decisions = think(user_text)
+            with span("think"):
+                decisions = think(user_text)
             
             # Ensure decisions is a list
             if not isinstance(decisions, list):
@@ -326,7 +389,9 @@ def main():
             
             # 3. Act - Execute all decisions
             for decision in decisions:
-                result = execute_action(decision)
+                with span("act", tool=str(decision.get("tool"))):
+                    result = execute_action(decision)
+                remember_result(decision.get("tool"), result)
                 print(f"[Result] {result}")
             
             print("-" * 60)
@@ -339,5 +404,40 @@ def main():
             print(f"An error occurred: {e}")
             speak("I encountered an error.")
 
+def main():
+    # Load environment variables
+    load_dotenv()
+    if not (os.getenv("GROQ_API_KEY") or os.getenv("LOCAL_LLM_URL")):
+        print("CRITICAL ERROR: GROQ_API_KEY is missing.")
+        print("Please edit the .env file and add your Groq API Key.")
+        speak("I need a brain. Please check your settings.")
+        return
+
+    print("=" * 60)
+    print("CODE NEXUS - COMPLETE WINDOWS AGENT")
+    print("=" * 60)
+    print("Features: File Management, Web Search, Reminders, Screenshots, System Control")
+    print("=" * 60)
+    
+    # Start the reminder checker in background
+    start_reminder_checker()
+    start_clipboard_watcher()
+    # Keep rolling CPU/RAM/disk/network history for the system tools
+    get_sampler()
+    # Rescan installed apps if the index is missing or old
+    APP_INDEX.refresh_in_background()
+
+    if "--serial" in sys.argv:
+        speak("System online. All features loaded. I am listening.")
+        run_serial()
+        return
+
+    # Pipelined runtime: keeps listening while the previous answer is spoken
+    try:
+        asyncio.run(AgentRuntime(execute_action).run())
+    except KeyboardInterrupt:
+        print("\nInterrupted by user.")
+        speak("Shutting down.")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,268 @@
+"""
+Index of installed applications for open_application.
+
+Start Menu / desktop shortcuts and Store apps are scanned once, saved to
+data/app_index.json and refreshed in the background, so opening an app is a
+dictionary lookup (or a quick fuzzy match) instead of a fresh AppOpener scan.
+Apps that are launched often rank higher when several names match.
+"""
+
+import difflib
+import json
+import math
+import os
+import re
+import subprocess
+import threading
+import time
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+INDEX_FILE = os.path.join(DATA_DIR, "app_index.json")
+
+REFRESH_AFTER = 24 * 3600  # seconds before a background rescan
+MIN_SCORE = 0.6
+
+SHORTCUT_DIRS = [
+    os.path.join(os.environ.get("PROGRAMDATA", ""), "Microsoft", "Windows", "Start Menu", "Programs"),
+    os.path.join(os.environ.get("APPDATA", ""), "Microsoft", "Windows", "Start Menu", "Programs"),
+    os.path.join(os.path.expanduser("~"), "Desktop"),
+    os.path.join(os.environ.get("PUBLIC", ""), "Desktop"),
+]
+
+# Spoken names that don't resemble the installed name
+BUILTIN_ALIASES = {
+    "vs code": "visual studio code",
+    "vscode": "visual studio code",
+    "code": "visual studio code",
+    "notepad plus plus": "notepad++",
+    "terminal": "windows terminal",
+    "cmd": "command prompt",
+}
+
+# Shortcuts that are never what the user means
+SKIP_WORDS = ("uninstall", "readme", "help", "license", "release notes", "documentation", "website")
+
+# Vendor prefixes dropped to form an alias ("Microsoft Word" -> "word")
+VENDOR_WORDS = ("microsoft", "google", "adobe", "mozilla", "apple", "jetbrains")
+
+def _key(text):
+    return " ".join(re.findall(r"[a-z0-9+#]+", text.lower()))
+
+def _aliases(name, target=""):
+    """Alternative spoken forms of an app name."""
+    key = _key(name)
+    aliases = {key}
+    words = key.split()
+    if words and words[0] in VENDOR_WORDS and len(words) > 1:
+        aliases.add(" ".join(words[1:]))
+    if len(words) > 1:
+        aliases.add("".join(w[0] for w in words))  # "visual studio code" -> "vsc"
+    # Version numbers: "Blender 4.1" -> "blender"
+    stripped = " ".join(w for w in words if not re.fullmatch(r"[0-9]+|x64|x86", w))
+    if stripped:
+        aliases.add(stripped)
+    stem = os.path.splitext(os.path.basename(target))[0].lower()
+    if stem and target.lower().endswith(".exe"):
+        aliases.add(stem)
+    aliases.discard("")
+    return sorted(aliases)
+
+# ===== Scanning =====
+
+def scan_shortcuts(dirs=None):
+    apps = []
+    for base in dirs or SHORTCUT_DIRS:
+        if not base or not os.path.isdir(base):
+            continue
+        for root, _, files in os.walk(base):
+            for file in files:
+                name, ext = os.path.splitext(file)
+                if ext.lower() not in (".lnk", ".url", ".exe", ".appref-ms"):
+                    continue
+                if any(word in name.lower() for word in SKIP_WORDS):
+                    continue
+                path = os.path.join(root, file)
+                apps.append({"name": name, "kind": "shortcut", "target": path})
+    return apps
+
+def scan_store_apps():
+    """Store/UWP apps via PowerShell Get-StartApps (Windows only)."""
+    try:
+        output = subprocess.run(
+            ["powershell", "-NoProfile", "-Command", "Get-StartApps | ConvertTo-Json -Compress"],
+            capture_output=True, text=True, timeout=30,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        ).stdout
+        entries = json.loads(output) if output.strip() else []
+    except Exception as e:
+        print(f"Could not list Store apps: {e}")
+        return []
+    if isinstance(entries, dict):
+        entries = [entries]
+    return [{"name": e["Name"], "kind": "store", "target": e["AppID"]}
+            for e in entries if e.get("Name") and e.get("AppID")]
+
+class AppIndex:
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.apps = {}      # key -> app entry
+        self.lookup = {}    # alias -> app key
+        self.scanned = 0.0
+        self.lock = threading.Lock()
+        self.refreshing = None
+        self.load()
+
+    # ----- Persistence -----
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.scanned = data.get("scanned", 0.0)
+                self._set_apps({app["key"]: app for app in data.get("apps", [])})
+        except Exception as e:
+            print(f"Error loading app index: {e}")
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self.lock:
+                data = {"scanned": self.scanned, "apps": list(self.apps.values())}
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"Error saving app index: {e}")
+
+    def _set_apps(self, apps):
+        lookup = {}
+        for key, app in apps.items():
+            for alias in app["aliases"]:
+                # Prefer the most used app when two share an alias
+                other = lookup.get(alias)
+                if other is None or apps[other].get("launches", 0) < app.get("launches", 0):
+                    lookup[alias] = key
+        for alias, target in BUILTIN_ALIASES.items():
+            if alias not in lookup and target in lookup:
+                lookup[alias] = lookup[target]
+        with self.lock:
+            self.apps, self.lookup = apps, lookup
+
+    # ----- Refresh -----
+
+    def rebuild(self):
+        """Rescans installed apps, keeping launch counts of known ones."""
+        found = scan_shortcuts() + scan_store_apps()
+        with self.lock:
+            old = dict(self.apps)
+        apps = {}
+        for entry in found:
+            key = _key(entry["name"])
+            if not key or key in apps:
+                continue
+            previous = old.get(key, {})
+            apps[key] = {
+                "key": key,
+                "name": entry["name"],
+                "kind": entry["kind"],
+                "target": entry["target"],
+                "aliases": _aliases(entry["name"], entry["target"]),
+                "launches": previous.get("launches", 0),
+                "last_used": previous.get("last_used", 0.0),
+            }
+        self.scanned = time.time()
+        self._set_apps(apps)
+        self.save()
+        return len(apps)
+
+    def is_stale(self):
+        return not self.apps or time.time() - self.scanned > REFRESH_AFTER
+
+    def refresh_in_background(self, force=False):
+        """Starts a rescan thread if the index is stale (or force)."""
+        if not (force or self.is_stale()):
+            return
+        if self.refreshing is not None and self.refreshing.is_alive():
+            return
+        self.refreshing = threading.Thread(target=self.rebuild, daemon=True, name="app-index")
+        self.refreshing.start()
+
+    # ----- Matching -----
+
+    def _usage_boost(self, app):
+        boost = 0.04 * math.log1p(app.get("launches", 0))
+        if time.time() - app.get("last_used", 0.0) < 7 * 24 * 3600:
+            boost += 0.02
+        return min(boost, 0.12)
+
+    def match(self, query, limit=3):
+        """Returns up to limit (score, app) pairs, best first."""
+        key = _key(query)
+        if not key:
+            return []
+        with self.lock:
+            apps, lookup = self.apps, self.lookup
+
+        exact = lookup.get(key)
+        if exact is not None:
+            return [(1.0, apps[exact])]
+
+        query_words = set(key.split())
+        scored = []
+        for app in apps.values():
+            best = 0.0
+            for alias in app["aliases"]:
+                if (len(key) >= 3 and alias.startswith(key)) or key.startswith(alias + " "):
+                    score = 0.9
+                elif query_words <= set(alias.split()):
+                    score = 0.85
+                else:
+                    matcher = difflib.SequenceMatcher(None, key, alias)
+                    if matcher.real_quick_ratio() < MIN_SCORE or matcher.quick_ratio() < MIN_SCORE:
+                        continue
+                    score = matcher.ratio()
+                best = max(best, score)
+            if best >= MIN_SCORE:
+                scored.append((best + self._usage_boost(app), app))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return scored[:limit]
+
+    def exact(self, query):
+        """The app with an alias equal to query, or None (no fuzzy matching)."""
+        key = _key(query)
+        with self.lock:
+            index = self.lookup.get(key) if key else None
+            return self.apps[index] if index is not None else None
+
+    def find(self, query):
+        matches = self.match(query, limit=1)
+        return matches[0][1] if matches else None
+
+    # ----- Launching -----
+
+    def launch(self, app):
+        if app["kind"] == "store":
+            subprocess.Popen(["explorer.exe", f"shell:AppsFolder\\{app['target']}"])
+        else:
+            os.startfile(app["target"])
+        with self.lock:
+            app["launches"] = app.get("launches", 0) + 1
+            app["last_used"] = time.time()
+        self.save()
+
+APP_INDEX = AppIndex()
+
+def find_app(query):
+    """Best matching installed app entry, or None."""
+    APP_INDEX.refresh_in_background()
+    return APP_INDEX.find(query)
+
+def launch_app(query):
+    """Launches the best match for query. Returns the app name, or None if unknown."""
+    app = find_app(query)
+    if app is None:
+        return None
+    APP_INDEX.launch(app)
+    return app["name"]
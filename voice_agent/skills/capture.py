@@ -0,0 +1,172 @@
+"""
+Screen capture pipeline behind the screenshot tools.
+
+Frames are grabbed with mss when it is installed (a direct screen copy,
+several times faster than pyautogui) and with PIL.ImageGrab otherwise.
+Encoding and writing the file run on a background worker, so the caller
+returns as soon as the frame is grabbed. A capture identical to the
+previous one (same dHash and pixel checksum, taken seconds apart) is not
+saved again.
+
+The file format comes from SCREENSHOT_FORMAT in .env: png (fast
+compression, the default), webp or jpeg.
+"""
+
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from core.workers import WORKERS
+
+# extension, PIL save options
+FORMATS = {
+    "png": ("png", {"format": "PNG", "compress_level": 1}),
+    "webp": ("webp", {"format": "WEBP", "quality": 80, "method": 0}),
+    "jpeg": ("jpg", {"format": "JPEG", "quality": 85}),
+}
+EXTENSIONS = {"png": "png", "webp": "webp", "jpg": "jpeg", "jpeg": "jpeg"}
+
+# A capture is only skipped as a duplicate if it is pixel-identical to the
+# previous one (same dHash, then same checksum) and was taken within this
+# many seconds of it
+DEDUP_WINDOW = 10.0
+
+# ===== Backends =====
+
+class MssBackend:
+    name = "mss"
+
+    def __init__(self):
+        # mss handles are bound to the thread that created them
+        self.local = threading.local()
+
+    def grab(self, region=None):
+        import mss
+        from PIL import Image
+        sct = getattr(self.local, "sct", None)
+        if sct is None:
+            sct = self.local.sct = mss.mss()
+        if region:
+            x, y, width, height = region
+            monitor = {"left": x, "top": y, "width": width, "height": height}
+        else:
+            monitor = sct.monitors[1]  # primary screen
+        shot = sct.grab(monitor)
+        return Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+class PILBackend:
+    name = "pil"
+
+    def grab(self, region=None):
+        from PIL import ImageGrab
+        bbox = None
+        if region:
+            x, y, width, height = region
+            bbox = (x, y, x + width, y + height)
+        return ImageGrab.grab(bbox=bbox).convert("RGB")
+
+_BACKEND = None
+
+def get_backend():
+    """mss if installed, PIL.ImageGrab otherwise (chosen once)."""
+    global _BACKEND
+    if _BACKEND is None:
+        try:
+            import mss  # noqa: F401
+            _BACKEND = MssBackend()
+        except ImportError:
+            _BACKEND = PILBackend()
+    return _BACKEND
+
+# ===== Hashing =====
+
+def dhash(image, size=8):
+    """64-bit difference hash: brightness gradients of a 9x8 thumbnail."""
+    from PIL import Image
+    # reduce() is a cheap box filter that does most of the shrinking
+    factor = max(1, min(image.width // (size * 8), image.height // (size * 8)))
+    small = image.reduce(factor) if factor > 1 else image
+    small = small.convert("L").resize((size + 1, size), Image.BILINEAR)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+def checksum(image):
+    """CRC32 of the raw pixels - exact, a few ms for a full screen."""
+    return zlib.crc32(image.tobytes())
+
+# ===== Encoding =====
+
+def get_format(name=None):
+    name = (name or os.getenv("SCREENSHOT_FORMAT", "png")).lower()
+    return EXTENSIONS.get(name, "png")
+
+def encode_image(image, target, fmt="png"):
+    """Saves image to a path or file object in one of FORMATS."""
+    _, options = FORMATS[fmt]
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.save(target, **options)
+    return target
+
+# ===== Capture =====
+
+_LAST = {"hash": None, "checksum": None, "size": None, "time": 0.0, "path": None, "region": None, "job": None}
+_LAST_LOCK = threading.Lock()
+
+def new_screenshot_path(folder, fmt):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+    return os.path.join(folder, f"screenshot_{timestamp}.{FORMATS[fmt][0]}")
+
+def _still_saved(last):
+    """The previous capture is on disk (or still being written)."""
+    job = last["job"]
+    if job is not None and not job.done():
+        return True
+    return os.path.exists(last["path"])
+
+def capture(folder, region=None, save_path=None, fmt=None, dedup=True, on_saved=None):
+    """
+    Grabs the screen and queues it for encoding.
+    Returns (path, job, duplicate): job is the encode ToolJob (None for a
+    duplicate), duplicate is True when the screen matched the previous
+    capture and path is that earlier file.
+    on_saved(path, size, image_hash) runs on the worker once the file is written.
+    """
+    image = get_backend().grab(region)
+    image_hash = dhash(image)
+    image_checksum = checksum(image)
+    now = time.monotonic()
+
+    if save_path is None:
+        fmt = get_format(fmt)
+        with _LAST_LOCK:
+            last = dict(_LAST)
+        if (dedup and last["hash"] == image_hash and last["region"] == region
+                and last["size"] == image.size and last["checksum"] == image_checksum
+                and now - last["time"] <= DEDUP_WINDOW
+                and _still_saved(last)):
+            return last["path"], None, True
+        save_path = new_screenshot_path(folder, fmt)
+    else:
+        fmt = get_format(fmt or os.path.splitext(save_path)[1].lstrip("."))
+
+    job = WORKERS.submit("screenshot_encode", encode_image, image, save_path, fmt)
+    def saved(future, path=save_path, size=image.size):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            print(f"Error saving screenshot {path}: {future.exception()}")
+        elif on_saved is not None:
+            on_saved(path, size, image_hash)
+    job.future.add_done_callback(saved)
+    with _LAST_LOCK:
+        _LAST.update(hash=image_hash, checksum=image_checksum, size=image.size, time=now,
+                     path=save_path, region=region, job=job)
+    return save_path, job, False
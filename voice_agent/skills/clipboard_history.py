@@ -0,0 +1,261 @@
+"""
+Clipboard history.
+
+A background watcher records every text copied to the clipboard into a
+bounded ring (newest first, duplicates moved to the front, size caps per
+entry and in total), so the user can ask for "the third thing I copied"
+or search what they copied earlier. On Windows the watcher polls the
+clipboard sequence number, a counter that costs nothing to read, and only
+opens the clipboard when it changes; elsewhere it polls the text itself,
+backing off while nothing changes.
+
+History is kept in memory only - clipboards often hold passwords.
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+MAX_ENTRIES = 50
+MAX_ENTRY_CHARS = 100_000     # larger copies are not recorded
+MAX_TOTAL_CHARS = 1_000_000
+
+# Sequence number polling (Windows)
+SEQUENCE_INTERVAL = 0.25
+# Text polling (other platforms): starts fast, slows down while idle
+MIN_INTERVAL = 0.5
+MAX_INTERVAL = 4.0
+
+SPEAK_LIMIT = 300             # longer text is summarized before speaking
+
+def _sequence_reader():
+    """GetClipboardSequenceNumber on Windows, else None."""
+    if sys.platform != "win32":
+        return None
+    try:
+        import ctypes
+        return ctypes.windll.user32.GetClipboardSequenceNumber
+    except Exception:
+        return None
+
+def _read_text():
+    import pyperclip
+    return pyperclip.paste()
+
+class ClipboardHistory:
+    def __init__(self, max_entries=MAX_ENTRIES, max_total_chars=MAX_TOTAL_CHARS):
+        self.max_entries = max_entries
+        self.max_total_chars = max_total_chars
+        self.entries = OrderedDict()   # text -> copied time, newest last
+        self.total_chars = 0
+        self.lock = threading.Lock()
+        self.paused = 0
+        self.ignored = None   # text we left on the clipboard ourselves
+        self.thread = None
+        self.read_text = _read_text
+        self.sequence = _sequence_reader()
+
+    # ----- Ring -----
+
+    def record(self, text, when=None):
+        """Adds text as the newest entry. Returns False if it was not recorded."""
+        if not text or not text.strip() or len(text) > MAX_ENTRY_CHARS:
+            return False
+        with self.lock:
+            if text in self.entries:
+                self.entries.move_to_end(text)
+                self.entries[text] = when or time.time()
+                return True
+            self.entries[text] = when or time.time()
+            self.total_chars += len(text)
+            while self.entries and (len(self.entries) > self.max_entries
+                                    or self.total_chars > self.max_total_chars):
+                oldest, _ = self.entries.popitem(last=False)
+                self.total_chars -= len(oldest)
+        return True
+
+    def recent(self, limit=None):
+        """[(text, copied time)] newest first."""
+        with self.lock:
+            items = list(reversed(self.entries.items()))
+        return items[:limit] if limit else items
+
+    def get(self, position):
+        """Entry at position (1 = most recently copied), or None."""
+        if position < 1:
+            return None
+        with self.lock:
+            if position > len(self.entries):
+                return None
+            for i, text in enumerate(reversed(self.entries)):
+                if i == position - 1:
+                    return text
+
+    def search(self, query, limit=5):
+        """[(position, text)] of entries containing every query word, newest first."""
+        words = query.lower().split()
+        matches = []
+        for position, (text, _) in enumerate(self.recent(), 1):
+            lower = text.lower()
+            if all(word in lower for word in words):
+                matches.append((position, text))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_chars = 0
+
+    # ----- Watcher -----
+
+    @contextmanager
+    def pause(self):
+        """Ignores clipboard changes made inside the block (our own pastes)."""
+        with self.lock:
+            self.paused += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.paused -= 1
+
+    def ignore(self, text):
+        """Never records text while it stays on the clipboard (a paste we left there)."""
+        self.ignored = text
+
+    def _seen(self, text):
+        if text == self.ignored:
+            return
+        self.ignored = None
+        self.record(text)
+
+    def watch(self):
+        if self.sequence is not None:
+            self._watch_sequence()
+        else:
+            self._watch_text()
+
+    def _watch_sequence(self):
+        last = self.sequence()
+        while True:
+            time.sleep(SEQUENCE_INTERVAL)
+            current = self.sequence()
+            if current == last:
+                continue
+            last = current
+            if self.paused:
+                continue
+            try:
+                self._seen(self.read_text())
+            except Exception:
+                pass  # clipboard busy or holding non-text data
+
+    def _watch_text(self):
+        interval = MIN_INTERVAL
+        try:
+            last = self.read_text()
+        except Exception as e:
+            print(f"Clipboard history unavailable: {e}")
+            return
+        while True:
+            time.sleep(interval)
+            try:
+                current = self.read_text()
+            except Exception:
+                interval = MAX_INTERVAL
+                continue
+            if current == last:
+                interval = min(interval * 2, MAX_INTERVAL)
+                continue
+            last = current
+            interval = MIN_INTERVAL
+            if not self.paused:
+                self._seen(current)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.watch, daemon=True, name="clipboard-history")
+            self.thread.start()
+
+CLIPBOARD_HISTORY = ClipboardHistory()
+
+def start_clipboard_watcher():
+    """Starts recording clipboard history in the background."""
+    CLIPBOARD_HISTORY.start()
+
+# ===== Speech =====
+
+def _preview(text, width=60):
+    flat = " ".join(text.split())
+    return flat if len(flat) <= width else flat[:width - 3] + "..."
+
+def summarize_text(text, limit=SPEAK_LIMIT):
+    """
+    Short spoken version of long text: its size and opening sentence(s).
+    Text up to limit characters is returned unchanged.
+    """
+    if len(text) <= limit:
+        return text
+    flat = " ".join(text.split())
+    lines = text.count("\n") + 1
+    sentences = re.split(r"(?<=[.!?])\s+", flat)
+    opening = ""
+    for sentence in sentences:
+        if len(opening) + len(sentence) > limit // 2:
+            break
+        opening += sentence + " "
+    opening = opening.strip() or flat[:limit // 2] + "..."
+    return f"That's {len(text):,} characters over {lines} lines. It starts: {opening}"
+
+# ===== Tools =====
+
+def clipboard_history(query=None, limit=5):
+    """
+    Lists recently copied text, or the copies that contain query.
+    Returns a numbered list (1 = most recent).
+    """
+    if query:
+        matches = CLIPBOARD_HISTORY.search(query, limit)
+        if not matches:
+            return f"Nothing you copied mentions '{query}'."
+        result = f"📋 Copied text mentioning '{query}':\n"
+        for position, text in matches:
+            result += f"{position}. {_preview(text)}\n"
+        return result
+
+    items = CLIPBOARD_HISTORY.recent(limit)
+    if not items:
+        return "Clipboard history is empty."
+    result = f"📋 Last {len(items)} copied items:\n"
+    for position, (text, _) in enumerate(items, 1):
+        result += f"{position}. {_preview(text)}\n"
+    return result
+
+def paste_from_history(position):
+    """
+    Pastes the position-th most recently copied text into the active window,
+    leaving the current clipboard and the history order unchanged.
+    """
+    try:
+        position = int(position)
+    except (TypeError, ValueError):
+        return f"Error: '{position}' is not a position in the clipboard history."
+    text = CLIPBOARD_HISTORY.get(position)
+    if text is None:
+        return f"I only have {len(CLIPBOARD_HISTORY.entries)} items in the clipboard history."
+    try:
+        from skills.ui_driver import DesktopUIDriver
+        with CLIPBOARD_HISTORY.pause():
+            if not DesktopUIDriver().paste(text):
+                # The text stays on the clipboard; the watcher may only see it
+                # after the pause, and it must not jump to the top of the history
+                CLIPBOARD_HISTORY.ignore(text)
+            time.sleep(SEQUENCE_INTERVAL)  # let the watcher see our changes while paused
+        return f"Pasted: {_preview(text)}"
+    except Exception as e:
+        return f"Error pasting from clipboard history: {e}"
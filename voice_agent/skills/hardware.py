@@ -1,17 +1,24 @@
 import psutil
-import pyautogui
 import ctypes
 import os
 
+from core.metrics import get_sampler
+from skills.hardware_backends import get_backend, HardwareUnavailable
+
+VOLUME_STEP = 10      # percent per "up"/"down"
+BRIGHTNESS_STEP = 10
+
 def get_battery_status():
     """Returns a string describing battery status with time remaining."""
     try:
-        battery = psutil.sensors_battery()
+        sampler = get_sampler()
+        sampler.wait_ready()
+        battery = sampler.latest_value("battery")
         if not battery:
             return "Battery information not available."
         
-        percent = battery.percent
-        charging = battery.power_plugged
+        percent, charging = battery
+        secsleft = sampler.latest_value("battery_secsleft")
         
         # Build status message
         if charging:
@@ -19,9 +26,9 @@ def get_battery_status():
         else:
             status = f"Battery is at {percent}%."
             # Add time remaining if available
-            if battery.secsleft != psutil.POWER_TIME_UNLIMITED and battery.secsleft != psutil.POWER_TIME_UNKNOWN:
-                hours = battery.secsleft // 3600
-                minutes = (battery.secsleft % 3600) // 60
+            if secsleft is not None and secsleft not in (psutil.POWER_TIME_UNLIMITED, psutil.POWER_TIME_UNKNOWN):
+                hours = secsleft // 3600
+                minutes = (secsleft % 3600) // 60
                 if hours > 0:
                     status += f" Approximately {hours} hours and {minutes} minutes remaining."
                 else:
@@ -31,73 +38,140 @@ def get_battery_status():
     except Exception as e:
         return f"Could not read battery: {e}"
 
-def adjust_volume(action):
+def _parse_level(value):
+    """An int percentage from 50, "50" or "50%", else None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().rstrip("%").strip()
+    return int(text) if text.isdigit() else None
+
+def adjust_volume(action, step=VOLUME_STEP):
     """
     Adjusts system volume.
-    action: 'up', 'down', 'mute'
+    action: 'up', 'down', 'mute', 'unmute', or a percentage (0-100)
     """
     try:
-        if action == "up":
-            # Press Volume Up multiple times for noticeable change
-            for _ in range(5):
-                pyautogui.press("volumeup")
-            return "Volume increased."
-        elif action == "down":
-            for _ in range(5):
-                pyautogui.press("volumedown")
-            return "Volume decreased."
+        volume = get_backend("volume")
+        level = _parse_level(action)
+        action = str(action).lower().strip()
+        
+        if level is not None:
+            if not 0 <= level <= 100:
+                return "Volume must be between 0 and 100."
+            volume.set(level)
+            return f"Volume set to {level}%."
+        elif action in ("up", "down"):
+            delta = step if action == "up" else -step
+            current = volume.get()
+            if current is None:
+                # Key presses: the level itself is unknown
+                volume.step(delta)
+                return "Volume increased." if delta > 0 else "Volume decreased."
+            new_level = max(0, min(100, current + delta))
+            volume.set(new_level)
+            return f"Volume {'increased' if delta > 0 else 'decreased'} to {new_level}%."
         elif action == "mute":
-            pyautogui.press("volumemute")
-            return "Volume toggled mute."
-        return "Unknown volume command."
+            muted = volume.is_muted()
+            volume.set_mute(True if muted is None else not muted)
+            if muted is None:
+                return "Volume toggled mute."
+            return "Volume unmuted." if muted else "Volume muted."
+        elif action == "unmute":
+            volume.set_mute(False)
+            return "Volume unmuted."
+        return "Unknown volume command. Use 'up', 'down', 'mute', or a number 0-100."
+    except HardwareUnavailable as e:
+        return str(e)
     except Exception as e:
         return f"Error adjusting volume: {e}"
 
-def adjust_brightness(action):
+def adjust_brightness(action, step=BRIGHTNESS_STEP):
     """
     Adjusts screen brightness.
     action: 'up', 'down', or an integer percentage (0-100)
     """
     try:
-        import wmi
-        c = wmi.WMI(namespace='wmi')
-        methods = c.WmiMonitorBrightnessMethods()[0]
-        
-        # Get current brightness
-        brightness_info = c.WmiMonitorBrightness()[0]
-        current = brightness_info.CurrentBrightness
+        brightness = get_backend("brightness")
+        level = _parse_level(action)
+        action = str(action).lower().strip()
         
-        if action == "up":
-            new_brightness = min(current + 10, 100)
-            methods.WmiSetBrightness(new_brightness, 0)
-            return f"Brightness increased to {new_brightness}%."
-        elif action == "down":
-            new_brightness = max(current - 10, 0)
-            methods.WmiSetBrightness(new_brightness, 0)
+        if level is not None:
+            if not 0 <= level <= 100:
+                return "Brightness must be between 0 and 100."
+            brightness.set(level)
+            return f"Brightness set to {level}%."
+        elif action in ("up", "down"):
+            current = brightness.get()
+            if action == "up":
+                new_brightness = min(current + step, 100)
+                brightness.set(new_brightness)
+                return f"Brightness increased to {new_brightness}%."
+            new_brightness = max(current - step, 0)
+            brightness.set(new_brightness)
             return f"Brightness decreased to {new_brightness}%."
-        elif isinstance(action, int) and 0 <= action <= 100:
-            methods.WmiSetBrightness(action, 0)
-            return f"Brightness set to {action}%."
         else:
             return "Unknown brightness command. Use 'up', 'down', or a number 0-100."
-    except ImportError:
-        return "WMI module not installed. Run: pip install WMI"
+    except HardwareUnavailable as e:
+        if "wmi" in e.missing_modules:
+            return "WMI module not installed. Run: pip install WMI"
+        return str(e)
     except Exception as e:
         return f"Could not adjust brightness: {e}"
 
 def get_system_info():
-    """Returns CPU and RAM usage information."""
+    """Returns CPU and RAM usage information (from the background sampler)."""
     try:
-        cpu_percent = psutil.cpu_percent(interval=0.5)
-        ram = psutil.virtual_memory()
-        ram_percent = ram.percent
-        ram_used_gb = ram.used / (1024**3)
-        ram_total_gb = ram.total / (1024**3)
+        sampler = get_sampler()
+        sampler.wait_ready()
+        latest = sampler.snapshot()
+        cpu_percent = latest["cpu"]
+        ram_percent = latest["ram"]
+        ram_used_gb = latest["ram_used"] / (1024**3)
+        ram_total_gb = latest["ram_total"] / (1024**3)
         
         return f"CPU usage is at {cpu_percent}%. RAM usage is {ram_percent}%, using {ram_used_gb:.1f} GB of {ram_total_gb:.1f} GB."
     except Exception as e:
         return f"Could not get system info: {e}"
 
+def _rate(bytes_per_second):
+    for unit in ("B", "KB", "MB", "GB"):
+        if bytes_per_second < 1024 or unit == "GB":
+            return f"{bytes_per_second:.0f} {unit}/s" if unit == "B" else f"{bytes_per_second:.1f} {unit}/s"
+        bytes_per_second /= 1024
+
+def get_system_trends(minutes=1):
+    """
+    Summarizes CPU, RAM, disk and network over the last few minutes
+    (up to an hour) from the sampler's rolling history.
+    """
+    try:
+        minutes = max(1, min(60, int(minutes)))
+    except (TypeError, ValueError):
+        minutes = 1
+    try:
+        sampler = get_sampler()
+        sampler.wait_ready()
+        seconds = minutes * 60
+        span = "minute" if minutes == 1 else f"{minutes} minutes"
+        parts = []
+        for name, label in (("cpu", "CPU"), ("ram", "RAM")):
+            stats = sampler.stats(name, seconds)
+            if stats:
+                low, avg, high = stats
+                parts.append(f"{label} averaged {avg:.0f}% (between {low:.0f}% and {high:.0f}%)")
+        for name, label in (("disk_read", "disk reads"), ("disk_write", "disk writes"),
+                            ("net_down", "downloads"), ("net_up", "uploads")):
+            stats = sampler.stats(name, seconds)
+            if stats and stats[2] >= 1024 * 1024:  # only mention real activity
+                parts.append(f"{label} peaked at {_rate(stats[2])}")
+        if not parts:
+            return "I don't have usage history yet."
+        return f"Over the last {span}: " + "; ".join(parts) + "."
+    except Exception as e:
+        return f"Could not get system trends: {e}"
+
 def set_wallpaper(path=None):
     """
     Sets the desktop wallpaper.
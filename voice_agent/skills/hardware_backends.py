@@ -0,0 +1,199 @@
+"""
+Volume and brightness backends used by skills/hardware.py.
+
+Each backend exposes get() -> 0-100 (or None if unknown) and set(level),
+volume backends also set_mute(muted). Device handles (the Core Audio
+endpoint, the WMI connection) are opened once per thread and reused, so
+a volume or brightness command is a single API call.
+
+    volume:     pycaw (Core Audio)  -> media keys via pyautogui
+    brightness: WMI                 -> unavailable
+
+Set NEXUS_HARDWARE=mock to use in-memory backends (Linux, tests, benchmarks).
+"""
+
+import os
+import threading
+
+KEY_STEP = 2  # percent per volume key press on Windows
+
+class HardwareUnavailable(Exception):
+    """
+    No backend can control this device on this machine. missing_modules
+    names the backends' Python packages that are not installed.
+    """
+
+    def __init__(self, message, missing_modules=()):
+        super().__init__(message)
+        self.missing_modules = tuple(missing_modules)
+
+def _clamp(level):
+    return max(0, min(100, int(round(level))))
+
+def _reconnect_on_error(method):
+    """Drops the thread's cached handle when a call fails (device changed)."""
+    def wrapper(self, *args):
+        try:
+            return method(self, *args)
+        except Exception:
+            self.local.__dict__.clear()
+            raise
+    return wrapper
+
+# ===== Volume =====
+
+class PycawVolume:
+    name = "pycaw"
+
+    def __init__(self):
+        import pycaw.pycaw  # noqa: F401 - fail early if missing
+        self.local = threading.local()
+
+    def _endpoint(self):
+        endpoint = getattr(self.local, "endpoint", None)
+        if endpoint is None:
+            import comtypes
+            from comtypes import CLSCTX_ALL
+            from ctypes import POINTER, cast
+            from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+            # COM objects belong to the thread (apartment) that created them
+            comtypes.CoInitialize()
+            speakers = AudioUtilities.GetSpeakers()
+            endpoint = getattr(speakers, "EndpointVolume", None)
+            if endpoint is None:
+                interface = speakers.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+                endpoint = cast(interface, POINTER(IAudioEndpointVolume))
+            self.local.endpoint = endpoint
+        return endpoint
+
+    @_reconnect_on_error
+    def get(self):
+        return _clamp(self._endpoint().GetMasterVolumeLevelScalar() * 100)
+
+    @_reconnect_on_error
+    def set(self, level):
+        self._endpoint().SetMasterVolumeLevelScalar(_clamp(level) / 100, None)
+
+    @_reconnect_on_error
+    def is_muted(self):
+        return bool(self._endpoint().GetMute())
+
+    @_reconnect_on_error
+    def set_mute(self, muted):
+        self._endpoint().SetMute(int(muted), None)
+
+class KeyVolume:
+    """Media keys: relative steps only, the current level is unknown."""
+    name = "keys"
+
+    def __init__(self):
+        import pyautogui  # noqa: F401
+
+    def get(self):
+        return None
+
+    def set(self, level):
+        import pyautogui
+        # Bottom out, then step up: one press() call per direction
+        pyautogui.press("volumedown", presses=100 // KEY_STEP)
+        pyautogui.press("volumeup", presses=_clamp(level) // KEY_STEP)
+
+    def step(self, delta):
+        import pyautogui
+        key = "volumeup" if delta > 0 else "volumedown"
+        pyautogui.press(key, presses=max(1, abs(delta) // KEY_STEP))
+
+    def is_muted(self):
+        return None
+
+    def set_mute(self, muted):
+        import pyautogui
+        pyautogui.press("volumemute")  # a toggle; the real state is unknown
+
+# ===== Brightness =====
+
+class WmiBrightness:
+    name = "wmi"
+
+    def __init__(self):
+        import wmi  # noqa: F401
+        self.local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            import wmi
+            connection = wmi.WMI(namespace='wmi')
+            methods = connection.WmiMonitorBrightnessMethods()
+            if not methods:
+                raise HardwareUnavailable("This display does not support brightness control.")
+            self.local.connection = connection
+            self.local.methods = methods[0]
+        return connection
+
+    @_reconnect_on_error
+    def get(self):
+        return int(self._connection().WmiMonitorBrightness()[0].CurrentBrightness)
+
+    @_reconnect_on_error
+    def set(self, level):
+        self._connection()
+        self.local.methods.WmiSetBrightness(_clamp(level), 0)
+
+# ===== Mock =====
+
+class MockBackend:
+    """In-memory device; every call is recorded in self.calls."""
+    name = "mock"
+
+    def __init__(self, level=50):
+        self.level = level
+        self.muted = False
+        self.calls = []
+
+    def get(self):
+        self.calls.append(("get",))
+        return self.level
+
+    def set(self, level):
+        self.calls.append(("set", level))
+        self.level = _clamp(level)
+
+    def is_muted(self):
+        return self.muted
+
+    def set_mute(self, muted):
+        self.calls.append(("set_mute", muted))
+        self.muted = muted
+
+# ===== Selection =====
+
+_BACKENDS = {}
+_LOCK = threading.Lock()
+
+def _create(kind):
+    if os.getenv("NEXUS_HARDWARE") == "mock":
+        return MockBackend()
+    candidates = {"volume": (PycawVolume, KeyVolume), "brightness": (WmiBrightness,)}[kind]
+    errors, missing = [], []
+    for backend in candidates:
+        try:
+            return backend()
+        except ImportError as e:
+            missing.append(e.name or backend.name)
+            errors.append(f"{backend.name}: {e}")
+        except Exception as e:
+            errors.append(f"{backend.name}: {e}")
+    raise HardwareUnavailable(f"No {kind} control available ({'; '.join(errors)})", missing)
+
+def get_backend(kind):
+    """The cached backend for 'volume' or 'brightness'."""
+    with _LOCK:
+        if kind not in _BACKENDS:
+            _BACKENDS[kind] = _create(kind)
+        return _BACKENDS[kind]
+
+def use_backend(kind, backend):
+    """Replaces a backend (tests, benchmarks)."""
+    with _LOCK:
+        _BACKENDS[kind] = backend
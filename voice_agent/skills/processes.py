@@ -0,0 +1,501 @@
+"""
+Process manager used by close_application and top_processes.
+
+Resolves an app name to running processes from a cached psutil snapshot,
+adds their child process trees, and closes them gracefully (terminate,
+wait, then kill whatever is left) - without spawning taskkill or a shell.
+A background monitor keeps per-process CPU/memory usage for reporting.
+
+Try it with dummy processes (any OS):
+    python -m skills.processes --demo
+    python -m skills.processes --top
+"""
+
+import os
+import threading
+import time
+
+from skills.app_index import APP_INDEX, VENDOR_WORDS
+
+SNAPSHOT_TTL = 2.0      # seconds a process snapshot is reused
+TERMINATE_TIMEOUT = 3.0 # grace period before force-killing
+
+USAGE_INTERVAL = 5.0    # seconds between per-process usage samples
+USAGE_WINDOW = 300      # seconds of per-process history kept
+
+# Spoken app names whose executable is named differently
+EXE_ALIASES = {
+    "word": "winword",
+    "microsoft word": "winword",
+    "powerpoint": "powerpnt",
+    "edge": "msedge",
+    "microsoft edge": "msedge",
+    "vs code": "code",
+    "vscode": "code",
+    "visual studio code": "code",
+    "file explorer": "explorer",
+    "task manager": "taskmgr",
+    "command prompt": "cmd",
+    "terminal": "windowsterminal",
+    "windows terminal": "windowsterminal",
+    "whatsapp": "whatsapp",
+}
+
+# Never closed, whatever the user asks for
+PROTECTED_NAMES = {
+    "system", "systemidleprocess", "registry", "smss", "csrss", "wininit",
+    "winlogon", "services", "lsass", "svchost", "dwm", "fontdrvhost",
+    "systemd", "init", "kthreadd",
+    "explorer",  # the Windows shell: taskbar, desktop and every folder window
+}
+
+# Pseudo-processes that only report idle time
+IDLE_NAMES = {"systemidleprocess", "idle"}
+
+# Closable, but never suggested by top_processes (antivirus, search, ...)
+NEVER_SUGGESTED = {
+    "msmpeng", "nissrv", "securityhealthservice", "audiodg",
+    "searchhost", "searchindexer", "shellexperiencehost", "startmenuexperiencehost",
+}
+
+# top_processes only offers to close an app using at least this much
+SUGGEST_MIN_CPU = 20.0           # percent of the whole machine
+SUGGEST_MIN_RSS = 1024 ** 3      # bytes
+
+def _stem(name):
+    """'Chrome.exe' / 'Google Chrome' -> 'chrome' / 'googlechrome'."""
+    name = (name or "").lower()
+    if name.endswith(".exe"):
+        name = name[:-4]
+    return "".join(ch for ch in name if ch.isalnum() or ch in "+#")
+
+class ProcessTable:
+    def __init__(self, ttl=SNAPSHOT_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.taken = 0.0
+        self.procs = []   # psutil.Process objects with .info prefetched
+
+    def snapshot(self, refresh=False):
+        """Running processes, rescanned at most every ttl seconds."""
+        import psutil
+        with self.lock:
+            if refresh or time.monotonic() - self.taken > self.ttl:
+                self.procs = list(psutil.process_iter(["pid", "ppid", "name", "exe"]))
+                self.taken = time.monotonic()
+            return self.procs
+
+    def update(self, procs):
+        """Adopts a fresh process_iter() listing taken elsewhere."""
+        with self.lock:
+            self.procs = procs
+            self.taken = time.monotonic()
+
+    def invalidate(self):
+        with self.lock:
+            self.taken = 0.0
+
+    def _protected_pids(self):
+        """This process and its ancestors (closing those would kill us)."""
+        import psutil
+        pids = {os.getpid()}
+        try:
+            pids.update(p.pid for p in psutil.Process().parents())
+        except Exception:
+            pass
+        return pids
+
+    def _candidates(self):
+        """[(proc, {executable stems})] of the processes that may be closed."""
+        protected = self._protected_pids()
+        candidates = []
+        for proc in self.snapshot():
+            info = proc.info
+            if info["pid"] in protected or _stem(info["name"]) in PROTECTED_NAMES:
+                continue
+            names = {_stem(info["name"]), _stem(os.path.basename(info["exe"] or ""))}
+            names.discard("")
+            candidates.append((proc, names))
+        return candidates
+
+    def find(self, app_name):
+        """
+        Processes whose executable matches app_name (children not included).
+
+        Tried in order until something matches: the executable name itself
+        (or an EXE_ALIASES entry), the aliases of the installed app whose
+        name is exactly app_name ("google chrome" -> "chrome"), the single words of
+        the name, and finally executables whose name starts with one of them.
+        """
+        spoken = app_name.lower().strip()
+        target = _stem(EXE_ALIASES.get(spoken, app_name))
+        if not target or target in PROTECTED_NAMES:
+            return []
+        candidates = self._candidates()
+
+        def exact(targets):
+            return [proc for proc, names in candidates if names & targets]
+
+        matches = exact({target})
+        if matches:
+            return matches
+        targets = self._display_name_targets(app_name)
+        # Vendor words would match unrelated apps ("microsoft teams" -> microsoftedge)
+        targets.update(_stem(word) for word in spoken.split()
+                       if len(_stem(word)) >= 3 and word not in VENDOR_WORDS)
+        targets.discard("")
+        matches = exact(targets)
+        if matches:
+            return matches
+        # "close photoshop" -> photoshop_cc.exe
+        prefixes = {t for t in targets | {target} if len(t) >= 4}
+        return [proc for proc, names in candidates
+                if any(name.startswith(prefix) for name in names for prefix in prefixes)]
+
+    def _display_name_targets(self, app_name):
+        """Executable stems suggested by the app index entry for a display name."""
+        try:
+            # Only an exact name: a fuzzy match could close an unrelated app
+            app = APP_INDEX.exact(app_name)
+        except Exception as e:
+            print(f"App index lookup failed for {app_name}: {e}")
+            return set()
+        if app is None:
+            return set()
+        targets = {_stem(alias) for alias in app.get("aliases", []) if len(_stem(alias)) >= 3}
+        if app.get("target", "").lower().endswith(".exe"):
+            targets.add(_stem(os.path.basename(app["target"])))
+        return targets
+
+    def own_tree(self):
+        """PIDs of this process, its ancestors and all its descendants."""
+        children = {}
+        for proc in self.snapshot():
+            children.setdefault(proc.info["ppid"], []).append(proc.info["pid"])
+        pids = self._protected_pids()
+        stack = [os.getpid()]
+        while stack:
+            for child in children.get(stack.pop(), []):
+                if child not in pids:
+                    pids.add(child)
+                    stack.append(child)
+        return pids
+
+    def with_children(self, procs):
+        """procs plus all their descendants, children listed before parents."""
+        children = {}
+        for proc in self.snapshot():
+            children.setdefault(proc.info["ppid"], []).append(proc)
+        protected = self._protected_pids()
+        ordered, seen = [], set()
+
+        def visit(proc):
+            if proc.pid in seen or proc.pid in protected:
+                return
+            if _stem(proc.info["name"]) in PROTECTED_NAMES:
+                return  # e.g. an explorer.exe an app happened to start
+            seen.add(proc.pid)
+            for child in children.get(proc.pid, []):
+                visit(child)
+            ordered.append(proc)
+
+        for proc in procs:
+            visit(proc)
+        return ordered
+
+def _label(proc):
+    name = getattr(proc, "info", {}).get("name")
+    if name is None:
+        try:
+            name = proc.name()
+        except Exception:
+            name = "?"
+    return f"{name} ({proc.pid})"
+
+def _exited(proc):
+    import psutil
+    try:
+        # Zombies have exited; only their (possibly unrelated) parent can reap them
+        return not proc.is_running() or proc.status() == psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return True
+
+def _wait_exited(procs, timeout, interval=0.05):
+    """Splits procs into (exited, alive) once all exit or timeout passes."""
+    deadline = time.monotonic() + timeout
+    alive = list(procs)
+    while True:
+        alive = [p for p in alive if not _exited(p)]
+        if not alive or time.monotonic() >= deadline:
+            break
+        time.sleep(interval)
+    return [p for p in procs if p not in alive], alive
+
+def terminate_processes(procs, timeout=TERMINATE_TIMEOUT):
+    """
+    Terminates procs, waits up to timeout, then kills the survivors.
+    Returns {"closed": [...], "killed": [...], "failed": [...]} with
+    "name (pid)" entries.
+    """
+    import psutil
+    labels = {proc.pid: _label(proc) for proc in procs}
+    result = {"closed": [], "killed": [], "failed": []}
+    signalled = []
+    for proc in procs:
+        try:
+            proc.terminate()
+            signalled.append(proc)
+        except psutil.NoSuchProcess:
+            continue
+        except Exception as e:
+            result["failed"].append(f"{labels[proc.pid]}: {e}")
+
+    gone, alive = _wait_exited(signalled, timeout)
+    result["closed"].extend(labels[p.pid] for p in gone)
+
+    for proc in alive:
+        try:
+            proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+        except Exception as e:
+            result["failed"].append(f"{labels[proc.pid]}: {e}")
+    gone, alive = _wait_exited(alive, timeout=1)
+    result["killed"].extend(labels[p.pid] for p in gone)
+    result["failed"].extend(f"{labels[p.pid]}: still running" for p in alive)
+    return result
+
+PROCESSES = ProcessTable()
+
+def close_processes(app_name, timeout=TERMINATE_TIMEOUT):
+    """
+    Closes every process of app_name together with its child processes.
+    Returns the terminate_processes() result; all lists are empty if no
+    process matched.
+    """
+    matches = PROCESSES.find(app_name)
+    if not matches:
+        # The cached snapshot may predate the app starting
+        PROCESSES.snapshot(refresh=True)
+        matches = PROCESSES.find(app_name)
+    if not matches:
+        return {"closed": [], "killed": [], "failed": []}
+    result = terminate_processes(PROCESSES.with_children(matches), timeout=timeout)
+    PROCESSES.invalidate()
+    return result
+
+def exited_after(action, timeout=2.0, interval=0.1):
+    """
+    Runs action() and returns "name (pid)" labels of the processes that
+    exited within timeout of it - how a close done by another tool
+    (AppOpener) is confirmed.
+    """
+    before = list(PROCESSES.snapshot(refresh=True))
+    action()
+    deadline = time.monotonic() + timeout
+    while True:
+        gone = [proc for proc in before if _exited(proc)]
+        if gone or time.monotonic() >= deadline:
+            break
+        time.sleep(interval)
+    PROCESSES.invalidate()
+    return [_label(proc) for proc in gone]
+
+# ===== Usage monitor =====
+
+class ProcessMonitor:
+    """
+    Per-process CPU and memory, sampled incrementally in the background.
+
+    psutil.process_iter() hands back the same cached Process object for a
+    running PID on every call, and each object's cpu_percent() is the CPU
+    used since its previous call - so one listing per interval yields the
+    deltas for every process, with all attributes read inside oneshot().
+    Usage is grouped by executable name (one entry for all of Chrome's
+    processes), which is also the name close_application expects.
+    """
+
+    def __init__(self, table, interval=USAGE_INTERVAL, window=USAGE_WINDOW):
+        self.table = table
+        self.interval = interval
+        self.window = window
+        self.samples = {}    # pid -> deque of (time, cpu share %, rss bytes)
+        self.names = {}      # pid -> process name
+        self.last = 0.0
+        self.cpu_count = None
+        self.lock = threading.Lock()
+        self.fresh_lock = threading.Lock()
+        self.thread = None
+
+    def sample(self):
+        import psutil
+        from collections import deque
+        if self.cpu_count is None:
+            self.cpu_count = psutil.cpu_count() or 1
+        now = time.time()
+        procs = list(psutil.process_iter(["pid", "ppid", "name", "exe", "cpu_percent", "memory_info"]))
+        self.table.update(procs)  # close_application reuses this listing
+        maxlen = max(1, int(self.window / self.interval))
+        own_pid = os.getpid()
+        with self.lock:
+            alive = set()
+            for proc in procs:
+                info = proc.info
+                pid = info["pid"]
+                if pid == own_pid or _stem(info["name"]) in IDLE_NAMES:
+                    continue
+                alive.add(pid)
+                memory = info["memory_info"]
+                # cpu_percent is per core; divide for a share of the whole machine
+                cpu = (info["cpu_percent"] or 0.0) / self.cpu_count
+                ring = self.samples.get(pid)
+                if ring is None:
+                    ring = self.samples[pid] = deque(maxlen=maxlen)
+                ring.append((now, cpu, memory.rss if memory else 0))
+                self.names[pid] = info["name"] or f"pid {pid}"
+            for pid in set(self.samples) - alive:
+                del self.samples[pid]
+                self.names.pop(pid, None)
+            self.last = now
+
+    def ensure_fresh(self):
+        """Samples now if the data is stale; primes CPU deltas on first use."""
+        # Concurrent first calls would each prime and sleep; the second one waits
+        with self.fresh_lock:
+            if not self.samples:
+                self.sample()
+                time.sleep(0.5)  # the first cpu_percent() of each process is 0.0
+                self.sample()
+            elif time.time() - self.last > self.interval:
+                self.sample()
+        self.start()
+
+    def pids(self, name):
+        """PIDs currently grouped under name."""
+        with self.lock:
+            return {pid for pid, other in self.names.items() if other == name}
+
+    def usage(self, seconds=None):
+        """
+        {name: (cpu %, rss bytes, process count)}: CPU averaged over the last
+        seconds (latest sample if None), memory as of the latest sample.
+        """
+        cutoff = time.time() - seconds if seconds else None
+        groups = {}
+        with self.lock:
+            for pid, ring in self.samples.items():
+                if cutoff is None:
+                    cpu = ring[-1][1]
+                else:
+                    recent = [c for t, c, _ in ring if t >= cutoff]
+                    cpu = sum(recent) / len(recent) if recent else 0.0
+                name = self.names[pid]
+                total = groups.get(name, (0.0, 0, 0))
+                groups[name] = (total[0] + cpu, total[1] + ring[-1][2], total[2] + 1)
+        return groups
+
+    def top(self, by="cpu", limit=5, seconds=None):
+        """[(name, cpu %, rss bytes, count)] of the heaviest apps."""
+        import heapq
+        key = (lambda item: item[1][0]) if by == "cpu" else (lambda item: item[1][1])
+        ranked = heapq.nlargest(limit, self.usage(seconds).items(), key=key)
+        return [(name, cpu, rss, count) for name, (cpu, rss, count) in ranked]
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error sampling processes: {e}")
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, daemon=True, name="process-monitor")
+            self.thread.start()
+
+MONITOR = ProcessMonitor(PROCESSES)
+
+def _size(rss):
+    return f"{rss / 1024**3:.1f} GB" if rss >= 1024**3 else f"{rss / 1024**2:.0f} MB"
+
+def top_processes(by="cpu", minutes=None, limit=5):
+    """
+    Names the apps using the most CPU (or memory), optionally averaged over
+    the last few minutes, and offers to close them.
+    """
+    by = "memory" if str(by).lower() in ("memory", "ram", "mem") else "cpu"
+    try:
+        seconds = max(1, min(USAGE_WINDOW // 60, int(minutes))) * 60 if minutes else None
+    except (TypeError, ValueError):
+        seconds = None
+    try:
+        MONITOR.ensure_fresh()
+        top = MONITOR.top(by=by, limit=limit, seconds=seconds)
+    except Exception as e:
+        return f"Could not read processes: {e}"
+    if not top:
+        return "I couldn't read any processes."
+
+    span = f" over the last {seconds // 60} minute{'s' if seconds > 60 else ''}" if seconds else ""
+    entries = []
+    for name, cpu, rss, count in top:
+        label = name[:-4] if name.lower().endswith(".exe") else name
+        procs = f", {count} processes" if count > 1 else ""
+        if by == "cpu":
+            entries.append(f"{label} {cpu:.0f}% CPU ({_size(rss)}{procs})")
+        else:
+            entries.append(f"{label} {_size(rss)} ({cpu:.0f}% CPU{procs})")
+    what = "CPU" if by == "cpu" else "memory"
+    result = f"Top {what} users{span}: " + "; ".join(entries) + "."
+    suggestion = _suggest_closing(top)
+    if suggestion:
+        heaviest = suggestion[:-4] if suggestion.lower().endswith(".exe") else suggestion
+        result += f" Want me to close {heaviest}? Just say 'close {heaviest}'."
+    return result
+
+def _suggest_closing(top):
+    """
+    The heaviest app in top worth offering to close, or None: it must use a
+    lot (SUGGEST_MIN_CPU or SUGGEST_MIN_RSS) and be neither a system/shell
+    process nor part of the agent's own process tree (e.g. its OCR worker).
+    """
+    own = None
+    for name, cpu, rss, _ in top:
+        if cpu < SUGGEST_MIN_CPU and rss < SUGGEST_MIN_RSS:
+            continue
+        if _stem(name) in PROTECTED_NAMES or _stem(name) in NEVER_SUGGESTED:
+            continue
+        if own is None:
+            own = PROCESSES.own_tree()
+        if MONITOR.pids(name) & own:
+            continue
+        return name
+    return None
+
+if __name__ == "__main__":
+    import subprocess
+    import sys
+    if "--demo" in sys.argv:
+        # A parent with two children, one of which ignores SIGTERM
+        stubborn = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(60)"
+        parent_code = (
+            "import subprocess, sys, time;"
+            f"subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']);"
+            f"subprocess.Popen([sys.executable, '-c', {stubborn!r}]);"
+            "time.sleep(60)"
+        )
+        parent = subprocess.Popen([sys.executable, "-c", parent_code])
+        time.sleep(1)
+        import psutil
+        root = psutil.Process(parent.pid)
+        tree = PROCESSES.with_children([root])
+        print(f"Tree of {parent.pid}: {[p.pid for p in tree]}")
+        start = time.monotonic()
+        print(terminate_processes(tree, timeout=1))
+        print(f"Closed in {time.monotonic() - start:.2f}s")
+    elif "--top" in sys.argv:
+        print(top_processes())
+        print(top_processes(by="memory"))
+    else:
+        print(close_processes(sys.argv[1] if len(sys.argv) > 1 else "notepad"))
@@ -8,6 +8,10 @@ import time
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 REMINDERS_FILE = os.path.join(DATA_DIR, "reminders.json")
 NOTES_DIR = os.path.join(DATA_DIR, "notes")
+NOTES_HISTORY_DIR = os.path.join(NOTES_DIR, ".history")
+
+# Number of undoable revisions kept per note
+MAX_NOTE_REVISIONS = 20
 
 # Ensure directories exist
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -161,26 +165,9 @@ def check_reminders():
     Background function that checks for due reminders.
     Runs in a separate thread.
     """
-    global ACTIVE_REMINDERS
-    
     while True:
         try:
-            now = datetime.now()
-            due_reminders = []
-            
-            # Check for due reminders
-            for reminder in ACTIVE_REMINDERS[:]:  # Iterate over copy
-                reminder_time = datetime.fromisoformat(reminder['time'])
-                if reminder_time <= now:
-                    due_reminders.append(reminder)
-                    ACTIVE_REMINDERS.remove(reminder)
-            
-            # Trigger due reminders
-            for reminder in due_reminders:
-                trigger_reminder(reminder['message'])
-            
-            if due_reminders:
-                save_reminders()
+            process_due_reminders()
             
             # Check every 30 seconds
             time.sleep(30)
@@ -188,6 +175,32 @@ def check_reminders():
             print(f"Error in reminder checker: {e}")
             time.sleep(30)
 
+def process_due_reminders(now=None):
+    """
+    One pass of the reminder checker: triggers and removes every reminder
+    that is due. Returns the number triggered.
+    """
+    global ACTIVE_REMINDERS
+    
+    now = now or datetime.now()
+    due_reminders = []
+    
+    # Check for due reminders
+    for reminder in ACTIVE_REMINDERS[:]:  # Iterate over copy
+        reminder_time = datetime.fromisoformat(reminder['time'])
+        if reminder_time <= now:
+            due_reminders.append(reminder)
+            ACTIVE_REMINDERS.remove(reminder)
+    
+    # Trigger due reminders
+    for reminder in due_reminders:
+        trigger_reminder(reminder['message'])
+    
+    if due_reminders:
+        save_reminders()
+    
+    return len(due_reminders)
+
 def trigger_reminder(message):
     """
     Triggers a reminder notification.
@@ -229,15 +242,25 @@ def create_note(title, content):
     """
     try:
         # Sanitize title for filename
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+        safe_title = _safe_title(title)
         filename = f"{safe_title}.txt"
         filepath = os.path.join(NOTES_DIR, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"Title: {title}\n")
-            f.write(f"Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(content)
+        new_content = (
+            f"Title: {title}\n"
+            f"Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            + "=" * 50 + "\n\n"
+            + content
+        )
+        
+        if os.path.exists(filepath):
+            old_content = _read_raw(filepath)
+            _record_revision(safe_title, _reverse_delta(old_content, new_content))
+        else:
+            _record_revision(safe_title, {"created": True})
+        
+        with open(filepath, 'w', encoding='utf-8', newline='') as f:
+            f.write(new_content)
         
         return f"Note '{title}' created successfully."
     except Exception as e:
@@ -250,18 +273,9 @@ def read_note(title):
     """
     try:
         # Find matching note file
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-        filename = f"{safe_title}.txt"
-        filepath = os.path.join(NOTES_DIR, filename)
-        
-        if not os.path.exists(filepath):
-            # Try to find partial match
-            for file in os.listdir(NOTES_DIR):
-                if title.lower() in file.lower():
-                    filepath = os.path.join(NOTES_DIR, file)
-                    break
-            else:
-                return f"Note '{title}' not found."
+        filepath = _find_note(title)
+        if filepath is None:
+            return f"Note '{title}' not found."
         
         with open(filepath, 'r', encoding='utf-8') as f:
             content = f.read()
@@ -298,23 +312,199 @@ def delete_note(title):
     Returns confirmation or error message.
     """
     try:
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-        filename = f"{safe_title}.txt"
-        filepath = os.path.join(NOTES_DIR, filename)
+        filepath = _find_note(title)
+        if filepath is None:
+            return f"Note '{title}' not found."
         
-        if not os.path.exists(filepath):
-            # Try to find partial match
-            for file in os.listdir(NOTES_DIR):
-                if title.lower() in file.lower():
-                    filepath = os.path.join(NOTES_DIR, file)
-                    break
-            else:
-                return f"Note '{title}' not found."
+        # Keep the full text as a revision so the delete can be undone
+        safe_title = os.path.basename(filepath)[:-len('.txt')]
+        _record_revision(safe_title, {"start": 0, "end": 0, "text": _read_raw(filepath)})
         
         os.remove(filepath)
         return f"Note '{title}' deleted."
     except Exception as e:
         return f"Error deleting note: {e}"
 
+def append_note(title, text):
+    """
+    Appends text to the end of a note, creating the note if needed.
+    Only the new text is written to disk.
+    Returns confirmation or error message.
+    """
+    try:
+        filepath = _find_note(title)
+        if filepath is None:
+            return create_note(title, text)
+        
+        content = _read_raw(filepath)
+        if content and not content.endswith("\n"):
+            text = "\n" + text
+        
+        safe_title = os.path.basename(filepath)[:-len('.txt')]
+        _record_revision(safe_title, {"start": len(content), "end": len(content) + len(text), "text": ""})
+        
+        with open(filepath, 'a', encoding='utf-8', newline='') as f:
+            f.write(text)
+        
+        return f"Added to note '{title}'."
+    except Exception as e:
+        return f"Error appending to note: {e}"
+
+def insert_note(title, text, line=1):
+    """
+    Inserts text before the given line (1-based) of a note's body.
+    Only the part of the file after the insertion point is rewritten.
+    Returns confirmation or error message.
+    """
+    try:
+        filepath = _find_note(title)
+        if filepath is None:
+            return f"Note '{title}' not found."
+        
+        content = _read_raw(filepath)
+        body_start = _body_offset(content)
+        body_lines = content[body_start:].splitlines(keepends=True)
+        
+        line = max(1, min(int(line), len(body_lines) + 1))
+        position = body_start + sum(len(l) for l in body_lines[:line - 1])
+        
+        if not text.endswith("\n") and position < len(content):
+            text += "\n"
+        elif position == len(content) and content and not content.endswith("\n"):
+            text = "\n" + text
+        
+        safe_title = os.path.basename(filepath)[:-len('.txt')]
+        _record_revision(safe_title, {"start": position, "end": position + len(text), "text": ""})
+        
+        _write_from(filepath, content[:position] + text + content[position:], position)
+        
+        return f"Inserted into note '{title}' at line {line}."
+    except Exception as e:
+        return f"Error inserting into note: {e}"
+
+def undo_note(title):
+    """
+    Reverts the most recent change to a note (create, append, insert or delete).
+    Returns confirmation or error message.
+    """
+    try:
+        safe_title = _safe_title(title)
+        filepath = _find_note(title)
+        if filepath is not None:
+            safe_title = os.path.basename(filepath)[:-len('.txt')]
+        else:
+            filepath = os.path.join(NOTES_DIR, f"{safe_title}.txt")
+        
+        revision = _pop_revision(safe_title)
+        if revision is None:
+            return f"No changes to undo for note '{title}'."
+        
+        if revision.get("created"):
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            return f"Undid creation of note '{title}'."
+        
+        content = _read_raw(filepath) if os.path.exists(filepath) else ""
+        start, end = revision["start"], revision["end"]
+        _write_from(filepath, content[:start] + revision["text"] + content[end:], start)
+        
+        return f"Undid last change to note '{title}'."
+    except Exception as e:
+        return f"Error undoing note change: {e}"
+
+# ===== Note Helpers =====
+
+def _safe_title(title):
+    """Sanitizes a note title for use as a filename."""
+    return "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+
+def _find_note(title):
+    """Returns the path of the note matching title (exact, then partial) or None."""
+    filepath = os.path.join(NOTES_DIR, f"{_safe_title(title)}.txt")
+    if os.path.exists(filepath):
+        return filepath
+    
+    for file in os.listdir(NOTES_DIR):
+        if file.endswith('.txt') and title.lower() in file.lower():
+            return os.path.join(NOTES_DIR, file)
+    return None
+
+def _read_raw(filepath):
+    """Reads a note without newline translation so offsets match the file."""
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+def _write_from(filepath, content, start):
+    """Rewrites a note from character offset start onwards, leaving the prefix untouched."""
+    if not os.path.exists(filepath):
+        start = 0
+    prefix_bytes = len(content[:start].encode('utf-8'))
+    mode = 'r+b' if start > 0 else 'wb'
+    with open(filepath, mode) as f:
+        f.seek(prefix_bytes)
+        f.write(content[start:].encode('utf-8'))
+        f.truncate()
+
+def _body_offset(content):
+    """Returns the character offset where the note body starts (after the header)."""
+    marker = "=" * 50
+    index = content.find(marker)
+    if index == -1:
+        return 0
+    index += len(marker)
+    # Skip the line break(s) that separate the header from the body
+    while index < len(content) and content[index] in "\r\n":
+        index += 1
+    return index
+
+def _reverse_delta(old, new):
+    """
+    Builds the delta that turns new back into old.
+    Only the changed middle section is stored, not the whole note.
+    """
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    
+    return {"start": prefix, "end": len(new) - suffix, "text": old[prefix:len(old) - suffix]}
+
+def _history_path(safe_title):
+    return os.path.join(NOTES_HISTORY_DIR, f"{safe_title}.jsonl")
+
+def _record_revision(safe_title, delta):
+    """Appends a reverse delta to the note's history, compacting old revisions."""
+    os.makedirs(NOTES_HISTORY_DIR, exist_ok=True)
+    path = _history_path(safe_title)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(delta) + "\n")
+    
+    # Compact only once the log is well past the limit to keep writes append-only
+    if os.path.getsize(path) > 4096:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        if len(lines) > MAX_NOTE_REVISIONS * 2:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(lines[-MAX_NOTE_REVISIONS:])
+
+def _pop_revision(safe_title):
+    """Removes and returns the latest reverse delta for a note, or None."""
+    path = _history_path(safe_title)
+    if not os.path.exists(path):
+        return None
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [l for l in f.readlines() if l.strip()]
+    if not lines:
+        return None
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:-1])
+    return json.loads(lines[-1])
+
 # Initialize reminders on module import
 load_reminders()
@@ -1,16 +1,26 @@
-import pyautogui
-import pyperclip
-from PIL import ImageGrab
+from concurrent.futures import TimeoutError as FutureTimeout
 from datetime import datetime
 import os
 
+from skills.screenshot_catalog import get_catalog
+from skills.screenshot_ocr import get_text_index
+
+# pyperclip, PIL and the capture backends are imported where they are used,
+# so the file-only helpers (list_screenshots) also work on a headless machine
+
 # Default screenshot directory
 SCREENSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "screenshots")
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 
+# Seconds take_screenshot waits for the background encode before replying
+SAVE_WAIT = 2.0
+
 def take_screenshot(region=None, save_path=None):
     """
     Takes a screenshot of the entire screen or a specific region.
+    The file is encoded on a background worker; the reply waits up to
+    SAVE_WAIT seconds for it to be written. An unchanged screen is not
+    saved twice.
     
     Args:
         region: Optional tuple (x, y, width, height) for specific region
@@ -20,58 +30,62 @@ def take_screenshot(region=None, save_path=None):
         Success message with filepath or error message
     """
     try:
-        if region:
-            # Capture specific region
-            screenshot = pyautogui.screenshot(region=region)
-        else:
-            # Capture entire screen
-            screenshot = pyautogui.screenshot()
-        
-        # Generate filename if not provided
-        if save_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"screenshot_{timestamp}.png"
-            save_path = os.path.join(SCREENSHOT_DIR, filename)
-        
-        # Save screenshot
-        screenshot.save(save_path)
-        
-        return f"Screenshot saved to {save_path}"
+        from skills.capture import capture
+
+        on_saved = None
+        if save_path is None or os.path.dirname(os.path.abspath(save_path)) == os.path.abspath(SCREENSHOT_DIR):
+            on_saved = _screenshot_saved
+        path, job, duplicate = capture(SCREENSHOT_DIR, region=region, save_path=save_path, on_saved=on_saved)
+        if duplicate:
+            return f"Screen unchanged since the last screenshot: {path}"
+        # Fast PNG encoding is usually done well within the wait; only
+        # claim the file exists once it has actually been written
+        try:
+            job.future.result(timeout=SAVE_WAIT)
+        except FutureTimeout:
+            return f"Saving screenshot to {path}"
+        except Exception as e:
+            return f"Error saving screenshot to {path}: {e}"
+        return f"Screenshot saved to {path}"
     except Exception as e:
         return f"Error taking screenshot: {e}"
 
+def _screenshot_saved(path, size, image_hash):
+    """Catalogs a written screenshot and queues it for text indexing."""
+    get_catalog(SCREENSHOT_DIR).add(path, size, image_hash)
+    get_text_index(SCREENSHOT_DIR).enqueue(path)
+
 def screenshot_to_clipboard():
     """
     Takes a screenshot and copies it to clipboard.
     Returns success message or error.
     """
     try:
-        # Take screenshot
-        screenshot = ImageGrab.grab()
+        from skills.capture import get_backend
+
+        screenshot = get_backend().grab()
+        
+        # Copy to clipboard using win32clipboard
+        try:
+            import win32clipboard
+        except ImportError:
+            # Fallback: save to file and notify
+            return take_screenshot() + " (clipboard copy requires pywin32)"
         
-        # Convert to clipboard format and copy
-        # Note: This requires PIL/Pillow
+        # CF_DIB is a BMP without its file header, which PIL writes directly
         import io
         output = io.BytesIO()
-        screenshot.convert('RGB').save(output, 'BMP')
-        data = output.getvalue()[14:]  # Remove BMP header
+        screenshot.save(output, "DIB")
+        data = output.getvalue()
         output.close()
         
-        # Copy to clipboard using win32clipboard
+        win32clipboard.OpenClipboard()
         try:
-            import win32clipboard
-            win32clipboard.OpenClipboard()
             win32clipboard.EmptyClipboard()
             win32clipboard.SetClipboardData(win32clipboard.CF_DIB, data)
+        finally:
             win32clipboard.CloseClipboard()
-            return "Screenshot copied to clipboard."
-        except ImportError:
-            # Fallback: save to file and notify
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"screenshot_{timestamp}.png"
-            save_path = os.path.join(SCREENSHOT_DIR, filename)
-            screenshot.save(save_path)
-            return f"Screenshot saved to {save_path} (clipboard copy requires pywin32)"
+        return "Screenshot copied to clipboard."
     except Exception as e:
         return f"Error taking screenshot to clipboard: {e}"
 
@@ -95,6 +109,7 @@ def get_clipboard_text():
     Returns clipboard text or error message.
     """
     try:
+        import pyperclip
         text = pyperclip.paste()
         if text:
             return f"Clipboard content: {text}"
@@ -109,6 +124,7 @@ def set_clipboard_text(text):
     Returns confirmation or error message.
     """
     try:
+        import pyperclip
         pyperclip.copy(text)
         return f"Text copied to clipboard."
     except Exception as e:
@@ -120,6 +136,7 @@ def clear_clipboard():
     Returns confirmation message.
     """
     try:
+        import pyperclip
         pyperclip.copy('')
         return "Clipboard cleared."
     except Exception as e:
@@ -165,27 +182,53 @@ def list_screenshots():
     Returns formatted list of screenshots.
     """
     try:
-        screenshots = [f for f in os.listdir(SCREENSHOT_DIR) if f.endswith(('.png', '.jpg', '.jpeg'))]
+        catalog = get_catalog(SCREENSHOT_DIR)
+        total = catalog.count()
         
-        if not screenshots:
+        if not total:
             return "No screenshots found."
         
-        # Sort by modification time (newest first)
-        screenshots.sort(key=lambda x: os.path.getmtime(os.path.join(SCREENSHOT_DIR, x)), reverse=True)
+        # Catalog entries are kept in time order (newest first here)
+        result = f"📸 Screenshots ({total}):\n\n"
+        for i, entry in enumerate(catalog.recent(10), 1):  # Show last 10
+            modified = datetime.fromtimestamp(entry["time"]).strftime('%Y-%m-%d %H:%M:%S')
+            result += f"{i}. {entry['file']} - {modified}\n"
         
-        result = f"📸 Screenshots ({len(screenshots)}):\n\n"
-        for i, screenshot in enumerate(screenshots[:10], 1):  # Show last 10
-            filepath = os.path.join(SCREENSHOT_DIR, screenshot)
-            modified = datetime.fromtimestamp(os.path.getmtime(filepath)).strftime('%Y-%m-%d %H:%M:%S')
-            result += f"{i}. {screenshot} - {modified}\n"
-        
-        if len(screenshots) > 10:
-            result += f"\n... and {len(screenshots) - 10} more."
+        if total > 10:
+            result += f"\n... and {total - 10} more."
         
         return result
     except Exception as e:
         return f"Error listing screenshots: {e}"
 
+def search_screenshots(query):
+    """
+    Finds screenshots containing the given text (OCR runs in the background).
+    Returns formatted list of matches.
+    """
+    try:
+        index = get_text_index(SCREENSHOT_DIR)
+        if not index.available():
+            return "Searching screenshots needs Tesseract OCR. Install it or set TESSERACT_CMD in .env."
+        
+        # Index anything new and drop screenshots deleted by retention
+        files = get_catalog(SCREENSHOT_DIR).files()
+        index.catch_up(files)
+        index.forget(set(index.texts) - set(files))
+        
+        matches = index.search(query)
+        pending = index.backlog()
+        note = f"\n({pending} screenshots are still being read.)" if pending else ""
+        if not matches:
+            return f"No screenshots mention '{query}'." + note
+        
+        result = f"🔎 Screenshots mentioning '{query}':\n\n"
+        for i, (file, snippet) in enumerate(matches, 1):
+            result += f"{i}. {file} - {snippet}\n"
+        return result + note
+    except Exception as e:
+        return f"Error searching screenshots: {e}"
+
 def open_screenshot_folder():
     """
     Opens the screenshot folder in Windows Explorer.
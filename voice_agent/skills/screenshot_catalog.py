@@ -0,0 +1,227 @@
+"""
+Catalog of saved screenshots.
+
+Keeps one metadata entry per screenshot (time, size on disk, dimensions,
+dHash) in <folder>/.catalog.json, so listing is a slice of an in-memory
+list instead of a listdir + stat of every file.
+
+Optional retention limits from .env, enforced by a background prune after
+each new screenshot (all off by default; 0 or unset disables a limit):
+
+    SCREENSHOT_MAX_COUNT=500       keep at most this many screenshots
+    SCREENSHOT_MAX_MB=500          ... taking at most this much space
+    SCREENSHOT_MAX_AGE_DAYS=30     ... none older than this
+
+Only screenshots the agent took itself are ever deleted; other images in
+the folder are listed but never counted or removed.
+"""
+
+import json
+import os
+import threading
+import time
+
+CATALOG_NAME = ".catalog.json"
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+def _env_number(name):
+    try:
+        return max(0.0, float(os.getenv(name, "0") or 0))
+    except ValueError:
+        print(f"Ignoring invalid {name}={os.getenv(name)!r}")
+        return 0.0
+
+def retention_limits():
+    """(max count, max bytes, max age in days) from .env; 0 disables a limit."""
+    return (int(_env_number("SCREENSHOT_MAX_COUNT")),
+            int(_env_number("SCREENSHOT_MAX_MB") * 1024 * 1024),
+            _env_number("SCREENSHOT_MAX_AGE_DAYS"))
+
+class ScreenshotCatalog:
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, CATALOG_NAME)
+        self.entries = []   # oldest first
+        self.by_file = {}
+        self.lock = threading.RLock()
+        self.pruning = None
+        self.prune_requested = threading.Event()
+        self.load()
+
+    # ----- Persistence -----
+
+    def load(self):
+        if not os.path.exists(self.path):
+            # First run: index what is already on disk
+            self.sync()
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Error loading screenshot catalog: {e}")
+            self.sync()
+            return
+        self._set_entries(entries)
+        # Pick up files added or deleted outside the agent
+        self.prune_in_background(sync=True)
+
+    def save(self):
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with self.lock:
+                data = list(self.entries)
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"Error saving screenshot catalog: {e}")
+
+    def _set_entries(self, entries):
+        entries.sort(key=lambda e: e["time"])
+        with self.lock:
+            self.entries = entries
+            self.by_file = {e["file"]: e for e in entries}
+
+    def sync(self):
+        """Reconciles the catalog with the folder (one scandir)."""
+        started = time.time()
+        try:
+            found = {e.name: e for e in os.scandir(self.folder)
+                     if e.is_file() and e.name.lower().endswith(IMAGE_EXTENSIONS)}
+        except FileNotFoundError:
+            found = {}
+        with self.lock:
+            # Entries added while scanning are kept even if the scan missed them
+            entries = [e for e in self.entries if e["file"] in found or e["time"] >= started]
+            known = {e["file"] for e in entries}
+            for name, item in found.items():
+                if name not in known:
+                    stat = item.stat()
+                    entries.append({"file": name, "time": stat.st_mtime, "bytes": stat.st_size,
+                                    "width": None, "height": None, "hash": None})
+            self._set_entries(entries)
+        self.save()
+
+    # ----- Entries -----
+
+    def add(self, path, size=None, image_hash=None):
+        """Records a newly written screenshot, then prunes in the background."""
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            print(f"Error cataloguing screenshot: {e}")
+            return
+        width, height = size or (None, None)
+        entry = {
+            "file": os.path.basename(path),
+            "time": stat.st_mtime,
+            "bytes": stat.st_size,
+            "width": width,
+            "height": height,
+            "hash": f"{image_hash:016x}" if image_hash is not None else None,
+            "created": True,   # taken by the agent, so retention may delete it
+        }
+        with self.lock:
+            old = self.by_file.pop(entry["file"], None)
+            if old is not None:
+                self.entries.remove(old)
+            self.entries.append(entry)
+            self.by_file[entry["file"]] = entry
+        self.save()
+        self.prune_in_background()
+
+    def count(self):
+        return len(self.entries)
+
+    def files(self):
+        with self.lock:
+            return list(self.by_file)
+
+    def total_bytes(self):
+        with self.lock:
+            return sum(e["bytes"] for e in self.entries)
+
+    def recent(self, limit=10):
+        """Newest entries first."""
+        with self.lock:
+            return self.entries[-limit:][::-1] if limit else []
+
+    def full_path(self, entry):
+        return os.path.join(self.folder, entry["file"])
+
+    # ----- Retention -----
+
+    def expired(self, now=None, limits=None):
+        """
+        Screenshots taken by the agent that are beyond the retention limits
+        (see retention_limits()), oldest first.
+        """
+        now = now or time.time()
+        max_count, max_bytes, max_age_days = limits or retention_limits()
+        with self.lock:
+            entries = [e for e in self.entries if e.get("created")]
+        remove = []
+        if max_age_days:
+            cutoff = now - max_age_days * 86400
+            remove = [e for e in entries if e["time"] < cutoff]
+        keep = entries[len(remove):]
+        if max_count and len(keep) > max_count:
+            remove += keep[:len(keep) - max_count]
+            keep = keep[len(keep) - max_count:]
+        if max_bytes:
+            total = sum(e["bytes"] for e in keep)
+            while keep and total > max_bytes:
+                total -= keep[0]["bytes"]
+                remove.append(keep.pop(0))
+        return remove
+
+    def prune(self, now=None, limits=None):
+        """Deletes expired screenshots. Returns the count."""
+        remove = self.expired(now, limits)
+        for entry in remove:
+            name = entry["file"]
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error deleting {name}: {e}")
+        if remove:
+            removed = {e["file"] for e in remove}
+            with self.lock:
+                self._set_entries([e for e in self.entries if e["file"] not in removed])
+            self.save()
+        return len(remove)
+
+    def prune_in_background(self, sync=False):
+        """Prunes on a background thread; a request made mid-prune runs once more after it."""
+        with self.lock:
+            self.prune_requested.set()
+            if self.pruning is not None and self.pruning.is_alive():
+                return
+            def run():
+                if sync:
+                    self.sync()
+                while True:
+                    with self.lock:
+                        if not self.prune_requested.is_set():
+                            self.pruning = None
+                            return
+                        self.prune_requested.clear()
+                    self.prune()
+            self.pruning = threading.Thread(target=run, daemon=True, name="screenshot-prune")
+            self.pruning.start()
+
+_CATALOGS = {}
+_CATALOGS_LOCK = threading.Lock()
+
+def get_catalog(folder):
+    """The catalog of a screenshot folder, loaded once."""
+    with _CATALOGS_LOCK:
+        catalog = _CATALOGS.get(folder)
+        if catalog is None:
+            catalog = _CATALOGS[folder] = ScreenshotCatalog(folder)
+        return catalog
@@ -0,0 +1,199 @@
+"""
+Text search over saved screenshots.
+
+Each new screenshot is queued for OCR with the Tesseract command line tool
+(optional - install it from https://github.com/UB-Mannheim/tesseract/wiki
+or your package manager, or set TESSERACT_CMD). A single background thread
+works through the queue one image at a time with the tesseract process at
+below-normal priority, so it never competes with the voice loop. Extracted
+text is stored in <folder>/.ocr_index.json; screenshots already indexed are
+never processed again.
+"""
+
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+INDEX_NAME = ".ocr_index.json"
+OCR_LANGUAGE = "eng"
+OCR_TIMEOUT = 60       # seconds per image
+IDLE_DELAY = 0.5       # pause between images
+SAVE_EVERY = 5         # images indexed between index saves
+
+WINDOWS_TESSERACT = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+def _words(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def find_tesseract():
+    """Path of the tesseract executable, or None if it is not installed."""
+    for candidate in (os.getenv("TESSERACT_CMD"), shutil.which("tesseract"), WINDOWS_TESSERACT):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return None
+
+def run_ocr(path, tesseract, language=OCR_LANGUAGE, timeout=OCR_TIMEOUT):
+    """Text in the image at path, extracted by a low-priority tesseract process."""
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.BELOW_NORMAL_PRIORITY_CLASS | subprocess.CREATE_NO_WINDOW
+    else:
+        kwargs["preexec_fn"] = lambda: os.nice(10)
+    completed = subprocess.run([tesseract, path, "stdout", "-l", language],
+                               capture_output=True, timeout=timeout, **kwargs)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.decode("utf-8", "replace").strip() or "tesseract failed")
+    return completed.stdout.decode("utf-8", "replace")
+
+class ScreenshotTextIndex:
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, INDEX_NAME)
+        self.texts = {}      # file -> extracted text ("" for images without text)
+        self.words = {}      # word -> set of files
+        self.lock = threading.Lock()
+        self.pending = queue.Queue()
+        self.queued = set()
+        self.worker = None
+        self.tesseract = find_tesseract()
+        self.load()
+
+    # ----- Persistence -----
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    texts = json.load(f)
+                for file, text in texts.items():
+                    self._index(file, text)
+        except Exception as e:
+            print(f"Error loading screenshot text index: {e}")
+
+    def save(self):
+        try:
+            with self.lock:
+                data = dict(self.texts)
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"Error saving screenshot text index: {e}")
+
+    def _index(self, file, text):
+        with self.lock:
+            self.texts[file] = text
+            for word in set(_words(text)):
+                self.words.setdefault(word, set()).add(file)
+
+    def forget(self, files):
+        """Drops deleted screenshots from the index."""
+        files = set(files)
+        with self.lock:
+            for file in files:
+                self.texts.pop(file, None)
+            for word in list(self.words):
+                self.words[word] -= files
+                if not self.words[word]:
+                    del self.words[word]
+
+    # ----- Indexing -----
+
+    def available(self):
+        return self.tesseract is not None
+
+    def enqueue(self, path):
+        """Queues a screenshot for OCR unless it is already indexed or queued."""
+        file = os.path.basename(path)
+        if not self.available() or file in self.texts or file in self.queued:
+            return
+        self.queued.add(file)
+        self.pending.put(file)
+        self._start()
+
+    def catch_up(self, files):
+        """Queues every screenshot in files that has not been indexed yet."""
+        for file in files:
+            self.enqueue(file)
+
+    def backlog(self):
+        return len(self.queued)
+
+    def _start(self):
+        if self.worker is not None and self.worker.is_alive():
+            return
+        self.worker = threading.Thread(target=self._run, daemon=True, name="screenshot-ocr")
+        self.worker.start()
+
+    def _run(self):
+        unsaved = 0
+        while True:
+            file = self.pending.get()
+            path = os.path.join(self.folder, file)
+            try:
+                if os.path.exists(path):
+                    self._index(file, run_ocr(path, self.tesseract))
+                    unsaved += 1
+            except Exception as e:
+                print(f"OCR failed for {file}: {e}")
+                self._index(file, "")  # don't retry a broken image forever
+                unsaved += 1
+            finally:
+                self.queued.discard(file)
+            if unsaved >= SAVE_EVERY or (unsaved and self.pending.empty()):
+                self.save()
+                unsaved = 0
+            time.sleep(IDLE_DELAY)
+
+    # ----- Search -----
+
+    def search(self, query, limit=5):
+        """
+        Screenshots whose text contains the query words (prefix matches
+        count), best first; ties go to the newest. Returns (file, snippet) pairs.
+        """
+        terms = _words(query)
+        if not terms:
+            return []
+        with self.lock:
+            vocabulary = list(self.words)
+            scores = {}
+            for term in terms:
+                matched = set()
+                for word in vocabulary:
+                    if word.startswith(term):
+                        matched |= self.words[word]
+                for file in matched:
+                    scores[file] = scores.get(file, 0) + 1
+            phrase = query.lower().strip()
+            for file in scores:
+                if phrase in self.texts[file].lower():
+                    scores[file] += len(terms)
+            ranked = sorted(scores, key=lambda f: (scores[f], f), reverse=True)
+            return [(file, self._snippet(self.texts[file], terms)) for file in ranked[:limit]]
+
+    def _snippet(self, text, terms, width=60):
+        flat = " ".join(text.split())
+        lower = flat.lower()
+        positions = [lower.find(term) for term in terms if lower.find(term) >= 0]
+        start = max(0, min(positions) - width // 2) if positions else 0
+        snippet = flat[start:start + width]
+        return ("..." if start else "") + snippet + ("..." if start + width < len(flat) else "")
+
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+def get_text_index(folder):
+    """The OCR index of a screenshot folder, loaded once."""
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(folder)
+        if index is None:
+            index = _INDEXES[folder] = ScreenshotTextIndex(folder)
+        return index
@@ -3,6 +3,9 @@ import os
 import subprocess
 from datetime import datetime
 
+from skills.app_index import launch_app
+from skills.processes import close_processes, exited_after
+
 def open_special_location(location_name):
     """
     Opens Windows special locations like This PC, Recycle Bin, etc.
@@ -50,7 +53,16 @@ def open_application(app_name):
     if open_special_location(app_name):
         return True
     
-    # Then try regular applications
+    # Then the installed app index (instant lookup, no rescan)
+    try:
+        launched = launch_app(app_name)
+        if launched:
+            print(f"Launched {launched} from app index.")
+            return True
+    except Exception as e:
+        print(f"App index launch failed for {app_name}: {e}")
+    
+    # Fall back to AppOpener's own search
     try:
         open(app_name, match_closest=True, output=False)
         return True
@@ -59,28 +71,36 @@ def open_application(app_name):
         return False
 
 def close_application(app_name):
-    """Closes a Windows application using taskkill for robustness."""
+    """
+    Closes every process of an application, including child processes.
+    Processes get a few seconds to exit before they are force-killed; if no
+    process matches, AppOpener's close is tried as a last resort and counts
+    only if a process actually exits.
+    Returns the list of processes that were closed (empty if nothing was).
+    """
     print(f"Closing {app_name}...")
     try:
-        # First try robust taskkill
-        # /f = force, /im = image name (we try to guess executable name)
-        # This is a heuristic. AppOpener's close is sometimes weak.
-        
-        # 1. Try AppOpener first
-        close(app_name, match_closest=True, output=False)
-        
-        # 2. Force kill common names just in case
-        exe_name = app_name.lower().replace(" ", "") + ".exe"
-        os.system(f"taskkill /f /im {exe_name} >nul 2>&1")
-        
-        # 3. Handle Chrome Specifically
-        if "chrome" in app_name.lower():
-             os.system("taskkill /f /im chrome.exe >nul 2>&1")
-             
-        return True
+        result = close_processes(app_name)
     except Exception as e:
         print(f"Error closing {app_name}: {e}")
-        return False
+        return []
+    closed = result["closed"] + result["killed"]
+    if result["killed"]:
+        print(f"Force-killed: {', '.join(result['killed'])}")
+    if result["failed"]:
+        print(f"Could not close: {', '.join(result['failed'])}")
+    if not closed and not result["failed"]:
+        # Fall back to AppOpener's own name matching
+        print(f"No running process found for {app_name}, trying AppOpener")
+        try:
+            closed = exited_after(lambda: close(app_name, match_closest=True, output=False))
+        except Exception as e:
+            print(f"AppOpener could not close {app_name}: {e}")
+        if closed:
+            print(f"Closed via AppOpener: {', '.join(closed)}")
+        else:
+            print(f"AppOpener did not close any process for {app_name}")
+    return closed
 
 def shutdown_system(delay=0):
     """
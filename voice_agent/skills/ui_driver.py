@@ -0,0 +1,263 @@
+"""
+Desktop UI driver used by the automation skills (WhatsApp).
+
+Instead of fixed sleeps, skills wait for a condition - a window existing or
+being focused, a screen region changing and settling - polled with
+exponential backoff up to a deadline. DesktopUIDriver talks to the real
+desktop (pygetwindow + pyautogui); FakeUIDriver simulates an app with
+configurable delays so the flows can be exercised on Linux without a display.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+
+# Whole window, as a (left, top, width, height) region
+FULL_REGION = (0.0, 0.0, 1.0, 1.0)
+
+# How long a paste may take to show up before the clipboard is left alone
+PASTE_TIMEOUT = 3.0
+
+def wait_for(condition, timeout=10.0, initial=0.05, factor=2.0, max_interval=0.5):
+    """
+    Polls condition() with exponential backoff until it returns something
+    truthy or timeout seconds pass. Returns that value, or None on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    interval = initial
+    while True:
+        value = condition()
+        if value:
+            return value
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(interval, remaining))
+        interval = min(interval * factor, max_interval)
+
+def wait_until_stable(signature, baseline=None, timeout=3.0, settle=2, interval=0.05):
+    """
+    Waits for a UI region to change from baseline and then stop changing
+    (the same signature() settle polls in a row). Returns True if it
+    settled, False on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    last, same = None, 0
+    while time.monotonic() < deadline:
+        current = signature()
+        if current != baseline and current == last:
+            same += 1
+            if same >= settle:
+                return True
+        else:
+            same = 0
+        last = current
+        time.sleep(interval)
+    return False
+
+# ===== Real desktop =====
+
+class DesktopUIDriver:
+    """pygetwindow/pyautogui backed driver (Windows)."""
+
+    def find_window(self, title):
+        import pygetwindow as gw
+        for window in gw.getWindowsWithTitle(title):
+            if window.title.strip().lower().startswith(title.lower()) and window.width > 0:
+                return window
+        return None
+
+    def launch(self, app_name, uri=None):
+        try:
+            from AppOpener import open as open_app
+            open_app(app_name, match_closest=True)
+        except Exception:
+            # Fallback
+            os.system(f"start {uri or app_name}")
+
+    def activate(self, window):
+        if window.isMinimized:
+            window.restore()
+        try:
+            window.activate()
+        except Exception:
+            # Windows refuses focus changes from background processes at times
+            window.minimize()
+            window.restore()
+
+    def is_active(self, window):
+        return window.isActive
+
+    def region_signature(self, window, region):
+        """
+        Hash of a window region given as fractions (left, top, width, height)
+        of the window - changes whenever that part of the UI redraws.
+        """
+        import pyautogui
+        left, top, width, height = region
+        box = (
+            int(window.left + window.width * left),
+            int(window.top + window.height * top),
+            max(1, int(window.width * width)),
+            max(1, int(window.height * height)),
+        )
+        image = pyautogui.screenshot(region=box).resize((64, 64))
+        return hashlib.md5(image.tobytes()).hexdigest()
+
+    def hotkey(self, *keys):
+        import pyautogui
+        pyautogui.hotkey(*keys)
+
+    def write(self, text):
+        import pyautogui
+        pyautogui.write(text)
+
+    def press(self, key):
+        import pyautogui
+        pyautogui.press(key)
+
+    def region_text(self, window, region):
+        """
+        Text shown in a window region, read with Tesseract OCR (see
+        skills/screenshot_ocr.py), or None if OCR is not available.
+        """
+        import pyautogui
+        from skills.screenshot_ocr import find_tesseract, run_ocr
+        tesseract = find_tesseract()
+        if tesseract is None:
+            return None
+        left, top, width, height = region
+        box = (
+            int(window.left + window.width * left),
+            int(window.top + window.height * top),
+            max(1, int(window.width * width)),
+            max(1, int(window.height * height)),
+        )
+        fd, path = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        try:
+            pyautogui.screenshot(region=box).save(path)
+            return run_ocr(path, tesseract, timeout=10)
+        finally:
+            os.remove(path)
+
+    def active_window(self):
+        import pygetwindow as gw
+        return gw.getActiveWindow()
+
+    def paste(self, text, window=None, region=FULL_REGION):
+        """
+        Types text in one go via the clipboard, then restores the clipboard.
+
+        The previous clipboard (possibly a password) is only put back once the
+        paste has visibly landed in region of window (default: the whole
+        active window). If it never shows up, the app may still read the
+        clipboard later, so the pasted text is left on it instead.
+        Returns True if the previous clipboard was restored.
+        """
+        import pyautogui
+        import pyperclip
+        try:
+            previous = pyperclip.paste()
+        except Exception:
+            previous = None
+        window = window or self.active_window()
+        signature = (lambda: self.region_signature(window, region)) if window else None
+        before = signature() if signature else None
+        pyperclip.copy(text)
+        pyautogui.hotkey('ctrl', 'v')
+        if previous is None:
+            return False
+        if signature is None or not wait_for(lambda: signature() != before, timeout=PASTE_TIMEOUT):
+            print("Paste not confirmed on screen; leaving it on the clipboard")
+            return False
+        pyperclip.copy(previous)
+        return True
+
+# ===== Fake desktop (tests / benchmarks) =====
+
+class FakeWindow:
+    def __init__(self, title):
+        self.title = title
+        self.isActive = False
+        self.isMinimized = False
+
+class FakeUIDriver:
+    """
+    Simulated desktop: the app window appears launch_delay seconds after
+    launch(), and every keystroke redraws the UI render_delay seconds later.
+    All input is recorded in self.actions.
+    """
+
+    def __init__(self, launch_delay=0.5, render_delay=0.1, running=False, title="WhatsApp",
+                 contacts=None):
+        """contacts: names a search can find (None finds any name)."""
+        self.launch_delay = launch_delay
+        self.render_delay = render_delay
+        self.title = title
+        self.contacts = contacts
+        self.searched = None   # text typed into the search box, once ctrl+f focused it
+        self.open_chat = None
+        self.window = FakeWindow(title) if running else None
+        self.opens_at = None
+        self.actions = []
+        self.version = 0
+        self.visible_at = 0.0
+
+    def find_window(self, title):
+        if self.window is None and self.opens_at is not None and time.monotonic() >= self.opens_at:
+            self.window = FakeWindow(self.title)
+        if self.window is not None and self.window.title.lower().startswith(title.lower()):
+            return self.window
+        return None
+
+    def launch(self, app_name, uri=None):
+        self.actions.append(("launch", app_name))
+        if self.window is None and self.opens_at is None:
+            self.opens_at = time.monotonic() + self.launch_delay
+
+    def activate(self, window):
+        self.actions.append(("activate", window.title))
+        window.isMinimized = False
+        window.isActive = True
+
+    def is_active(self, window):
+        return window.isActive
+
+    def region_signature(self, window, region):
+        # The newest input only shows up once the app has re-rendered
+        if time.monotonic() >= self.visible_at:
+            return self.version
+        return self.version - 1
+
+    def _input(self, action):
+        self.actions.append(action)
+        self.version += 1
+        self.visible_at = time.monotonic() + self.render_delay
+
+    def hotkey(self, *keys):
+        self._input(("hotkey",) + keys)
+        if keys == ('ctrl', 'f'):
+            self.searched = ""
+
+    def region_text(self, window, region):
+        # Only the chat header has text worth reading in the simulation
+        return self.open_chat or ""
+
+    def write(self, text):
+        self._input(("write", text))
+        if self.searched is not None:
+            self.searched += text
+
+    def press(self, key):
+        self._input(("press", key))
+        if key == 'enter' and self.searched is not None:
+            # Enter in the search box opens the top match, if there is one
+            if self.contacts is None or self.searched in self.contacts:
+                self.open_chat = self.searched
+            self.searched = None
+
+    def paste(self, text, window=None, region=FULL_REGION):
+        self._input(("paste", text))
+        return True
@@ -3,6 +3,13 @@ from bs4 import BeautifulSoup
 import json
 from datetime import datetime
 
+# Service endpoints (module-level so tests/benchmarks can point them at a local stub)
+DUCKDUCKGO_API = "https://api.duckduckgo.com/"
+WIKIPEDIA_SUMMARY_API = "https://en.wikipedia.org/api/rest_v1/page/summary/"
+WEATHER_API = "https://wttr.in/"
+NEWS_API = "https://gnews.io/api/v4/top-headlines"
+DICTIONARY_API = "https://api.dictionaryapi.dev/api/v2/entries/en/"
+
 def google_search(query, num_results=3):
     """
     Performs a Google search and returns top results.
@@ -10,7 +17,7 @@ def google_search(query, num_results=3):
     """
     try:
         # Use DuckDuckGo instant answer API as fallback (more reliable)
-        url = f"https://api.duckduckgo.com/?q={query}&format=json"
+        url = f"{DUCKDUCKGO_API}?q={query}&format=json"
         response = requests.get(url, timeout=5)
         data = response.json()
         
@@ -41,7 +48,7 @@ def wikipedia_query(topic):
     """
     try:
         # Wikipedia API
-        url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{topic.replace(' ', '_')}"
+        url = f"{WIKIPEDIA_SUMMARY_API}{topic.replace(' ', '_')}"
         response = requests.get(url, timeout=5)
         
         if response.status_code == 200:
@@ -69,7 +76,7 @@ def get_weather(city):
     """
     try:
         # wttr.in is a free weather service
-        url = f"https://wttr.in/{city}?format=j1"
+        url = f"{WEATHER_API}{city}?format=j1"
         response = requests.get(url, timeout=5)
         
         if response.status_code == 200:
@@ -102,7 +109,7 @@ def get_news(category="general", country="us", num_articles=5):
     """
     try:
         # Using gnews.io free tier (no auth required for limited requests)
-        url = f"https://gnews.io/api/v4/top-headlines?category={category}&lang=en&country={country}&max={num_articles}&apikey=demo"
+        url = f"{NEWS_API}?category={category}&lang=en&country={country}&max={num_articles}&apikey=demo"
         
         # Note: 'demo' key is limited. For production, get a free API key from gnews.io
         # Or use another news API
@@ -134,7 +141,7 @@ def define_word(word):
     Returns definition or error message.
     """
     try:
-        url = f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}"
+        url = f"{DICTIONARY_API}{word}"
         response = requests.get(url, timeout=5)
         
         if response.status_code == 200:
@@ -174,7 +181,7 @@ def get_quick_fact(query):
     Returns instant answer or redirects to other search.
     """
     try:
-        url = f"https://api.duckduckgo.com/?q={query}&format=json"
+        url = f"{DUCKDUCKGO_API}?q={query}&format=json"
         response = requests.get(url, timeout=5)
         data = response.json()
         
@@ -1,49 +1,207 @@
-import pyautogui
+import re
+import threading
 import time
-from AppOpener import open
-import os
 
-def send_whatsapp_message(contact_name, message):
+from core.workers import check_cancelled
+from skills.ui_driver import DesktopUIDriver, wait_for, wait_until_stable
+
+WHATSAPP_TITLE = "WhatsApp"
+WHATSAPP_URI = "whatsapp:"
+
+# Upper bounds only - each step returns as soon as the UI is ready
+OPEN_TIMEOUT = 15   # cold start of the app
+FOCUS_TIMEOUT = 3
+RENDER_TIMEOUT = 3  # search results / chat to redraw
+
+# Longer messages are pasted from the clipboard instead of typed key by key
+PASTE_MIN_CHARS = 20
+
+# Window regions as fractions of the window (left, top, width, height)
+SEARCH_BOX_REGION = (0.0, 0.05, 0.35, 0.07)
+CHAT_LIST_REGION = (0.0, 0.12, 0.35, 0.5)
+CHAT_HEADER_REGION = (0.35, 0.0, 0.45, 0.1)
+CONVERSATION_REGION = (0.35, 0.1, 0.65, 0.8)
+COMPOSE_REGION = (0.35, 0.88, 0.65, 0.12)
+
+_DRIVER = None
+
+# Sends run on worker threads; only one may drive the keyboard at a time
+_SESSION_LOCK = threading.Lock()
+
+def get_driver():
+    """The desktop driver, created on first use."""
+    global _DRIVER
+    if _DRIVER is None:
+        _DRIVER = DesktopUIDriver()
+    return _DRIVER
+
+def open_whatsapp(driver):
+    """
+    Returns the focused WhatsApp window, reusing it if it is already open.
+    Raises RuntimeError if it does not appear or take focus in time.
+    """
+    window = driver.find_window(WHATSAPP_TITLE)
+    if window is None:
+        driver.launch("whatsapp", WHATSAPP_URI)
+        window = wait_for(lambda: driver.find_window(WHATSAPP_TITLE), timeout=OPEN_TIMEOUT)
+        if window is None:
+            raise RuntimeError(f"WhatsApp did not open within {OPEN_TIMEOUT}s")
+
+    if not driver.is_active(window):
+        driver.activate(window)
+        if not wait_for(lambda: driver.is_active(window), timeout=FOCUS_TIMEOUT):
+            raise RuntimeError("Could not bring WhatsApp to the front")
+    return window
+
+def _name_key(text):
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+def chat_header_matches(driver, window, contact_name, exact=True):
+    """
+    Whether the open chat's header names contact_name: True, False, or None
+    if the header cannot be read (no OCR available). The name is the first
+    line of the header (the second holds "online" / "last seen ...").
+
+    exact=True requires the whole name to be equal ("Ali" never matches an
+    open "Alia" or "Ali Khan" chat); exact=False accepts the contact's words
+    on word boundaries, for checking the chat a search for them opened.
+    """
+    header = driver.region_text(window, CHAT_HEADER_REGION)
+    if header is None:
+        return None
+    lines = [line for line in header.splitlines() if line.strip()]
+    shown, wanted = _name_key(lines[0] if lines else ""), _name_key(contact_name)
+    if not wanted:
+        return False
+    if exact:
+        return shown == wanted
+    return f" {wanted} " in f" {shown} "
+
+def _open_chat(driver, window, contact_name):
+    """Opens the chat with contact_name via search. Raises RuntimeError if it can't."""
+    # Ctrl + F focuses search in WhatsApp Desktop; Ctrl + A replaces the previous search
+    search_box = lambda: driver.region_signature(window, SEARCH_BOX_REGION)
+    chat_list = lambda: driver.region_signature(window, CHAT_LIST_REGION)
+    before_box, before_list = search_box(), chat_list()
+    driver.hotkey('ctrl', 'f')
+    # Typing before the box has focus would put the name into the open chat
+    if not wait_for(lambda: search_box() != before_box, timeout=FOCUS_TIMEOUT):
+        raise RuntimeError("The WhatsApp search box did not open")
+    driver.hotkey('ctrl', 'a')
+    driver.write(contact_name)
+    if not wait_until_stable(chat_list, baseline=before_list, timeout=RENDER_TIMEOUT):
+        raise RuntimeError(f"Search results for {contact_name} did not appear")
+
+    check_cancelled()
+
+    # Select first result (Enter opens the top match)
+    conversation = lambda: driver.region_signature(window, CONVERSATION_REGION)
+    before = conversation()
+    driver.press('enter')
+    opened = wait_until_stable(conversation, baseline=before, timeout=RENDER_TIMEOUT)
+
+    # Never send to whichever chat happens to be open: the header must name
+    # the contact, or (without OCR) the search must have opened some chat
+    matches = chat_header_matches(driver, window, contact_name, exact=False)
+    if matches is False or (matches is None and not opened):
+        raise RuntimeError(f"No chat found for {contact_name}")
+
+def _send_in_window(driver, window, contact_name, message):
+    """Searches for a contact in the open window and sends one message."""
+    # The chat may already be open (e.g. a second message to the same person);
+    # anything short of an exact header match goes through the search
+    if chat_header_matches(driver, window, contact_name) is not True:
+        _open_chat(driver, window, contact_name)
+    check_cancelled()  # last point where nothing has been sent yet
+
+    # Type message
+    if len(message) >= PASTE_MIN_CHARS:
+        # The user's clipboard is only restored once the text is in the compose box
+        driver.paste(message, window=window, region=COMPOSE_REGION)
+    else:
+        driver.write(message)
+
+    # Send
+    driver.press('enter')
+
+def send_whatsapp_message(contact_name, message, driver=None):
     """
     Sends a WhatsApp message using desktop automation.
     Prerequisite: WhatsApp Desktop App installed and logged in.
+    Each step waits for the UI to react instead of sleeping a fixed time.
     """
     print(f"Executing: Send '{message}' to {contact_name}")
-    
-    # 1. Open WhatsApp
-    # Using AppOpener or os.system
-    # open("whatsapp") often works, but let's try a safer way via run command if needed.
-    # AppOpener is robust for windows store apps.
+    driver = driver or get_driver()
+    start = time.monotonic()
+
+    with _SESSION_LOCK:
+        # Open WhatsApp (or reuse the open window)
+        window = open_whatsapp(driver)
+        check_cancelled()
+        _send_in_window(driver, window, contact_name, message)
+    print(f"Message sent in {time.monotonic() - start:.1f}s.")
+    return True
+
+def send_whatsapp_batch(messages, driver=None):
+    """
+    Sends several messages in one WhatsApp session.
+    messages: list of (contact, message) pairs, sent in order.
+    WhatsApp is opened once; a failure for one contact does not stop the rest.
+    Returns one status dict per message: {"contact", "status", "error"}.
+    """
+    with _SESSION_LOCK:
+        return _send_batch(messages, driver or get_driver())
+
+def _send_batch(messages, driver):
+    start = time.monotonic()
     try:
-        open("whatsapp", match_closest=True)
-    except:
-        # Fallback
-        os.system("start whatsapp:")
-    
-    # Wait for app to open
-    time.sleep(3) # Adjust based on PC speed
-    
-    # 2. Search for contact
-    # Ctrl + F usually focuses search in WhatsApp Desktop
-    pyautogui.hotkey('ctrl', 'f')
-    time.sleep(0.5)
-    
-    # Type contact name
-    pyautogui.write(contact_name)
-    time.sleep(1.0) # Wait for search results
-    
-    # Select first result (Down arrow + Enter, or just Enter if unique)
-    pyautogui.press('enter')
-    time.sleep(0.5)
-    
-    # 3. Type message
-    pyautogui.write(message)
-    time.sleep(0.5)
-    
-    # 4. Send
-    pyautogui.press('enter')
-    print("Message sent.")
+        window = open_whatsapp(driver)
+    except Exception as e:
+        return [{"contact": c, "status": "failed", "error": str(e)} for c, _ in messages]
+
+    results = []
+    for i, (contact_name, message) in enumerate(messages):
+        try:
+            check_cancelled()
+        except Exception as e:
+            # Out of time: report the rest as not sent instead of losing the statuses
+            results += [{"contact": c, "status": "failed", "error": str(e)} for c, _ in messages[i:]]
+            break
+        print(f"Executing: Send '{message}' to {contact_name}")
+        try:
+            _send_in_window(driver, window, contact_name, message)
+            results.append({"contact": contact_name, "status": "sent", "error": None})
+        except Exception as e:
+            print(f"Error sending to {contact_name}: {e}")
+            driver.press('escape')  # leave the search box for the next contact
+            results.append({"contact": contact_name, "status": "failed", "error": str(e)})
+
+    sent = sum(r["status"] == "sent" for r in results)
+    print(f"Sent {sent}/{len(results)} messages in {time.monotonic() - start:.1f}s.")
+    return results
+
+def format_batch_status(results):
+    """Short spoken summary of send_whatsapp_batch results."""
+    sent = [r["contact"] for r in results if r["status"] == "sent"]
+    failed = [r["contact"] for r in results if r["status"] != "sent"]
+    if not failed:
+        return f"Sent to {', '.join(sent)}."
+    if not sent:
+        return f"Could not send to {', '.join(failed)}."
+    return f"Sent to {', '.join(sent)}, but not to {', '.join(failed)}."
 
 if __name__ == "__main__":
-    # Test
-    send_whatsapp_message("Ali", "This is a test from Python")
+    import sys
+    if "--fake" in sys.argv:
+        # Dry run against a simulated desktop
+        from skills.ui_driver import FakeUIDriver
+        fake = FakeUIDriver()
+        send_whatsapp_message("Ali", "This is a test from Python", driver=fake)
+        send_whatsapp_message("Sara", "Second message reuses the window", driver=fake)
+        batch = send_whatsapp_batch([(c, "I'm running late, be there soon") for c in ("Ali", "Sara", "Ahmed")],
+                                    driver=fake)
+        print(format_batch_status(batch))
+        print(fake.actions)
+    else:
+        # Test
+        send_whatsapp_message("Ali", "This is a test from Python")